@@ -0,0 +1,53 @@
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from textnode import TextNode, TextType
+from leafnode import LeafNode
+
+NUM_NODES = 100000
+
+# same attributes as the node classes, but with a per-instance __dict__
+class DictTextNode():
+    def __init__(self, text, text_type, url=None):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+
+class DictLeafNode():
+    def __init__(self, tag, value, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = None
+        self.props = props
+
+###################################################################
+# Function: measure - bytes allocated per node by a factory       #
+# Input:    factory - callable creating a single node             #
+# Return:   average number of bytes per node                      #
+###################################################################
+def measure(factory):
+    texts = [f"text {i}" for i in range(NUM_NODES)]
+    tracemalloc.start()
+    nodes = [factory(text) for text in texts]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # subtract the list holding the nodes
+    return (size - sys.getsizeof(nodes)) / len(nodes)
+
+def main():
+    results = [
+        ("TextNode", lambda text: DictTextNode(text, TextType.PLAIN), lambda text: TextNode(text, TextType.PLAIN)),
+        ("LeafNode", lambda text: DictLeafNode("b", text), lambda text: LeafNode("b", text)),
+    ]
+    print(f"{'node':<10} {'__dict__':>10} {'__slots__':>10} {'saved':>8}")
+    for name, dict_factory, slot_factory in results:
+        dict_size = measure(dict_factory)
+        slot_size = measure(slot_factory)
+        saved = 100 * (dict_size - slot_size) / dict_size
+        print(f"{name:<10} {dict_size:>9.0f}B {slot_size:>9.0f}B {saved:>7.0f}%")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import os
+import random
+
+WORDS = (
+    "the ring elves hobbit shire mountain river valley wizard tower road "
+    "forest king sword song light shadow fellowship journey dwarves gold"
+).split()
+
+# name -> (description, generator function), filled below
+SCENARIOS = {}
+
+###################################################################
+# Function: sentence - random sentence with inline markdown       #
+# Input:    rng   - random number generator                       #
+#           links - probability of a link per word                #
+# Return:   sentence string                                       #
+###################################################################
+def sentence(rng, links=0.02):
+    words = []
+    for _ in range(rng.randint(6, 16)):
+        word = rng.choice(WORDS)
+        roll = rng.random()
+        if roll < links:
+            word = f"[{word}](/blog/{rng.choice(WORDS)})"
+        elif roll < links + 0.03:
+            word = f"**{word}**"
+        elif roll < links + 0.05:
+            word = f"_{word}_"
+        elif roll < links + 0.06:
+            word = f"`{word}`"
+        elif roll < links + 0.065:
+            word = f"![{word}](/images/{rng.choice(WORDS)}.png)"
+        words.append(word)
+    return " ".join(words).capitalize() + "."
+
+###################################################################
+# Function: page - random markdown page                           #
+# Input:    rng        - random number generator                  #
+#           blocks     - number of blocks after the title         #
+#           links      - probability of a link per word           #
+#           list_items - number of entries per list               #
+# Return:   markdown string                                       #
+###################################################################
+def page(rng, blocks, links=0.02, list_items=5):
+    parts = [f"# {sentence(rng, 0)[:-1]}"]
+    for i in range(blocks):
+        kind = i % 7
+        if kind == 1:
+            parts.append(f"## {rng.choice(WORDS).capitalize()} {rng.choice(WORDS)}")
+        elif kind == 3:
+            parts.append("\n".join(f"- {sentence(rng, links)}" for _ in range(list_items)))
+        elif kind == 4:
+            parts.append("\n".join(f"{n + 1}. {sentence(rng, links)}" for n in range(list_items)))
+        elif kind == 5:
+            parts.append("> " + sentence(rng, links) + "\n>\n> -- " + rng.choice(WORDS))
+        elif kind == 6 and i % 3 == 0:
+            parts.append("```\nfunc main() {\n    fmt.Println(\"" + rng.choice(WORDS) + "\")\n}\n```")
+        else:
+            parts.append("\n".join(sentence(rng, links) for _ in range(rng.randint(2, 6))))
+    return "\n\n".join(parts) + "\n"
+
+###################################################################
+# Function: write_page - write markdown page below a directory    #
+# Input:    root - content directory                              #
+#           path - path of the page relative to root              #
+#           text - markdown text                                  #
+# Return:                                                         #
+###################################################################
+def write_page(root, path, text):
+    full_path = os.path.join(root, path)
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    with open(full_path, "w") as f:
+        f.write(text)
+
+def small_pages(root, rng, scale):
+    for i in range(int(400 * scale)):
+        write_page(root, f"section{i % 20}/page{i}/index.md", page(rng, 12))
+
+def huge_pages(root, rng, scale):
+    for i in range(3):
+        write_page(root, f"huge{i}/index.md", page(rng, int(6000 * scale)))
+
+def link_dense(root, rng, scale):
+    for i in range(int(100 * scale)):
+        write_page(root, f"links/page{i}.md", page(rng, 30, links=0.5))
+
+def deep_tree(root, rng, scale):
+    for i in range(int(200 * scale)):
+        path = "/".join(f"level{d}" for d in range(i % 12 + 1))
+        write_page(root, f"{path}/page{i}.md", page(rng, 6))
+
+def long_lists(root, rng, scale):
+    for i in range(int(20 * scale)):
+        write_page(root, f"lists/page{i}.md", page(rng, 40, list_items=200))
+
+SCENARIOS["small_pages"] = ("many small pages", small_pages)
+SCENARIOS["huge_pages"] = ("a few huge pages", huge_pages)
+SCENARIOS["link_dense"] = ("link-dense paragraphs", link_dense)
+SCENARIOS["deep_tree"] = ("deep directory tree", deep_tree)
+SCENARIOS["long_lists"] = ("long lists", long_lists)
+
+###################################################################
+# Function: generate_corpus - write synthetic content tree        #
+# Input:    root     - content directory to create                #
+#           scenario - name of the scenario (see SCENARIOS)       #
+#           scale    - size factor of the corpus                  #
+#           seed     - seed for the random number generator       #
+# Return:                                                         #
+###################################################################
+def generate_corpus(root, scenario, scale=1.0, seed=1):
+    _, generator = SCENARIOS[scenario]
+    generator(root, random.Random(seed), scale)
@@ -0,0 +1,145 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import log
+from blocktype import BlockType
+from corpus import SCENARIOS, generate_corpus
+from functions import (
+    discover_pages,
+    markdown_to_blocks,
+    block_to_block_type,
+    text_to_textnodes,
+    markdown_to_html_node,
+    generate_pages_recursive
+)
+
+TEMPLATE = "<!doctype html><html><head><title>{{ Title }}</title><link href=\"/index.css\" rel=\"stylesheet\" /></head><body><article>{{ Content }}</article></body></html>"
+STAGES = ("markdown_to_blocks", "block_to_block_type", "text_to_textnodes", "to_html", "generate_pages_recursive")
+REGRESSION_THRESHOLD = 0.10
+
+###################################################################
+# Function: best_time - run function several times                #
+# Input:    function - function to time (without arguments)       #
+#           repeat   - number of runs                             #
+# Return:   fastest run time in seconds                           #
+###################################################################
+def best_time(function, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+###################################################################
+# Function: bench_scenario - time all pipeline stages on a corpus #
+# Input:    scenario - name of the corpus scenario                #
+#           scale    - size factor of the corpus                  #
+#           repeat   - number of runs per stage                   #
+# Return:   dictionary stage -> seconds, plus corpus size         #
+###################################################################
+def bench_scenario(scenario, scale, repeat):
+    with tempfile.TemporaryDirectory() as tmp:
+        content = os.path.join(tmp, "content")
+        dest = os.path.join(tmp, "docs")
+        template = os.path.join(tmp, "template.html")
+        generate_corpus(content, scenario, scale)
+        with open(template, "w") as f:
+            f.write(TEMPLATE)
+
+        markdowns = []
+        for src, _ in discover_pages(content, dest):
+            with open(src) as f:
+                markdowns.append(f.read())
+
+        blocks = [block for markdown in markdowns for block in markdown_to_blocks(markdown)]
+        typed = [(block, block_to_block_type(block)) for block in blocks]
+        paragraphs = [block.replace("\n", " ") for block, b_type in typed if b_type == BlockType.PARAGRAPH]
+        trees = [markdown_to_html_node(markdown) for markdown in markdowns]
+
+        results = {
+            "markdown_to_blocks": best_time(lambda: [markdown_to_blocks(m) for m in markdowns], repeat),
+            "block_to_block_type": best_time(lambda: [block_to_block_type(b) for b in blocks], repeat),
+            "text_to_textnodes": best_time(lambda: [text_to_textnodes(p) for p in paragraphs], repeat),
+            "to_html": best_time(lambda: [tree.to_html() for tree in trees], repeat),
+            "generate_pages_recursive": best_time(
+                lambda: generate_pages_recursive(content, template, dest, "/"), repeat
+            ),
+        }
+        results["pages"] = len(markdowns)
+        results["bytes"] = sum(len(markdown) for markdown in markdowns)
+        return results
+
+###################################################################
+# Function: compare - print comparison against a baseline         #
+# Input:    results  - current results                            #
+#           baseline - saved results                              #
+# Return:   list of regressed (scenario, stage) tuples            #
+###################################################################
+def compare(results, baseline):
+    regressions = []
+    for scenario, stages in results["scenarios"].items():
+        base_stages = baseline["scenarios"].get(scenario)
+        if base_stages is None:
+            continue
+        for stage in STAGES:
+            if stage not in base_stages:
+                continue
+            ratio = stages[stage] / base_stages[stage] if base_stages[stage] > 0 else 1.0
+            flag = ""
+            if ratio > 1 + REGRESSION_THRESHOLD:
+                flag = "  REGRESSION"
+                regressions.append((scenario, stage))
+            print(f"{scenario:<12} {stage:<26} {base_stages[stage]:>9.4f}s -> {stages[stage]:>9.4f}s  x{ratio:.2f}{flag}")
+    return regressions
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the markdown pipeline on synthetic corpora.")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="scenario to run (default: all)")
+    parser.add_argument("--scale", type=float, default=1.0, help="size factor of the corpora")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per stage, the fastest counts")
+    parser.add_argument("--save", metavar="FILE", help="save results as json (e.g. as new baseline)")
+    parser.add_argument("--compare", metavar="FILE", help="compare results against a saved baseline")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    log.quiet = True
+
+    results = {
+        "python": platform.python_version(),
+        "scale": args.scale,
+        "scenarios": {},
+    }
+    for scenario in args.scenario or sorted(SCENARIOS):
+        stages = bench_scenario(scenario, args.scale, args.repeat)
+        results["scenarios"][scenario] = stages
+        print(f"{scenario} ({SCENARIOS[scenario][0]}, {stages['pages']} pages, {stages['bytes'] // 1024} KiB)")
+        for stage in STAGES:
+            print(f"  {stage:<26} {stages[stage]:.4f}s")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=1)
+        print(f"Results saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("scale") != args.scale:
+            print(f"Warning: baseline was recorded with scale {baseline.get('scale')}")
+        if len(compare(results, baseline)) > 0:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
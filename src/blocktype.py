@@ -1,4 +1,5 @@
 from enum import Enum
+from typing import NamedTuple
 
 class BlockType(Enum):
     PARAGRAPH = "paragraph"
@@ -6,4 +7,12 @@ class BlockType(Enum):
     CODE = "code"
     QUOTE = "quote"
     UNORDERED_LIST = "unordered_list"
-    ORDERED_LIST = "ordered_list"
\ No newline at end of file
+    ORDERED_LIST = "ordered_list"
+
+# markdown block found by the block scanner, lines are counted from 0,
+# start_line is inclusive and end_line exclusive
+class Block(NamedTuple):
+    text: str
+    block_type: BlockType
+    start_line: int
+    end_line: int
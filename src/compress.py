@@ -0,0 +1,185 @@
+import gzip
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from manifest import asset_outputs
+
+try:
+    import brotli
+except ImportError:
+    # brotli variants are only written if the module is installed
+    brotli = None
+
+# text formats, images and fonts are compressed already
+COMPRESSIBLE_EXTENSIONS = (".html", ".css", ".js", ".json", ".svg", ".xml", ".txt")
+
+# smaller files fit into a single packet uncompressed
+MIN_COMPRESS_SIZE = 256
+
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+# encoding -> suffix of the precompressed sibling (e.g. index.html.gz)
+SUFFIXES = {"gzip": ".gz", "br": ".br"}
+
+###################################################################
+# Function: available_encodings - encodings variants are written  #
+#                                 for                             #
+# Input:                                                          #
+# Return:   list of encoding names                                #
+###################################################################
+def available_encodings():
+    if brotli is None:
+        return ["gzip"]
+    return ["gzip", "br"]
+
+###################################################################
+# Function: is_compressible - check if a file gets precompressed  #
+#                             variants                            #
+# Input:    path - path of the file                               #
+# Return:   True if the file is a text format                     #
+###################################################################
+def is_compressible(path):
+    return path.lower().endswith(COMPRESSIBLE_EXTENSIONS)
+
+###################################################################
+# Function: compress_data - compress file contents                #
+# Input:    data     - bytes to compress                          #
+#           encoding - "gzip" or "br"                             #
+# Return:   compressed bytes                                      #
+###################################################################
+def compress_data(data, encoding):
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    # without a timestamp equal files give equal variants
+    return gzip.compress(data, GZIP_LEVEL, mtime=0)
+
+###################################################################
+# Function: outdated_encodings - encodings whose variant of a     #
+#                                file is missing or outdated      #
+# Input:    path      - path of the file                          #
+#           encodings - encodings to check                        #
+# Return:   tuple of (list of outdated encodings, list of         #
+#           (encoding, size, compressed size) of current ones)    #
+###################################################################
+def outdated_encodings(path, encodings):
+    outdated = []
+    current = []
+    stat = os.stat(path)
+    for encoding in encodings:
+        try:
+            variant = os.stat(path + SUFFIXES[encoding])
+        except FileNotFoundError:
+            variant = None
+
+        # variants get the mtime of their file (see compress_file),
+        # unchanged pages and static files keep theirs
+        if variant is not None and variant.st_mtime_ns == stat.st_mtime_ns:
+            current.append((encoding, stat.st_size, variant.st_size))
+        else:
+            outdated.append(encoding)
+    return outdated, current
+
+###################################################################
+# Function: compress_file - write precompressed variants of a     #
+#                           file (runs in the worker processes)   #
+# Input:    job - tuple of (path, list of encodings)              #
+# Return:   list of (encoding, size, compressed size)             #
+###################################################################
+def compress_file(job):
+    path, encodings = job
+    stat = os.stat(path)
+    with open(path, "rb") as f:
+        data = f.read()
+
+    results = []
+    for encoding in encodings:
+        variant_path = path + SUFFIXES[encoding]
+        tmp_path = f"{variant_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            compressed = compress_data(data, encoding)
+            f.write(compressed)
+        os.utime(tmp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        os.replace(tmp_path, variant_path)
+        results.append((encoding, len(data), len(compressed)))
+    return results
+
+###################################################################
+# Function: remove_variants - remove precompressed variants of a  #
+#                             removed file                        #
+# Input:    path - path of the removed file                       #
+# Return:                                                         #
+###################################################################
+def remove_variants(path):
+    for suffix in SUFFIXES.values():
+        if os.path.isfile(path + suffix):
+            os.remove(path + suffix)
+
+###################################################################
+# Function: compress_files - write missing and outdated variants  #
+#                            of the given output files            #
+# Input:    paths - paths of written pages and copied static      #
+#                   files, others are ignored                     #
+#           jobs  - number of worker processes (1 = no pool)      #
+# Return:   dictionary with "written" and "current" variant       #
+#           counts and encoding -> [size, compressed size] of     #
+#           all variants                                          #
+###################################################################
+def compress_files(paths, jobs=1):
+    encodings = available_encodings()
+    stats = {"written": 0, "current": 0, "sizes": dict((encoding, [0, 0]) for encoding in encodings)}
+
+    compress_jobs = []
+    results = []
+    for path in paths:
+        if not is_compressible(path) or not os.path.isfile(path):
+            continue
+        if os.path.getsize(path) < MIN_COMPRESS_SIZE:
+            # a file grown smaller keeps no outdated variant
+            remove_variants(path)
+            continue
+        outdated, current = outdated_encodings(path, encodings)
+        stats["current"] += len(current)
+        results.extend(current)
+        if len(outdated) > 0:
+            compress_jobs.append((path, outdated))
+
+    if jobs <= 1 or len(compress_jobs) <= 1:
+        written = list(map(compress_file, compress_jobs))
+    else:
+        chunksize = max(1, len(compress_jobs) // (jobs * 4))
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            written = list(executor.map(compress_file, compress_jobs, chunksize=chunksize))
+
+    for file_results in written:
+        stats["written"] += len(file_results)
+        results.extend(file_results)
+    for encoding, size, compressed_size in results:
+        stats["sizes"][encoding][0] += size
+        stats["sizes"][encoding][1] += compressed_size
+    return stats
+
+###################################################################
+# Function: manifest_outputs - all files a build wrote into its   #
+#                              destination directory              #
+# Input:    manifest - build manifest (see manifest.py)           #
+#           dest_dir - destination directory                      #
+# Return:   list of paths                                         #
+###################################################################
+def manifest_outputs(manifest, dest_dir):
+    outputs = [entry["output"] for entry in manifest["pages"].values()]
+    for key, entry in manifest["assets"].items():
+        outputs.extend(asset_outputs(key, entry))
+    return [os.path.join(dest_dir, output) for output in sorted(outputs)]
+
+###################################################################
+# Function: format_compress_stats - summary of compress_files     #
+# Input:    stats - result of compress_files                      #
+# Return:   printable string                                      #
+###################################################################
+def format_compress_stats(stats):
+    ratios = []
+    for encoding, (size, compressed_size) in stats["sizes"].items():
+        ratio = 100 * compressed_size / size if size > 0 else 0
+        ratios.append(f"{encoding} {size // 1024} KiB -> {compressed_size // 1024} KiB ({ratio:.0f}%)")
+    return f"{stats['written']} written, {stats['current']} up to date, " + ", ".join(ratios)
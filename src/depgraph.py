@@ -0,0 +1,227 @@
+import os
+import posixpath
+import re
+from urllib.parse import unquote
+
+from template import URL_ATTRIBUTE_PATTERN
+
+# urls with a scheme (https:, mailto:, ...) or protocol relative urls
+# point outside of the site
+EXTERNAL_URL_PATTERN = re.compile(r"[a-zA-Z][a-zA-Z0-9+.-]*:|//")
+
+ASSET_PREFIX = "asset:"
+PAGE_PREFIX = "page:"
+MISSING_PREFIX = "missing:"
+
+# state of a dependency that exists but has no content state
+EXISTS = 1
+
+###################################################################
+# Function: url_path - site path a url of a page points to        #
+# Input:    url    - url as written in the markdown               #
+#           output - manifest key of the page output              #
+# Return:   path relative to the site root or None for external   #
+#           urls and urls within the page                         #
+###################################################################
+def url_path(url, output):
+    if url == "" or url.startswith("#") or EXTERNAL_URL_PATTERN.match(url):
+        return None
+
+    path = unquote(url.split("#", 1)[0].split("?", 1)[0])
+    if path.startswith("/"):
+        path = path[1:]
+    else:
+        page_dir = posixpath.dirname(output.replace("\\", "/"))
+        path = posixpath.join(page_dir, path)
+
+    trailing_slash = path == "" or path.endswith("/")
+    path = posixpath.normpath(path) if path != "" else ""
+    if path == ".":
+        path = ""
+    if trailing_slash and path != "":
+        path += "/"
+    return path
+
+# in-memory index of everything a page can point to: the copied static
+# files and the generated pages, urls are resolved without any file
+# system access
+class PathIndex():
+    def __init__(self, assets, pages):
+        # static file (relative path) -> manifest asset entry
+        self.assets = assets
+        # page output (relative path, "/" separated) -> manifest page key
+        self.pages = pages
+        # downscaled image (see images.py) -> static file it is made from
+        self.variants = {}
+        for key, entry in assets.items():
+            for variant, _ in entry.get("image", {}).get("variants", []):
+                self.variants[variant] = key
+
+    def resolve(self, url, output):
+        path = url_path(url, output)
+        if path is None:
+            return None
+
+        if path in self.assets:
+            return ASSET_PREFIX + path
+        if path in self.variants:
+            return ASSET_PREFIX + self.variants[path]
+
+        # "/blog/tom" and "/blog/tom/" are served by blog/tom/index.html
+        if path == "" or path.endswith("/"):
+            candidates = (path + "index.html",)
+        else:
+            candidates = (path, path + "/index.html", path + ".html")
+        for candidate in candidates:
+            key = self.pages.get(candidate)
+            if key is not None:
+                return PAGE_PREFIX + key
+
+        return MISSING_PREFIX + url
+
+    def state(self, target):
+        if target.startswith(ASSET_PREFIX):
+            # only what ends up in the html of a page, a changed copy of
+            # the file is the business of sync_dir
+            entry = self.assets[target[len(ASSET_PREFIX):]]
+            return [entry.get("output"), entry.get("image")]
+        if target.startswith(PAGE_PREFIX):
+            return EXISTS
+        return None
+
+    def dependencies(self, urls, output):
+        dependencies = {}
+        for url in urls:
+            target = self.resolve(url, output)
+            if target is not None:
+                dependencies[target] = self.state(target)
+        return dependencies
+
+###################################################################
+# Function: dependents - pages depending on a target              #
+# Input:    manifest - build manifest with recorded dependencies  #
+#           target   - dependency id (asset:..., page:...)        #
+# Return:   sorted list of page keys                              #
+###################################################################
+def dependents(manifest, target):
+    return sorted(
+        key for key, entry in manifest["pages"].items()
+        if target in entry.get("deps", {})
+    )
+
+###################################################################
+# Function: page_outputs - page outputs of a manifest for a       #
+#                          PathIndex                              #
+# Input:    manifest - build manifest                             #
+# Return:   dictionary page output -> page key                    #
+###################################################################
+def page_outputs(manifest):
+    return dict((entry["output"].replace(os.sep, "/"), key) for key, entry in manifest["pages"].items())
+
+###################################################################
+# Function: linking_pages - pages with links resolving to a page  #
+#                           or static file that is not in the     #
+#                           manifest yet                          #
+# Input:    manifest - build manifest with recorded urls          #
+#           index    - PathIndex including the added file         #
+#           target   - dependency id of the added file            #
+# Return:   sorted list of page keys                              #
+###################################################################
+def linking_pages(manifest, index, target):
+    return sorted(
+        page for page, entry in manifest["pages"].items()
+        if any(index.resolve(url, entry["output"]) == target for url in entry["urls"])
+    )
+
+###################################################################
+# Function: template_paths - site paths the template links to     #
+# Input:    template_path - template path                         #
+# Return:   set of paths relative to the site root                #
+###################################################################
+def template_paths(template_path):
+    with open(template_path) as f:
+        source = f.read()
+    return set(url_path(match.group(2), "") for match in URL_ATTRIBUTE_PATTERN.finditer(source))
+
+###################################################################
+# Function: affected_pages - pages regenerated when a file is     #
+#                            changed, added or removed            #
+# Input:    manifest      - build manifest of the last build      #
+#           path          - changed file                          #
+#           content_dir   - directory with markdown files         #
+#           static_dir    - directory with static files           #
+#           template_path - template path                         #
+# Return:   sorted list of page keys                              #
+###################################################################
+def affected_pages(manifest, path, content_dir, static_dir, template_path):
+    path = os.path.abspath(path)
+    # every page depends on the template
+    if path == os.path.abspath(template_path):
+        return sorted(manifest["pages"])
+
+    content_dir = os.path.abspath(content_dir)
+    if path.startswith(content_dir + os.sep):
+        key = os.path.relpath(path, content_dir)
+        if key not in manifest["pages"]:
+            # an added page and the pages whose links point to it now
+            pages = page_outputs(manifest)
+            pages[key[:-len(".md")].replace(os.sep, "/") + ".html"] = key
+            index = PathIndex(manifest["assets"], pages)
+            return sorted([key] + linking_pages(manifest, index, PAGE_PREFIX + key))
+        if not os.path.isfile(path):
+            # links to a removed page become broken
+            return dependents(manifest, PAGE_PREFIX + key)
+        # links only record that a page exists, an edited page is
+        # regenerated alone
+        return [key]
+
+    static_dir = os.path.abspath(static_dir)
+    if path.startswith(static_dir + os.sep):
+        key = os.path.relpath(path, static_dir).replace(os.sep, "/")
+        # fingerprinted names of the files the template links to are part
+        # of every page (see hash_template)
+        entry = manifest["assets"].get(key)
+        if entry is None:
+            # links to an added file were broken
+            assets = dict(manifest["assets"])
+            assets[key] = {}
+            return linking_pages(manifest, PathIndex(assets, page_outputs(manifest)), ASSET_PREFIX + key)
+        if "output" in entry and key in template_paths(template_path):
+            return sorted(manifest["pages"])
+        if os.path.isfile(path) and "output" not in entry and "image" not in entry:
+            # only the copy of a plain file changes, not the pages
+            # showing it
+            return []
+        return dependents(manifest, ASSET_PREFIX + key)
+
+    return []
+
+###################################################################
+# Function: broken_links - urls of pages which neither point to a #
+#                          page nor to a static file of the site  #
+# Input:    manifest - build manifest with recorded dependencies  #
+# Return:   sorted list of (page key, url) tuples                 #
+###################################################################
+def broken_links(manifest):
+    broken = []
+    for key, entry in manifest["pages"].items():
+        for target in entry.get("deps", {}):
+            if target.startswith(MISSING_PREFIX):
+                broken.append((key, target[len(MISSING_PREFIX):]))
+    return sorted(broken)
+
+###################################################################
+# Function: report_broken_links - print broken links and missing  #
+#                                 assets                          #
+# Input:    broken - list of (page key, url) from broken_links    #
+#           strict - raise an error if any link is broken         #
+# Return:                                                         #
+###################################################################
+def report_broken_links(broken, strict=False):
+    for key, url in broken:
+        extension = posixpath.splitext(url_path(url, "") or "")[1]
+        kind = "Missing asset" if extension not in ("", ".html") else "Broken link"
+        print(f"{kind} in {key}: {url}")
+
+    if strict and len(broken) > 0:
+        raise RuntimeError(f"Found {len(broken)} broken link(s)!")
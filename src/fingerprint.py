@@ -0,0 +1,69 @@
+import hashlib
+import posixpath
+
+# hex digits of the content hash in fingerprinted file names
+FINGERPRINT_LENGTH = 10
+
+# pages link to each other by name, they are never fingerprinted
+UNFINGERPRINTED_EXTENSIONS = (".html",)
+
+###################################################################
+# Function: is_fingerprinted - check if a static file gets a      #
+#                              fingerprinted copy                 #
+# Input:    key - path of the file relative to the static dir     #
+# Return:   True if the file is fingerprinted                     #
+###################################################################
+def is_fingerprinted(key):
+    return not key.lower().endswith(UNFINGERPRINTED_EXTENSIONS)
+
+###################################################################
+# Function: fingerprint_name - content addressed name of a file   #
+# Input:    key       - path of the file relative to the static   #
+#                       dir (e.g. images/tom.png)                 #
+#           file_hash - hex digest of the file contents           #
+# Return:   path with the hash before the extension               #
+#           (e.g. images/tom.3f9a1c07b2.png)                      #
+###################################################################
+def fingerprint_name(key, file_hash):
+    root, extension = posixpath.splitext(key.replace("\\", "/"))
+    return f"{root}.{file_hash[:FINGERPRINT_LENGTH]}{extension}"
+
+# maps urls of static files to their fingerprinted names, key identifies
+# the mapping (e.g. for caching templates compiled with it)
+class AssetMap():
+    def __init__(self, outputs):
+        # path relative to the static dir -> fingerprinted path
+        self.outputs = outputs
+        digest = hashlib.sha256()
+        for key in sorted(outputs):
+            digest.update(f"{key}\0{outputs[key]}\0".encode())
+        self.key = digest.hexdigest()
+
+    def rewrite(self, url):
+        # only site absolute urls ("/images/tom.png") are rewritten
+        end = len(url)
+        for separator in ("?", "#"):
+            position = url.find(separator)
+            if position != -1 and position < end:
+                end = position
+
+        output = self.outputs.get(url[1:end])
+        if output is None:
+            return url
+        return "/" + output + url[end:]
+
+###################################################################
+# Function: asset_map_from_manifest - fingerprinted names of all  #
+#                                     copied static files         #
+# Input:    manifest - build manifest (see sync_dir)              #
+# Return:   AssetMap or None if no file is fingerprinted          #
+###################################################################
+def asset_map_from_manifest(manifest):
+    outputs = {}
+    for key, entry in manifest["assets"].items():
+        output = entry.get("output")
+        if output is not None:
+            outputs[key.replace("\\", "/")] = output
+    if len(outputs) == 0:
+        return None
+    return AssetMap(outputs)
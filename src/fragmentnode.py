@@ -0,0 +1,68 @@
+from htmlnode import HTMLNode
+from minify import is_unquotable
+
+# marks urls while capturing rendered html (see fragment_from_nodes)
+URL_MARK = "\x00"
+
+# already rendered html, stored as parts alternating between literal html
+# and urls of href/src attributes, so the url rewrite (e.g. basepath) is
+# still applied when the fragment is written
+class FragmentNode(HTMLNode):
+    __slots__ = ()
+
+    def __init__(self, parts):
+        super().__init__(None, tuple(parts), None, None)
+
+    def to_html(self):
+        return "".join(self.value)
+
+    def write_html(self, write, url=None, minified=False):
+        if url is None:
+            write("".join(self.value))
+            return
+
+        if not minified:
+            for i, part in enumerate(self.value):
+                write(url(part) if i % 2 == 1 else part)
+            return
+
+        # quotes of url attributes are in the literal parts around the
+        # url, they are dropped once the rewritten url is known
+        parts = self.value
+        urls = [url(parts[i]) for i in range(1, len(parts), 2)]
+        unquoted = [
+            parts[2 * j].endswith("=\"") and parts[2 * j + 2].startswith("\"") and is_unquotable(target)
+            for j, target in enumerate(urls)
+        ]
+        for j, target in enumerate(urls):
+            html = parts[2 * j]
+            if j > 0 and unquoted[j - 1]:
+                html = html[1:]
+            write(html[:-1] if unquoted[j] else html)
+            write(target)
+        html = parts[-1]
+        if len(urls) > 0 and unquoted[-1]:
+            html = html[1:]
+        write(html)
+
+    def __repr__(self):
+        return f"HTML fragment with parts {self.value}."
+
+###################################################################
+# Function: fragment_parts - render nodes into fragment parts     #
+# Input:    nodes    - list of HTMLNodes                          #
+#           minified - render minified html (see minify.py)       #
+# Return:   tuple of parts (literal html, url, literal html, ...) #
+#           or None if the html can not be captured               #
+###################################################################
+def fragment_parts(nodes, minified=False):
+    html_parts = []
+    for node in nodes:
+        node.write_html(html_parts.append, lambda url: f"{URL_MARK}{url}{URL_MARK}", minified)
+
+    html = "".join(html_parts)
+    parts = tuple(html.split(URL_MARK))
+    # a mark inside of the text itself would mix up urls and html
+    if len(parts) % 2 == 0:
+        return None
+    return parts
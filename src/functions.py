@@ -1,11 +1,43 @@
 import re
 import os
+import hashlib
 import shutil
+import itertools
+from collections import Counter
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
 
 from leafnode import LeafNode
 from textnode import TextNode, TextType
-from blocktype import BlockType
+from blocktype import BlockType, Block
 from parentnode import ParentNode
+from htmlwriter import HTMLWriter
+from template import load_template
+from urls import basepath_url
+from fragmentnode import FragmentNode, URL_MARK, fragment_parts
+from inlinecache import InlineCache
+from rendercache import RenderCache
+from highlight import highlight, language_name
+from pageio import PageOutput, SourceReader, hash_files, remove_tmp_files, scan_pages
+from searchindex import block_terms, page_terms
+from depgraph import PathIndex
+from fingerprint import asset_map_from_manifest, fingerprint_name, is_fingerprinted
+from compress import SUFFIXES, remove_variants
+from images import derivative_name, image_map_from_manifest, is_responsive_image
+import log
+import profiler
+from manifest import (
+    hash_file,
+    load_manifest,
+    save_manifest,
+    new_manifest,
+    page_inputs,
+    is_page_current,
+    record_page,
+    record_asset,
+    asset_outputs,
+    stale_outputs
+)
 
 #########################################################################
 # Function: extract_markdown_images - extract alt and url from markdown #
@@ -50,7 +82,13 @@ def text_to_html_node(text_node):
             return LeafNode("a", text_node.text, {"href": text_node.url})
 
         case TextType.IMAGE:
-            return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
+            props = {"src": text_node.url, "alt": text_node.text}
+            if image_map is not None:
+                # width and height let browsers reserve the space
+                attributes = image_map.attributes(text_node.url)
+                if attributes is not None:
+                    props.update(attributes)
+            return LeafNode("img", "", props)
 
         case _:
             raise Exception("Invalid text node type.")
@@ -152,39 +190,293 @@ def split_nodes_links(old_nodes):
 
     return result_nodes
 
+# cache of rendered inline fragments (see inlinecache.py), None = disabled
+inline_cache = None
+
+# on-disk cache of rendered blocks (see rendercache.py), None = disabled
+render_cache = None
+
+# reads page sources ahead while pages are generated (see pageio.py),
+# None = sources are opened when needed
+source_reader = None
+
+# number of page outputs written, skipped (unchanged) and deleted (stale)
+output_stats = {"written": 0, "skipped": 0, "deleted": 0}
+
+# title and term counts of generated pages for the search index (see
+# searchindex.py), source path -> {"title": ..., "terms": ...},
+# None = terms are not collected
+search_terms = None
+
+# term counts of the page being generated, the terms are taken from the
+# TextNodes parsed for rendering, None = terms are not collected
+term_counter = None
+
+# urls of links and images in generated pages for the dependency graph
+# (see depgraph.py), source path -> sorted list of urls,
+# None = urls are not collected
+page_urls = None
+
+# fingerprinted names of static files used for the urls of pages and
+# templates (see fingerprint.py), None = original names
+asset_map = None
+
+# sizes and downscaled variants of images for their img elements (see
+# images.py), None = only src and alt
+image_map = None
+
+# write pages without insignificant whitespace and attribute quotes (see
+# minify.py), passed on to the templates and the html nodes
+minify_output = False
+
+# all inline elements in one pattern, the leftmost match wins, so every
+# character of an inline string is only scanned once
+INLINE_PATTERN = re.compile(
+    r"\*\*(?P<bold>.*?)\*\*"
+    r"|_(?P<italic>.*?)_"
+    r"|`(?P<code>.*?)`"
+    r"|!\[(?P<image_alt>[^\[\]]*)\]\((?P<image_url>[^\(\)]*)\)"
+    r"|(?<!!)\[(?P<link_text>[^\[\]]*)\]\((?P<link_url>[^\(\)]*)\)",
+    re.DOTALL
+)
+
+#############################################################################
+# Function: append_plain_text - add plain TextNode for text between inline  #
+#                               elements, unmatched delimiters are invalid  #
+# Input:    result_nodes - list of TextNodes to append to                   #
+#           text         - plain text                                       #
+# Return:                                                                   #
+#############################################################################
+def append_plain_text(result_nodes, text):
+    if text == "":
+        return
+
+    if "**" in text or "_" in text or "`" in text:
+        raise SyntaxError("Invalid markdown syntax!")
+
+    result_nodes.append(TextNode(text, TextType.PLAIN))
+
 #############################################################################
 # Function: text_to_textnodes - converts text into list of textnodes        #
 #                               depending on delimiter / type (image, link) #
+#                               in a single pass over the text              #
 # Input:    text - text to convert                                          #
 # Return:   list of TextNodes after splitting                               #
 #############################################################################
 def text_to_textnodes(text):
-    result_nodes = [TextNode(text, TextType.PLAIN)]
+    result_nodes = []
+    position = 0
+
+    for match in INLINE_PATTERN.finditer(text):
+        append_plain_text(result_nodes, text[position:match.start()])
+        position = match.end()
+
+        match (match.lastgroup):
+            case "bold":
+                result_nodes.append(TextNode(match.group("bold"), TextType.BOLD))
 
-    result_nodes = (split_nodes_delimiter(result_nodes, '**', TextType.BOLD))
-    result_nodes = (split_nodes_delimiter(result_nodes, '_', TextType.ITALIC))
-    result_nodes = (split_nodes_delimiter(result_nodes, '`', TextType.CODE))
-    result_nodes = (split_nodes_images(result_nodes))
-    result_nodes = (split_nodes_links(result_nodes))
+            case "italic":
+                result_nodes.append(TextNode(match.group("italic"), TextType.ITALIC))
+
+            case "code":
+                result_nodes.append(TextNode(match.group("code"), TextType.CODE))
+
+            case "image_url":
+                result_nodes.append(
+                    TextNode(match.group("image_alt"), TextType.IMAGE, match.group("image_url"))
+                )
 
+            case "link_url":
+                result_nodes.append(
+                    TextNode(match.group("link_text"), TextType.LINK, match.group("link_url"))
+                )
+
+    append_plain_text(result_nodes, text[position:])
     return result_nodes
 
+# creates Block without the overhead of the generated __new__
+new_block = partial(tuple.__new__, Block)
+
+# a run of blank lines separating two blocks
+BLANK_LINES_PATTERN = re.compile(r"\n(?:[ \t\r]*\n)+")
+# a line that may open a code block (see is_opening_fence)
+FENCE_LINE_PATTERN = re.compile(r"^[ \t]*```", re.MULTILINE)
+READ_SIZE = 1024 * 1024
+
+###################################################################
+# Function: fence_length - number of backticks of a fence         #
+# Input:    line - opening fence line                             #
+# Return:   length of the backtick run                            #
+###################################################################
+def fence_length(line):
+    stripped = line.strip()
+    return len(stripped) - len(stripped.lstrip("`"))
+
+###################################################################
+# Function: is_closing_fence - check if line closes a code block  #
+# Input:    line   - single line of markdown                      #
+#           length - backtick count of the opening fence          #
+# Return:   True if line only consists of backticks (at least as  #
+#           many as the opening fence)                            #
+###################################################################
+def is_closing_fence(line, length=3):
+    stripped = line.strip()
+    return stripped.startswith("`" * max(length, 3)) and stripped.strip("`") == ""
+
+###################################################################
+# Function: is_opening_fence - check if line opens a code block   #
+# Input:    line - single line of markdown                        #
+# Return:   True if line is a run of backticks (at least 3)       #
+#           followed by an info string without backticks          #
+###################################################################
+def is_opening_fence(line):
+    stripped = line.strip()
+    if not stripped.startswith("```"):
+        return False
+    # "```x``` inline" is inline code in a paragraph
+    return "`" not in stripped.lstrip("`")
+
+###################################################################
+# Function: find_opening_fence - find the first line of a chunk   #
+#                                that opens a code block          #
+# Input:    text - chunk of markdown                              #
+# Return:   offset of the line or None                            #
+###################################################################
+def find_opening_fence(text):
+    for match in FENCE_LINE_PATTERN.finditer(text):
+        end = text.find("\n", match.start())
+        if is_opening_fence(text[match.start():end if end != -1 else len(text)]):
+            return match.start()
+    return None
+
+###################################################################
+# Function: iter_chunks - split markdown at runs of blank lines   #
+# Input:    markdown - markdown string, open file or iterable of  #
+#                      lines (files are read in pieces)           #
+# Return:   generator of (text, following blank lines) tuples     #
+###################################################################
+def iter_chunks(markdown):
+    if isinstance(markdown, str):
+        pieces = (markdown,)
+    elif hasattr(markdown, "read"):
+        # files are read lazily while the blocks are scanned, the reads
+        # are accounted to the read phase of the profiler
+        read_phase = profiler.phase("read")
+
+        def read():
+            with read_phase:
+                return markdown.read(READ_SIZE)
+        pieces = iter(read, "")
+    else:
+        pieces = ("".join(markdown),)
+
+    # text of the current chunk is collected in pieces and only joined at
+    # the end of the chunk, only its trailing whitespace (where a
+    # separator can start) is searched again with the next piece
+    pending = []
+    tail = ""
+    for piece in itertools.chain(pieces, (None,)):
+        buffer = tail + piece if piece is not None else tail
+        position = 0
+        for match in BLANK_LINES_PATTERN.finditer(buffer):
+            # the blank lines may continue in the next piece
+            if match.end() == len(buffer) and piece is not None:
+                break
+            pending.append(buffer[position:match.start()])
+            yield "".join(pending), match.group()
+            pending = []
+            position = match.end()
+        text_end = max(position, len(buffer.rstrip(" \t\r\n")))
+        pending.append(buffer[position:text_end])
+        tail = buffer[text_end:]
+    pending.append(tail)
+    yield "".join(pending), ""
+
+###################################################################
+# Function: iter_blocks - scan markdown once and yield typed      #
+#                         blocks (separated by blank lines,       #
+#                         fenced code may contain blank lines)    #
+# Input:    markdown - markdown string, open file or iterable of  #
+#                      lines                                      #
+# Return:   generator of Blocks                                   #
+###################################################################
+def iter_blocks(markdown):
+    line = 0
+    code_lines = None
+    code_start = 0
+    code_fence = 3
+
+    for chunk, separator in iter_chunks(markdown):
+        chunk_line = line
+        line += chunk.count("\n") + separator.count("\n")
+
+        while True:
+            if code_lines is None:
+                stripped = chunk.lstrip()
+                if stripped == "":
+                    break
+
+                start = chunk_line
+                if len(stripped) != len(chunk):
+                    start += chunk.count("\n", 0, len(chunk) - len(stripped))
+
+                # a fence also interrupts a paragraph, the text before it is
+                # a block of its own
+                fence = find_opening_fence(stripped)
+                if fence != 0:
+                    text = stripped[:fence].rstrip() if fence is not None else stripped.rstrip()
+                    yield new_block((text, block_to_block_type(text), start, start + text.count("\n") + 1))
+                    if fence is None:
+                        break
+                    chunk = stripped[fence:]
+                    chunk_line = start + stripped.count("\n", 0, fence)
+                    continue
+
+                # opening fence, the block lasts until the closing fence
+                lines = stripped.split("\n")
+                code_lines = [lines[0]]
+                code_start = start
+                code_fence = fence_length(lines[0])
+                lines = lines[1:]
+                lines_start = start + 1
+            else:
+                lines = chunk.split("\n")
+                lines_start = chunk_line
+
+            close = None
+            for i, code_line in enumerate(lines):
+                if is_closing_fence(code_line, code_fence):
+                    close = i
+                    break
+
+            if close is None:
+                # blank lines inside of code blocks are kept
+                code_lines.extend(lines)
+                code_lines.extend(separator.split("\n")[1:-1])
+                break
+
+            code_lines.extend(lines[:close + 1])
+            yield Block("\n".join(code_lines).strip(), BlockType.CODE, code_start, lines_start + close + 1)
+            code_lines = None
+
+            # text after the closing fence starts a new block
+            chunk = "\n".join(lines[close + 1:])
+            chunk_line = lines_start + close + 1
+
+    if code_lines is not None:
+        # code block without closing fence lasts until the end
+        text = "\n".join(code_lines).strip()
+        yield Block(text, BlockType.CODE, code_start, code_start + text.count("\n") + 1)
+
 ###################################################################
 # Function: markdown_to_blocks - converts single markdown string  #
 #                                into list of markdown blocks     #
-#                                (split by newlines)              #
+#                                (split by blank lines)           #
 # Input:    markdown - markdown string                            #
 # Return:   list of markdown blocks (strings splitted by newline) #
 ###################################################################
 def markdown_to_blocks(markdown):
-    blocks = []
-    lines = markdown.split("\n\n")
-    for line in lines:
-        if line == "":
-            continue
-
-        blocks.append(line.strip())
-    return blocks
+    return [block.text for block in iter_blocks(markdown)]
 
 ######################################################################
 # Function: block_to_block_type - get block type from markdown block #
@@ -216,8 +508,8 @@ def block_to_block_type(markdown):
 
         return BlockType.PARAGRAPH
 
-    # code blocks
-    if markdown.startswith('```\n') and markdown.endswith('```'):
+    # code blocks (optionally with info string after the opening fence)
+    if markdown.startswith('```') and '\n' in markdown and markdown.endswith('```'):
         return BlockType.CODE
 
     # quotes
@@ -254,12 +546,137 @@ def block_to_block_type(markdown):
 # Return:   list of html children                                      #
 ########################################################################
 def text_to_children(text):
+    with profiler.phase("inline"):
+        if inline_cache is None or not inline_cache.accepts(text) or URL_MARK in text:
+            return text_to_html_nodes(text)
+        if (image_map is not None or minify_output) and "![" in text:
+            # img elements depend on the current images and on minifying
+            return text_to_html_nodes(text)
+
+        parts = inline_cache.get(text)
+        if parts is None:
+            parts = fragment_parts(text_to_html_nodes(text), minify_output)
+            inline_cache.put(text, parts)
+        elif term_counter is not None:
+            # a cached text is not parsed, only for its terms
+            term_counter.update(block_terms(text_to_textnodes(text)))
+        return [FragmentNode(parts)]
+
+########################################################################
+# Function: text_to_html_nodes - converts markdown text to LeafNodes   #
+# Input:    text - text to convert                                     #
+# Return:   list of LeafNodes                                          #
+########################################################################
+def text_to_html_nodes(text):
     html_children = []
     text_nodes = text_to_textnodes(text)
+    if term_counter is not None:
+        term_counter.update(block_terms(text_nodes))
     for text_node in text_nodes:
         html_children.append(text_to_html_node(text_node))
     return html_children
 
+########################################################################
+# Function: set_inline_cache - enable cache of rendered inline text    #
+# Input:    cache - InlineCache or None to disable caching             #
+# Return:                                                              #
+########################################################################
+def set_inline_cache(cache):
+    global inline_cache
+    inline_cache = cache
+
+########################################################################
+# Function: take_output_stats - get (and reset) page output counters   #
+# Input:                                                               #
+# Return:   dictionary with numbers of written, skipped, deleted pages #
+########################################################################
+def take_output_stats():
+    stats = dict(output_stats)
+    for name in output_stats:
+        output_stats[name] = 0
+    return stats
+
+########################################################################
+# Function: set_search_terms - enable collecting search terms of pages #
+# Input:    terms - dictionary to collect into or None to disable      #
+# Return:                                                              #
+########################################################################
+def set_search_terms(terms):
+    global search_terms
+    search_terms = terms
+
+########################################################################
+# Function: take_search_terms - get (and reset) collected search terms #
+# Input:                                                               #
+# Return:   dictionary source path -> {"title": ..., "terms": ...}     #
+########################################################################
+def take_search_terms():
+    global search_terms
+    if search_terms is None:
+        return {}
+    terms = search_terms
+    search_terms = {}
+    return terms
+
+########################################################################
+# Function: set_page_urls - enable collecting urls of pages            #
+# Input:    urls - dictionary to collect into or None to disable       #
+# Return:                                                              #
+########################################################################
+def set_page_urls(urls):
+    global page_urls
+    page_urls = urls
+
+########################################################################
+# Function: take_page_urls - get (and reset) collected urls of pages   #
+# Input:                                                               #
+# Return:   dictionary source path -> sorted list of urls              #
+########################################################################
+def take_page_urls():
+    global page_urls
+    if page_urls is None:
+        return {}
+    urls = page_urls
+    page_urls = {}
+    return urls
+
+########################################################################
+# Function: set_asset_map - set fingerprinted names of static files    #
+# Input:    assets - AssetMap or None to keep the original names       #
+# Return:                                                              #
+########################################################################
+def set_asset_map(assets):
+    global asset_map
+    asset_map = assets
+
+########################################################################
+# Function: set_image_map - set attributes of images with derivatives  #
+# Input:    images - ImageMap or None for img elements with src and    #
+#                    alt only                                          #
+# Return:                                                              #
+########################################################################
+def set_image_map(images):
+    global image_map
+    image_map = images
+
+########################################################################
+# Function: set_minify_output - enable minified page output            #
+# Input:    enabled - True to write minified html                      #
+# Return:                                                              #
+########################################################################
+def set_minify_output(enabled):
+    global minify_output
+    minify_output = enabled
+
+########################################################################
+# Function: set_render_cache - enable on-disk cache of rendered blocks #
+# Input:    cache - RenderCache or None to disable caching             #
+# Return:                                                              #
+########################################################################
+def set_render_cache(cache):
+    global render_cache
+    render_cache = cache
+
 ########################################################################
 # Function: prepare_heading_block - trim block from # symbols and      #
 #                                   and count level of heading         #
@@ -305,28 +722,72 @@ def prepare_quote_block(block):
 # Return:   list of list childrens                                          #
 #############################################################################
 def prepare_unordered_list_block(block):
-    lines = block.split('\n')
     li_children = []
-    for line in lines:
-        text = line[2:].strip()
+    for text in unordered_list_items(block):
         elem_children = text_to_children(text)
         li_children.append(ParentNode("li", elem_children))
     return li_children
 
+#############################################################################
+# Function: unordered_list_items - inline text of the list items            #
+# Input:    block - text of block                                           #
+# Return:   list of item texts                                              #
+#############################################################################
+def unordered_list_items(block):
+    return [line[2:].strip() for line in block.split('\n')]
+
 #############################################################################
 # Function: prepare_ordered_list_block - get all list children for block    #
 # Input:    block - text of block                                           #
 # Return:   list of list childrens                                          #
 #############################################################################
 def prepare_ordered_list_block(block):
-    lines = block.split('\n')
     li_children = []
-    for i, line in enumerate(lines):
-        prefix_len = len(f"{i+1}. ")
-        elem_children = text_to_children(line[prefix_len:])
+    for text in ordered_list_items(block):
+        elem_children = text_to_children(text)
         li_children.append(ParentNode("li", elem_children))
     return li_children
 
+#############################################################################
+# Function: ordered_list_items - inline text of the list items              #
+# Input:    block - text of block                                           #
+# Return:   list of item texts                                              #
+#############################################################################
+def ordered_list_items(block):
+    lines = block.split('\n')
+    return [line[len(f"{i+1}. "):] for i, line in enumerate(lines)]
+
+#############################################################################
+# Function: prepare_paragraph_block - join lines of a paragraph             #
+# Input:    block - text of block                                           #
+# Return:   inline text of the paragraph                                    #
+#############################################################################
+def prepare_paragraph_block(block):
+    lines = block.split('\n')
+    return " ".join(line.strip() for line in lines if line.strip() != "")
+
+#############################################################################
+# Function: prepare_code_block - remove code fences from block              #
+# Input:    block - text of block                                           #
+# Return:   code text                                                       #
+#############################################################################
+def prepare_code_block(block):
+    lines = block.split('\n')
+    length = fence_length(lines[0])
+    lines = lines[1:]
+    if len(lines) > 0 and is_closing_fence(lines[-1], length):
+        lines = lines[:-1]
+    return '\n'.join(lines) + '\n'
+
+###################################################################
+# Function: code_block_language - language of a fenced code block #
+# Input:    block - markdown block                                #
+# Return:   name of a supported language or None                  #
+###################################################################
+def code_block_language(block):
+    first_line = block.split('\n', 1)[0]
+    return language_name(first_line.strip().lstrip('`'))
+
 
 ####################################################################
 # Function: block_to_html - converts markdown block into html node #
@@ -337,8 +798,7 @@ def prepare_ordered_list_block(block):
 def block_to_html(block, block_type):
     match (block_type):
         case BlockType.PARAGRAPH:
-            lines = block.split('\n')
-            text = " ".join(line.strip() for line in lines if line.strip() != "")
+            text = prepare_paragraph_block(block)
             return ParentNode("p", text_to_children(text))
 
         case BlockType.HEADING:
@@ -358,8 +818,15 @@ def block_to_html(block, block_type):
             return ParentNode("ol", children)
 
         case BlockType.CODE:
-            lines = block.split('\n')
-            text = '\n'.join(lines[1:-1]) + '\n'
+            text = prepare_code_block(block)
+            # code in a known language is highlighted, other code is
+            # written as is
+            language = code_block_language(block)
+            if language is not None:
+                with profiler.phase("highlight"):
+                    html = highlight(text, language, minify_output)
+                return ParentNode("pre", [ LeafNode("code", html, {"class": f"language-{language}"}) ])
+
             text_node = TextNode(text, TextType.CODE)
             code_html_node = text_to_html_node(text_node)
             return ParentNode("pre", [ code_html_node ])
@@ -367,6 +834,73 @@ def block_to_html(block, block_type):
         case _:
             raise ValueError("Invalid block type!")
 
+####################################################################
+# Function: block_inline_texts - inline markdown texts of a block  #
+#                                as block_to_html renders them     #
+# Input:    block      - markdown block                            #
+#           block_type - type of markdown block                    #
+# Return:   list of texts, empty for code blocks                   #
+####################################################################
+def block_inline_texts(block, block_type):
+    match (block_type):
+        case BlockType.PARAGRAPH:
+            return [prepare_paragraph_block(block)]
+        case BlockType.HEADING:
+            return [prepare_heading_block(block)[0]]
+        case BlockType.QUOTE:
+            return [prepare_quote_block(block)]
+        case BlockType.UNORDERED_LIST:
+            return unordered_list_items(block)
+        case BlockType.ORDERED_LIST:
+            return ordered_list_items(block)
+        case _:
+            return []
+
+####################################################################
+# Function: block_text_nodes - parsed inline text of a block (for  #
+#                              the search terms of a block that    #
+#                              was not rendered)                   #
+# Input:    block      - markdown block                            #
+#           block_type - type of markdown block                    #
+# Return:   list of TextNodes                                      #
+####################################################################
+def block_text_nodes(block, block_type):
+    text_nodes = []
+    for text in block_inline_texts(block, block_type):
+        text_nodes.extend(text_to_textnodes(text))
+    return text_nodes
+
+####################################################################
+# Function: render_block - converts markdown block into html node, #
+#                          using the render cache if enabled       #
+# Input:    block      - markdown block                            #
+#           block_type - type of markdown block                    #
+# Return:   HTMLNode                                               #
+####################################################################
+def render_block(block, block_type):
+    if render_cache is None:
+        return block_to_html(block, block_type)
+
+    # blocks with images are cached per version of the images, minified
+    # blocks separately
+    variant = image_map.key if image_map is not None and "![" in block else ""
+    if minify_output:
+        variant += ":minify"
+    key = render_cache.key(block, block_type, variant)
+    parts = render_cache.get(key)
+    if parts is not None:
+        if term_counter is not None:
+            # a cached block is not parsed, only for its terms
+            term_counter.update(block_terms(block_text_nodes(block, block_type)))
+        return FragmentNode(parts)
+
+    html_node = block_to_html(block, block_type)
+    parts = fragment_parts([html_node], minify_output)
+    if parts is None:
+        return html_node
+    render_cache.put(key, parts)
+    return FragmentNode(parts)
+
 ###################################################################
 # Function: markdown_to_html_node - converts markdown string into #
 #                                   html nodes with children      #
@@ -374,14 +908,22 @@ def block_to_html(block, block_type):
 # Return:   HTMLNode with children                                #
 ###################################################################
 def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
+    blocks = iter_blocks(markdown)
 
     html_children = []
     outer_parent = ParentNode("div", html_children)
 
-    for block in blocks:
-        b_type = block_to_block_type(block)
-        html_node = block_to_html(block, b_type)
+    # blocks are split and typed by the scanner while iterating
+    scan_phase = profiler.phase("markdown_to_blocks")
+    block_html_phase = profiler.phase("block_to_html")
+    while True:
+        with scan_phase:
+            block = next(blocks, None)
+        if block is None:
+            break
+
+        with block_html_phase:
+            html_node = render_block(block.text, block.block_type)
         html_children.append(html_node)
 
     return outer_parent
@@ -405,45 +947,294 @@ def extract_title(markdown):
     return title
 
 ###################################################################
-# Function: copy_dir - copies contents from source directory into #
-#                      destination directory                      #
-# Input:    src  - source directory                               #
-#           dest - destination directory                          #
+# Function: block_title - get title from a markdown block         #
+# Input:    block - Block from iter_blocks                        #
+# Return:   title text or None if block is no level 1 heading     #
+###################################################################
+def block_title(block):
+    if block.block_type != BlockType.HEADING or not block.text.startswith("# "):
+        return None
+    return block.text.split('\n', 1)[0][2:]
+
+###################################################################
+# Function: write_blocks_html - convert blocks one by one and     #
+#                               write their html (the same html   #
+#                               as markdown_to_html_node)         #
+# Input:    blocks - iterable of Blocks                           #
+#           write  - function receiving the html fragments        #
+#           url    - url rewrite function for href/src            #
 # Return:                                                         #
 ###################################################################
-def copy_dir(src, dest):
+def write_blocks_html(blocks, write, url=None):
+    blocks = iter(blocks)
+    scan_phase = profiler.phase("markdown_to_blocks")
+    block_html_phase = profiler.phase("block_to_html")
+    to_html_phase = profiler.phase("to_html")
+
+    write("<div>")
+    while True:
+        with scan_phase:
+            block = next(blocks, None)
+        if block is None:
+            break
+
+        with block_html_phase:
+            html_node = render_block(block.text, block.block_type)
+        with to_html_phase:
+            html_node.write_html(write, url, minify_output)
+    write("</div>")
+
+###################################################################
+# Function: is_file_synced - check if destination file matches    #
+#                            the source file                      #
+# Input:    src_file  - path of the source file                   #
+#           dest_file - path of the destination file              #
+#           checksum  - compare content hashes instead of mtimes  #
+# Return:   True if the file does not need to be copied           #
+###################################################################
+def is_file_synced(src_file, dest_file, checksum=False):
+    try:
+        dest_stat = os.stat(dest_file)
+    except FileNotFoundError:
+        return False
+    src_stat = os.stat(src_file)
+
+    if src_stat.st_size != dest_stat.st_size:
+        return False
+
+    if checksum:
+        return hash_file(src_file) == hash_file(dest_file)
+
+    # copies keep the mtime of the source (shutil.copy2 / hardlinks)
+    return src_stat.st_mtime_ns == dest_stat.st_mtime_ns
+
+###################################################################
+# Function: sync_file - copy (or hardlink) a single file, the     #
+#                       destination is replaced atomically        #
+# Input:    src_file  - path of the source file                   #
+#           dest_file - path of the destination file              #
+#           link      - try to hardlink instead of copying        #
+# Return:                                                         #
+###################################################################
+def sync_file(src_file, dest_file, link=False):
+    os.makedirs(os.path.dirname(dest_file), exist_ok=True)
+    tmp_file = f"{dest_file}.tmp"
+    if os.path.exists(tmp_file):
+        os.remove(tmp_file)
+
+    linked = False
+    if link:
+        try:
+            os.link(src_file, tmp_file)
+            linked = True
+        except OSError:
+            # e.g. different file systems, fall back to a copy
+            linked = False
+
+    if not linked:
+        shutil.copy2(src_file, tmp_file)
+    os.replace(tmp_file, dest_file)
+
+###################################################################
+# Function: asset_hash - content hash of a static file, only      #
+#                        calculated again when its size or mtime  #
+#                        changed                                  #
+# Input:    path      - path of the file                          #
+#           stat      - os.stat result of the file                #
+#           old_entry - manifest entry of the last build or None  #
+# Return:   hex digest                                            #
+###################################################################
+def asset_hash(path, stat, old_entry):
+    if old_entry is not None and "hash" in old_entry:
+        if (old_entry["size"], old_entry["mtime"]) == (stat.st_size, stat.st_mtime_ns):
+            return old_entry["hash"]
+    return hash_file(path)
+
+###################################################################
+# Function: sync_images - copy downscaled derivatives of images   #
+#                         and record their sizes                  #
+# Input:    keys      - image paths relative to the source dir    #
+#           src_path  - source directory                          #
+#           dest_path - destination directory                     #
+#           manifest  - manifest of the current build with the    #
+#                       recorded images (including their hashes)  #
+#           images    - ImageCache the derivatives are written to #
+#           link      - hardlink files instead of copying         #
+#           jobs      - number of processes encoding images       #
+# Return:   number of copied files                                 #
+###################################################################
+def sync_images(keys, src_path, dest_path, manifest, images, link=False, jobs=1):
+    if len(keys) == 0:
+        return 0
+
+    entries = [manifest["assets"][key] for key in keys]
+    infos = images.process([
+        (os.path.join(src_path, key), entry["hash"]) for key, entry in zip(keys, entries)
+    ], jobs)
+
+    copied = 0
+    for key, entry, info in zip(keys, entries, infos):
+        extension = os.path.splitext(key.lower())[1]
+        # derivatives of fingerprinted images get content addressed names
+        output = entry.get("output", key.replace(os.sep, "/"))
+        variants = []
+        for width in info["widths"]:
+            variant = derivative_name(output, width)
+            cached_file = images.derivative_path(entry["hash"], width, extension)
+            variant_file = os.path.join(dest_path, variant)
+            if not is_file_synced(cached_file, variant_file):
+                log.info("Copy file \"", cached_file, "\" to \"", variant_file, "\"")
+                sync_file(cached_file, variant_file, link)
+                copied += 1
+            variants.append([variant, width])
+        entry["image"] = {"width": info["width"], "height": info["height"], "variants": variants}
+    return copied
+
+###################################################################
+# Function: remove_empty_dirs - remove a directory and its        #
+#                               parents while they are empty      #
+# Input:    dir_path  - directory of a removed file               #
+#           dest_path - destination directory, never removed      #
+# Return:                                                         #
+###################################################################
+def remove_empty_dirs(dir_path, dest_path):
+    while dir_path != dest_path and dir_path.startswith(dest_path + os.sep):
+        try:
+            os.rmdir(dir_path)
+        except OSError:
+            # not empty (or already removed)
+            return
+        log.info(f"Removing empty directory {dir_path}")
+        dir_path = os.path.dirname(dir_path)
+
+###################################################################
+# Function: sync_dir - synchronize destination directory with     #
+#                      source directory (like rsync), only        #
+#                      changed files are copied and files copied  #
+#                      by earlier builds but removed from the     #
+#                      source are deleted, other files in the     #
+#                      destination (e.g. generated pages) stay    #
+# Input:    src           - source directory                      #
+#           dest          - destination directory                 #
+#           manifest_path - path of the build manifest            #
+#           checksum      - compare content hashes of files       #
+#           link          - hardlink files instead of copying     #
+#           fingerprint   - also write every file under a content #
+#                           addressed name (see fingerprint.py)   #
+#           images        - ImageCache to write downscaled images #
+#                           from or None (see images.py)          #
+#           jobs          - number of processes encoding images   #
+# Return:   tuple of (number of copied, number of removed files)  #
+###################################################################
+def sync_dir(src, dest, manifest_path, checksum=False, link=False, fingerprint=False, images=None, jobs=1):
     src_path = os.path.abspath(src)
     dest_path = os.path.abspath(dest)
 
-    print("Current working dir:", os.getcwd())
-    print("Src path:", src_path)
     if not os.path.exists(src_path) or not os.path.isdir(src_path):
         raise ValueError("Invalid path for src directory")
 
-    print("Dest path:", dest_path)
-    if not os.path.exists(dest_path) or not os.path.isdir(dest_path):
-        raise ValueError("Invalid path for dest directory")
-
-    # first delete dest directory and recreate it
-    print("Clearing destination directory...")
-    shutil.rmtree(dest_path)
-    os.mkdir(dest_path)
+    old_manifest = load_manifest(manifest_path)
+    manifest = new_manifest()
+    manifest["pages"] = old_manifest["pages"]
+
+    copied = 0
+    image_keys = []
+    for dir_path, dir_names, file_names in os.walk(src_path):
+        dir_names.sort()
+        for file_name in sorted(file_names):
+            src_file = os.path.join(dir_path, file_name)
+            key = os.path.relpath(src_file, src_path)
+            dest_file = os.path.join(dest_path, key)
+
+            if not is_file_synced(src_file, dest_file, checksum):
+                log.info("Copy file \"", src_file, "\" to \"", dest_file, "\"")
+                sync_file(src_file, dest_file, link)
+                copied += 1
+
+            stat = os.stat(src_file)
+            fingerprinted = fingerprint and is_fingerprinted(key)
+            responsive = images is not None and is_responsive_image(key)
+            if not fingerprinted and not responsive:
+                record_asset(manifest, key, stat)
+                continue
 
-    # get files and directories from source
-    src_contents = os.listdir(src_path)
+            file_hash = asset_hash(src_file, stat, old_manifest["assets"].get(key))
+            output = None
+            if fingerprinted:
+                # the original name stays for urls which are not rewritten
+                output = fingerprint_name(key, file_hash)
+                fingerprint_file = os.path.join(dest_path, output)
+                if not is_file_synced(src_file, fingerprint_file):
+                    log.info("Copy file \"", src_file, "\" to \"", fingerprint_file, "\"")
+                    # always a copy, editing the source in place must not
+                    # change a file that is cached as immutable
+                    sync_file(src_file, fingerprint_file)
+                    copied += 1
+            record_asset(manifest, key, stat, file_hash, output)
+            if responsive:
+                image_keys.append(key)
+
+    # the derivatives of all images are encoded in parallel
+    copied += sync_images(image_keys, src_path, dest_path, manifest, images, link, jobs)
+
+    # only remove files which were copied from the source before
+    current = set()
+    for key, entry in manifest["assets"].items():
+        current.update(asset_outputs(key, entry))
+
+    stale = set()
+    for key, entry in old_manifest["assets"].items():
+        stale.update(asset_outputs(key, entry))
+
+    # a killed build leaves the temporary files of the pages, static
+    # files and precompressed variants it was writing, other files in
+    # the destination are never touched
+    known = current | stale | set(entry["output"] for entry in manifest["pages"].values())
+    known.update([output + suffix for output in known for suffix in SUFFIXES.values()])
+    for path in remove_tmp_files(dest_path, known):
+        log.info(f"Removing leftover temporary file {path}")
+    removed = 0
+    for key in sorted(stale - current):
+        stale_file = os.path.join(dest_path, key)
+        if os.path.isfile(stale_file):
+            log.info(f"Removing stale file {stale_file}")
+            os.remove(stale_file)
+            removed += 1
+        remove_variants(stale_file)
+        remove_empty_dirs(os.path.dirname(stale_file), dest_path)
+
+    save_manifest(manifest_path, manifest)
+    return copied, removed
 
-    for content in src_contents:
-        src_sub_path = os.path.join(src_path, content)
-        if os.path.isfile(src_sub_path):
-            # just copy files into dest dir as is
-            print("Copy file \"", src_sub_path, "\" to \"", dest_path, "\"")
-            shutil.copy(src_sub_path, dest_path)
-        else:
-            # create new directory in destination and recursivly call copy on that dir
-            dest_sub_path = os.path.join(dest_path, content)
-            os.mkdir(dest_sub_path)
-            print("Copy directory \"", src_sub_path, "\" to directory \"", dest_sub_path, "\"")
-            copy_dir(src_sub_path, dest_sub_path)
+##########################################################################
+# Function: write_page_output - write a page through its template        #
+# Input:    template - compiled Template                                 #
+#           dest     - destination path                                  #
+#           title    - html title of the page                            #
+#           content  - body html or function writing the body html       #
+# Return:   True if the page was written, False if the existing file     #
+#           already had the same contents                                #
+##########################################################################
+def write_page_output(template, dest, title, content):
+    # written by a background thread and renamed when complete
+    with PageOutput(dest) as output:
+        def write_file(data):
+            with profiler.phase("write"):
+                output.write(data)
+
+        writer = HTMLWriter(write_file)
+        with profiler.phase("template"):
+            template.write(writer.write, {
+                "Title": title,
+                "Content": content,
+            })
+            writer.flush()
+
+    if output.written:
+        output_stats["written"] += 1
+    else:
+        output_stats["skipped"] += 1
+    return output.written
 
 ##########################################################################
 # Function: generate_page -  generate html page from markdown file       #
@@ -451,35 +1242,311 @@ def copy_dir(src, dest):
 #           template_path - template path                                #
 #           dest_path     - dest path                                    #
 #           basepath         - path to the root directory of the project #
-# Return:                                                                #
+# Return:   True if the page was written, False if the existing file     #
+#           already had the same contents                                #
 ##########################################################################
 def generate_page(from_path, template_path, dest_path, basepath):
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+    return generate_page_targets(from_path, [(template_path, dest_path, basepath)]) > 0
+
+##########################################################################
+# Function: generate_page_targets - generate html pages for several      #
+#                                   targets (e.g. mirrors with other     #
+#                                   basepaths) from one markdown file,   #
+#                                   the markdown is parsed and rendered  #
+#                                   only once                            #
+# Input:    from_path - source path                                      #
+#           targets   - list of (template path, dest path, basepath)     #
+# Return:   number of written pages                                      #
+##########################################################################
+def generate_page_targets(from_path, targets):
+    global term_counter
+
+    for template_path, dest_path, _ in targets:
+        log.info(f"Generating page from {from_path} to {dest_path} using {template_path}")
+    profiler.start_page()
 
     src = os.path.abspath(from_path)
-    dest = os.path.abspath(dest_path)
-    template = os.path.abspath(template_path)
 
-    with open(src) as f:
-        markdown = f.read()
+    # templates are compiled once per build and basepath (see template.py)
+    with profiler.phase("template"):
+        templates = [
+            load_template(template_path, basepath, asset_map, minify_output) for template_path, _, basepath in targets
+        ]
+
+    # a single target is written while it is rendered, for several targets
+    # the body is rendered once with marked urls and the basepath of each
+    # target is applied when it is written
+    if len(targets) == 1:
+        url = basepath_url(targets[0][2], asset_map)
+    else:
+        def url(target):
+            return f"{URL_MARK}{target}{URL_MARK}"
+
+    # every url of the body passes the url rewrite, which collects them
+    if page_urls is not None:
+        urls = set()
+        rewrite_url = url
+
+        def url(target):
+            urls.add(target)
+            return rewrite_url(target)
+
+    # waits for a read ahead source, streamed sources are read while
+    # their blocks are scanned (see iter_chunks)
+    with profiler.phase("read"):
+        if source_reader is not None:
+            source = source_reader.open(src)
+        else:
+            source = open(src)
+
+    with source:
+        # the source is converted block by block while it is read, only
+        # the blocks up to the title heading are kept, the title is
+        # needed before the body in the template
+        blocks = iter_blocks(source)
+        title_blocks = []
+        html_title = None
+        scan_phase = profiler.phase("markdown_to_blocks")
+        while html_title is None:
+            with scan_phase:
+                block = next(blocks, None)
+            if block is None:
+                raise ValueError("Invalid markdown, no title heading!")
+            title_blocks.append(block)
+            html_title = block_title(block)
+
+        body_blocks = itertools.chain(title_blocks, blocks)
+        # terms are counted while the blocks are rendered
+        term_counter = Counter() if search_terms is not None else None
+
+        def write_body(write):
+            write_blocks_html(body_blocks, write, url)
+
+        written = 0
+        if len(targets) == 1:
+            # a body used more than once can not be streamed
+            content = write_body
+            if templates[0].slots.count("Content") > 1:
+                body_parts = []
+                write_body(body_parts.append)
+                content = "".join(body_parts)
+            written += write_page_output(templates[0], os.path.abspath(targets[0][1]), html_title, content)
+        else:
+            body_parts = []
+            write_body(body_parts.append)
+            body = FragmentNode("".join(body_parts).split(URL_MARK))
+            if len(body.value) % 2 == 0:
+                raise ValueError("Invalid markdown, contains NUL characters!")
+
+            for template, (_, dest_path, basepath) in zip(templates, targets):
+                def write_content(write, target_url=basepath_url(basepath, asset_map)):
+                    body.write_html(write, target_url, minify_output)
+                written += write_page_output(template, os.path.abspath(dest_path), html_title, write_content)
+
+    if search_terms is not None:
+        search_terms[from_path] = {"title": html_title, "terms": page_terms(term_counter)}
+    term_counter = None
+    if page_urls is not None:
+        page_urls[from_path] = sorted(urls)
+
+    if render_cache is not None:
+        render_cache.commit()
+    profiler.end_page(from_path)
+    return written
 
-    with open(template) as f:
-        html_template = f.read()
+##########################################################################
+# Function: discover_pages - find all markdown pages in content tree     #
+# Input:    dir_path_content - directory with children to generate from  #
+#           dest_dir_path    - destination directory to generate to      #
+# Return:   list of (source path, destination path) tuples               #
+##########################################################################
+def discover_pages(dir_path_content, dest_dir_path):
+    content_path = os.path.abspath(dir_path_content)
+    dest_path = os.path.abspath(dest_dir_path)
+    return scan_pages(content_path, dest_path)
 
-    html_node = markdown_to_html_node(markdown)
-    html_title = extract_title(markdown)
-    html_body = html_node.to_html()
+##########################################################################
+# Function: generate_page_job - generate a single page inside a worker   #
+#                               process, errors are returned instead of  #
+#                               raised so every page gets reported       #
+# Input:    job - tuple of (from_path, list of (template_path,           #
+#                 dest_path, basepath)), only paths are sent to the      #
+#                 worker                                                 #
+# Return:   tuple of (from_path, error message or None, worker report)   #
+##########################################################################
+def generate_page_job(job):
+    from_path, targets = job
+    try:
+        generate_page_targets(from_path, targets)
+    except Exception as e:
+        profiler.end_page(from_path)
+        return from_path, f"{type(e).__name__}: {e}", take_worker_report()
+    return from_path, None, take_worker_report()
+
+##########################################################################
+# Function: take_worker_report - collect (and reset) data recorded while #
+#                                generating pages, to send it from a     #
+#                                worker to the main process              #
+# Input:                                                                 #
+# Return:   report dictionary                                            #
+##########################################################################
+def take_worker_report():
+    report = {
+        "profile": profiler.take_records(),
+        "output": take_output_stats(),
+        "search": take_search_terms(),
+        "urls": take_page_urls(),
+        "inline_cache": None,
+        "inline_entries": [],
+        "render_cache": None,
+    }
+    if inline_cache is not None:
+        report["inline_cache"] = inline_cache.stats()
+        inline_cache.reset_stats()
+        # new entries of a persisted cache are saved by the main process
+        report["inline_entries"] = inline_cache.take_added()
+    if render_cache is not None:
+        report["render_cache"] = render_cache.stats()
+        render_cache.reset_stats()
+    return report
+
+##########################################################################
+# Function: merge_worker_report - add report of a worker to the data of  #
+#                                 the main process                       #
+# Input:    report - report from take_worker_report                      #
+# Return:                                                                #
+##########################################################################
+def merge_worker_report(report):
+    profiler.records.extend(report["profile"])
+    for name, count in report["output"].items():
+        output_stats[name] += count
+    if search_terms is not None:
+        search_terms.update(report["search"])
+    if page_urls is not None:
+        page_urls.update(report["urls"])
+    if inline_cache is not None and report["inline_cache"] is not None:
+        inline_cache.add_stats(report["inline_cache"])
+        inline_cache.add_entries(report["inline_entries"])
+    if render_cache is not None and report["render_cache"] is not None:
+        render_cache.add_stats(report["render_cache"])
+
+##########################################################################
+# Function: worker_settings - settings of the main process needed by     #
+#                             worker processes (see init_worker)         #
+# Input:                                                                 #
+# Return:   tuple of settings                                            #
+##########################################################################
+def worker_settings():
+    cache_settings = None
+    if inline_cache is not None:
+        cache_settings = (inline_cache.max_bytes, inline_cache.max_text_length, inline_cache.path)
+    render_cache_settings = None
+    if render_cache is not None:
+        render_cache_settings = (render_cache.path, render_cache.max_bytes)
+    search = search_terms is not None
+    collect_urls = page_urls is not None
+    return (log.quiet, profiler.enabled, minify_output, cache_settings, render_cache_settings, search,
+            collect_urls, asset_map, image_map)
+
+##########################################################################
+# Function: init_worker - apply settings of the main process to a        #
+#                         worker process                                 #
+# Input:    quiet          - skip per-file messages                      #
+#           profile        - record per-page profiles                    #
+#           minified       - write minified html (see minify.py)         #
+#           cache_settings - (max bytes, max text length, path) of the   #
+#                            inline cache or None                        #
+#           render_cache_settings - (path, max bytes) of the render      #
+#                                   cache or None                        #
+#           search         - collect search terms of pages               #
+#           collect_urls   - collect urls of pages                       #
+#           assets         - AssetMap of fingerprinted files or None     #
+#           images         - ImageMap of images with derivatives or None #
+# Return:                                                                #
+##########################################################################
+def init_worker(quiet, profile, minified, cache_settings, render_cache_settings, search, collect_urls, assets,
+                images):
+    log.quiet = quiet
+    profiler.enabled = profile
+    set_minify_output(minified)
+    set_asset_map(assets)
+    set_image_map(images)
+    if search:
+        set_search_terms({})
+    if collect_urls:
+        set_page_urls({})
+
+    # workers start from the persisted cache, but do not save it, their
+    # new entries are merged by the main process (see merge_worker_report)
+    if cache_settings is not None:
+        max_bytes, max_text_length, path = cache_settings
+        cache = InlineCache(max_bytes, max_text_length, path)
+        cache.load()
+        cache.reset_stats()
+        set_inline_cache(cache)
+
+    # every worker needs its own connection to the render cache
+    if render_cache_settings is not None:
+        path, max_bytes = render_cache_settings
+        set_render_cache(RenderCache(path, max_bytes))
+
+##########################################################################
+# Function: generate_pages - generate list of pages, optionally in a     #
+#                            pool of worker processes                    #
+# Input:    pages         - list of (source path, destination path)      #
+#           template_path - template path                                #
+#           basepath      - path to the root directory of the project    #
+#           jobs          - number of worker processes (1 = no pool)     #
+# Return:   list of (source path, error message) for failed pages        #
+#           (in the same order as the given pages)                       #
+##########################################################################
+def generate_pages(pages, template_path, basepath, jobs=1):
+    page_jobs = [(src, [(template_path, dest, basepath)]) for src, dest in pages]
+    return run_page_jobs(page_jobs, jobs)
 
-    html_content = html_template.replace("{{ Title }}", html_title)
-    html_content = html_content.replace("{{ Content }}", html_body)
+##########################################################################
+# Function: run_page_jobs - generate pages for their targets, optionally #
+#                           in a pool of worker processes                #
+# Input:    page_jobs - list of (source path, list of (template path,    #
+#                       destination path, basepath))                     #
+#           jobs      - number of worker processes (1 = no pool)         #
+# Return:   list of (source path, error message) for failed pages        #
+#           (in the same order as the given pages)                       #
+##########################################################################
+def run_page_jobs(page_jobs, jobs=1):
+    global source_reader
+
+    if jobs <= 1 or len(page_jobs) <= 1:
+        # sources of the next pages are read while a page is generated
+        with SourceReader([src for src, _ in page_jobs]) as reader:
+            source_reader = reader
+            try:
+                results = list(map(generate_page_job, page_jobs))
+            finally:
+                source_reader = None
+    else:
+        # map keeps the order of the pages, so reporting is deterministic
+        chunksize = max(1, len(page_jobs) // (jobs * 4))
+        with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker,
+                                 initargs=worker_settings()) as executor:
+            results = list(executor.map(generate_page_job, page_jobs, chunksize=chunksize))
+
+    for _, _, report in results:
+        merge_worker_report(report)
+    return [(src, error) for src, error, _ in results if error is not None]
 
-    html_content = html_content.replace('href="/', f'href="{basepath}')
-    html_content = html_content.replace('src="/', f'src="{basepath}')
+##########################################################################
+# Function: report_page_errors - print failed pages and raise an error   #
+# Input:    errors - list of (source path, error message)                #
+# Return:                                                                #
+##########################################################################
+def report_page_errors(errors):
+    if len(errors) == 0:
+        return
 
-    dir_name = os.path.dirname(dest)
-    os.makedirs(dir_name, exist_ok=True)
-    with open(dest, "w") as f:
-        f.write(html_content)
+    for src, error in errors:
+        print(f"Failed to generate page from {src}: {error}")
+    raise RuntimeError(f"Failed to generate {len(errors)} page(s)!")
 
 ##########################################################################
 # Function: generate_pages_recursive - generate html from nested         #
@@ -488,19 +1555,165 @@ def generate_page(from_path, template_path, dest_path, basepath):
 #           template_path    - template path                             #
 #           dest_dir_path    - destination directory to generate to      #
 #           basepath         - path to the root directory of the project #
+#           jobs             - number of worker processes                #
 # Return:                                                                #
 ##########################################################################
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath):
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath, jobs=1):
+    pages = discover_pages(dir_path_content, dest_dir_path)
+    report_page_errors(generate_pages(pages, template_path, basepath, jobs))
+
+##########################################################################
+# Function: generate_pages_incremental - generate html only for pages    #
+#                                        whose inputs changed since the  #
+#                                        last build (see manifest.py)    #
+# Input:    dir_path_content - directory with children to generate from  #
+#           template_path    - template path                             #
+#           dest_dir_path    - destination directory to generate to      #
+#           basepath         - path to the root directory of the project #
+#           manifest_path    - path of the build manifest                #
+#           jobs             - number of worker processes                #
+#           search_index     - SearchIndex to update with the terms of   #
+#                              generated pages or None                   #
+# Return:   number of generated pages                                    #
+##########################################################################
+def generate_pages_incremental(dir_path_content, template_path, dest_dir_path, basepath, manifest_path, jobs=1,
+                               search_index=None):
+    targets = [(dest_dir_path, basepath, template_path, manifest_path)]
+    return generate_sites_incremental(dir_path_content, targets, jobs, search_index)
+
+##########################################################################
+# Function: hash_template - content hash of a template for the page      #
+#                           inputs in the manifest                       #
+# Input:    template_path - path of the template                         #
+#           basepath      - path to the root directory                   #
+#           assets        - AssetMap of fingerprinted static files or    #
+#                           None                                         #
+# Return:   hex digest                                                   #
+##########################################################################
+def hash_template(template_path, basepath, assets):
+    template_hash = hash_file(template_path)
+    if assets is not None:
+        # the template output also changes with the fingerprints of the
+        # files it links to (e.g. the stylesheet)
+        template = load_template(template_path, basepath, assets, minify_output)
+        template_urls = [basepath_url(basepath, assets)(url) for url in template.urls]
+        template_hash += ":" + hashlib.sha256("\0".join(template_urls).encode()).hexdigest()
+    if minify_output:
+        # every page is written differently
+        template_hash += ":minify"
+    return template_hash
+
+##########################################################################
+# Function: generate_sites_incremental - generate html for several       #
+#                                        output trees (e.g. mirrors with #
+#                                        other basepaths or templates),  #
+#                                        every outdated page is parsed   #
+#                                        and rendered once for all trees #
+# Input:    dir_path_content - directory with children to generate from  #
+#           targets          - list of (destination directory, basepath, #
+#                              template path, manifest path), the search #
+#                              index belongs to the first one            #
+#           jobs             - number of worker processes                #
+#           search_index     - SearchIndex to update with the terms of   #
+#                              generated pages or None                   #
+# Return:   number of generated pages                                    #
+##########################################################################
+def generate_sites_incremental(dir_path_content, targets, jobs=1, search_index=None):
     content_path = os.path.abspath(dir_path_content)
-    dest_path = os.path.abspath(dest_dir_path)
 
-    contents = os.listdir(content_path)
-    for content in contents:
-        sub_path = os.path.join(content_path, content)
-        dest_sub_path = os.path.join(dest_path, content)
-        if os.path.isfile(sub_path):
-            # handle file case
-            if content.endswith(".md"):
-                generate_page(sub_path, template_path, dest_sub_path.replace(".md", ".html"), basepath)
-        else:
-            generate_pages_recursive(sub_path, template_path, dest_sub_path, basepath)
\ No newline at end of file
+    # outputs have the same relative paths in every tree
+    pages = discover_pages(content_path, os.path.abspath(targets[0][0]))
+    page_entries = {}
+    for src, dest in pages:
+        key = os.path.relpath(src, content_path)
+        output = os.path.relpath(dest, os.path.abspath(targets[0][0]))
+        page_entries[src] = (key, output)
+    source_hashes = dict(zip((src for src, _ in pages), hash_files([src for src, _ in pages])))
+
+    # fingerprinted names of static files as synced into the first tree
+    # (see sync_dir), every tree gets the same static files
+    assets = asset_map_from_manifest(load_manifest(targets[0][3]))
+    images = image_map_from_manifest(load_manifest(targets[0][3]))
+
+    # find the outdated pages of every tree first, then generate each of
+    # them once for all trees it is outdated in
+    sites = []
+    page_targets = dict((src, []) for src, _ in pages)
+    for target_number, (dest_dir_path, basepath, template_path, manifest_path) in enumerate(targets):
+        dest_path = os.path.abspath(dest_dir_path)
+        old_manifest = load_manifest(manifest_path)
+        template_hash = hash_template(template_path, basepath, assets)
+
+        # links and images are resolved against the copied static files
+        # and the pages of this build, a page is also outdated when one of
+        # them changed (see depgraph.py)
+        path_index = PathIndex(old_manifest["assets"], dict(
+            (output.replace(os.sep, "/"), key) for key, output in page_entries.values()
+        ))
+        inputs = {}
+        for src, _ in pages:
+            key, output = page_entries[src]
+            inputs[src] = page_inputs(source_hashes[src], template_hash, basepath)
+            dest = os.path.join(dest_path, output)
+            if not is_page_current(old_manifest, key, inputs[src], output, dest, path_index):
+                page_targets[src].append((template_path, dest, basepath))
+            elif target_number == 0 and search_index is not None and key not in search_index.pages:
+                # terms of the page are not known yet
+                page_targets[src].append((template_path, dest, basepath))
+        sites.append((dest_path, manifest_path, old_manifest, path_index, inputs))
+
+    page_jobs = [(src, page_targets[src]) for src, _ in pages if len(page_targets[src]) > 0]
+
+    if search_index is not None:
+        set_search_terms({})
+    set_page_urls({})
+    set_asset_map(assets)
+    set_image_map(images)
+    try:
+        errors = run_page_jobs(page_jobs, jobs)
+    finally:
+        generated_terms = take_search_terms()
+        set_search_terms(None)
+        generated_urls = take_page_urls()
+        set_page_urls(None)
+        set_asset_map(None)
+        set_image_map(None)
+
+    if search_index is not None:
+        for src, page in generated_terms.items():
+            key, output = page_entries[src]
+            search_index.update(key, output.replace(os.sep, "/"), page["title"], page["terms"])
+        for key in set(search_index.pages) - set(key for key, _ in page_entries.values()):
+            search_index.remove(key)
+
+    failed = set(src for src, _ in errors)
+    for dest_path, manifest_path, old_manifest, path_index, inputs in sites:
+        manifest = new_manifest()
+        manifest["assets"] = old_manifest["assets"]
+
+        # failed pages are not recorded, so they are generated again next time
+        for src, (key, output) in page_entries.items():
+            if src in failed:
+                continue
+            if src in generated_urls:
+                urls = generated_urls[src]
+            else:
+                urls = old_manifest["pages"][key]["urls"]
+            record_page(manifest, key, inputs[src], output, urls, path_index.dependencies(urls, output))
+
+        # remove pages whose markdown sources do not exist anymore
+        current_outputs = set(output for _, output in page_entries.values())
+        for output in stale_outputs(old_manifest, manifest):
+            if output in current_outputs:
+                continue
+            stale_path = os.path.join(dest_path, output)
+            if os.path.isfile(stale_path):
+                log.info(f"Removing stale page {stale_path}")
+                os.remove(stale_path)
+                output_stats["deleted"] += 1
+            remove_variants(stale_path)
+
+        save_manifest(manifest_path, manifest)
+
+    report_page_errors(errors)
+    return len(page_jobs)
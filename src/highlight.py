@@ -0,0 +1,227 @@
+import re
+from collections import OrderedDict
+
+from minify import format_attribute
+
+# highlighted snippets kept in memory, repeated code samples (e.g. install
+# instructions on every page) are only tokenized once per build
+HIGHLIGHT_CACHE_SIZE = 1024
+
+# token classes follow the short names of pygments, so its css themes can
+# be used for the generated html
+COMMENT = "c"
+STRING = "s"
+NUMBER = "m"
+KEYWORD = "k"
+CONSTANT = "kc"
+BUILTIN = "nb"
+FUNCTION = "nf"
+CLASS = "nc"
+DECORATOR = "nd"
+TAG = "nt"
+ATTRIBUTE = "na"
+VARIABLE = "nv"
+
+###################################################################
+# Function: words - pattern matching any of the given words       #
+# Input:    text - whitespace separated words                     #
+# Return:   regex pattern string                                  #
+###################################################################
+def words(text):
+    return r"\b(?:" + "|".join(text.split()) + r")\b"
+
+C_COMMENT = r"//[^\n]*|/\*.*?(?:\*/|\Z)"
+DOUBLE_QUOTED = r'"(?:[^"\\\n]|\\.)*"?'
+SINGLE_QUOTED = r"'(?:[^'\\\n]|\\.)*'?"
+C_NUMBER = r"\b(?:0[xX][0-9a-fA-F_]+|\d[\d_]*\.?[\d_]*(?:[eE][+-]?\d+)?)\b"
+
+# rules of every language as (token class, pattern), earlier rules win
+# when several match at the same position
+LANGUAGES = {
+    "python": [
+        (COMMENT, r"#[^\n]*"),
+        (STRING, r'(?:\b[rRbBuUfF]{1,2})?(?:"""(?:[^\\]|\\.)*?(?:"""|\Z)|\'\'\'(?:[^\\]|\\.)*?(?:\'\'\'|\Z))'),
+        (STRING, r"(?:\b[rRbBuUfF]{1,2})?(?:" + DOUBLE_QUOTED + "|" + SINGLE_QUOTED + ")"),
+        (DECORATOR, r"@[\w.]+"),
+        (FUNCTION, r"(?<=\bdef )\w+"),
+        (CLASS, r"(?<=\bclass )\w+"),
+        (CONSTANT, words("True False None")),
+        (KEYWORD, words(
+            "and as assert async await break class continue def del elif else except finally for "
+            "from global if import in is lambda nonlocal not or pass raise return try while with yield "
+            "match case"
+        )),
+        (BUILTIN, words(
+            "abs all any bool bytes dict enumerate filter float int isinstance iter len list map max "
+            "min next object open print range repr set sorted str sum super tuple type zip self"
+        )),
+        (NUMBER, C_NUMBER),
+    ],
+    "javascript": [
+        (COMMENT, C_COMMENT),
+        (STRING, DOUBLE_QUOTED + "|" + SINGLE_QUOTED + r"|`(?:[^`\\]|\\.)*`?"),
+        (FUNCTION, r"(?<=\bfunction )\w+"),
+        (CLASS, r"(?<=\bclass )\w+"),
+        (CONSTANT, words("true false null undefined NaN Infinity")),
+        (KEYWORD, words(
+            "async await break case catch class const continue debugger default delete do else export "
+            "extends finally for from function if import in instanceof let new of return static super "
+            "switch this throw try typeof var void while with yield interface type enum implements"
+        )),
+        (BUILTIN, words("Array Boolean Date Error JSON Map Math Number Object Promise RegExp Set String console window document")),
+        (NUMBER, C_NUMBER),
+    ],
+    "bash": [
+        (COMMENT, r"(?<![\w$])#[^\n]*"),
+        (STRING, DOUBLE_QUOTED + "|" + r"'[^']*'?"),
+        (VARIABLE, r"\$(?:\{[^}\n]*\}?|\w+|[@*#?$!0-9-])"),
+        (KEYWORD, words("if then else elif fi for while until do done case esac in function return local export")),
+        (BUILTIN, words("cd echo exit printf read set shift source test unset eval exec")),
+        (NUMBER, r"\b\d+\b"),
+    ],
+    "json": [
+        (ATTRIBUTE, DOUBLE_QUOTED + r"(?=\s*:)"),
+        (STRING, DOUBLE_QUOTED),
+        (CONSTANT, words("true false null")),
+        (NUMBER, r"-?\b\d+(?:\.\d+)?(?:[eE][+-]?\d+)?\b"),
+    ],
+    "html": [
+        (COMMENT, r"<!--.*?(?:-->|\Z)"),
+        (TAG, r"</?[\w:-]+|/?>"),
+        (ATTRIBUTE, r"(?<=\s)[\w:-]+(?==)"),
+        (STRING, DOUBLE_QUOTED + "|" + SINGLE_QUOTED),
+    ],
+    "css": [
+        (COMMENT, r"/\*.*?(?:\*/|\Z)"),
+        (STRING, DOUBLE_QUOTED + "|" + SINGLE_QUOTED),
+        (ATTRIBUTE, r"[\w-]+(?=\s*:[^{};]*[;}])"),
+        (NUMBER, r"#[0-9a-fA-F]{3,8}\b|-?\b\d+(?:\.\d+)?(?:%|[a-z]+)?"),
+        (KEYWORD, r"@[\w-]+|!important"),
+        (TAG, r"[.#]?[\w-]+(?=[^{};]*\{)"),
+    ],
+    "go": [
+        (COMMENT, C_COMMENT),
+        (STRING, DOUBLE_QUOTED + "|" + r"`[^`]*`?|'(?:[^'\\\n]|\\.)*'?"),
+        (FUNCTION, r"(?<=\bfunc )\w+"),
+        (CONSTANT, words("true false nil iota")),
+        (KEYWORD, words(
+            "break case chan const continue default defer else fallthrough for func go goto if import "
+            "interface map package range return select struct switch type var"
+        )),
+        (BUILTIN, words(
+            "append cap close complex copy delete len make new panic print println recover "
+            "bool byte error float32 float64 int int8 int16 int32 int64 rune string uint uint8 uint16 uint32 uint64"
+        )),
+        (NUMBER, C_NUMBER),
+    ],
+}
+
+# other names used in info strings of fenced code blocks
+ALIASES = {
+    "py": "python",
+    "python3": "python",
+    "js": "javascript",
+    "jsx": "javascript",
+    "ts": "javascript",
+    "typescript": "javascript",
+    "sh": "bash",
+    "shell": "bash",
+    "zsh": "bash",
+    "console": "bash",
+    "xml": "html",
+    "svg": "html",
+    "golang": "go",
+}
+
+# compiled tokenizers, created when a language is first used
+tokenizers = {}
+
+# language, code, minified -> highlighted html (least recently used
+# first)
+highlight_cache = OrderedDict()
+
+###################################################################
+# Function: escape_html - escape text for use in html content     #
+# Input:    text - text to escape                                 #
+# Return:   escaped text                                          #
+###################################################################
+def escape_html(text):
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+###################################################################
+# Function: language_name - normalize info string of a code block #
+# Input:    info - info string (e.g. "Python {linenos}")          #
+# Return:   name of a supported language or None                  #
+###################################################################
+def language_name(info):
+    fields = info.split()
+    if len(fields) == 0:
+        return None
+    name = fields[0].lower()
+    name = ALIASES.get(name, name)
+    return name if name in LANGUAGES else None
+
+###################################################################
+# Function: get_tokenizer - compile rules of a language into one  #
+#                           pattern (once per language)           #
+# Input:    language - name of a supported language               #
+# Return:   tuple of (compiled pattern, group name -> class)      #
+###################################################################
+def get_tokenizer(language):
+    tokenizer = tokenizers.get(language)
+    if tokenizer is None:
+        alternatives = []
+        classes = {}
+        for i, (token_class, pattern) in enumerate(LANGUAGES[language]):
+            group = f"t{i}"
+            alternatives.append(f"(?P<{group}>{pattern})")
+            classes[group] = token_class
+        pattern = re.compile("|".join(alternatives), re.DOTALL)
+        tokenizer = (pattern, classes)
+        tokenizers[language] = tokenizer
+    return tokenizer
+
+###################################################################
+# Function: tokenize_html - highlight code with a tokenizer       #
+# Input:    code     - source code                                #
+#           language - name of a supported language               #
+#           minified - minified class attributes                  #
+# Return:   html with <span class="..."> around tokens            #
+###################################################################
+def tokenize_html(code, language, minified=False):
+    pattern, classes = get_tokenizer(language)
+    spans = dict(
+        (group, f"<span{format_attribute('class', token_class, minified)}>") for group, token_class in classes.items()
+    )
+    parts = []
+    position = 0
+    for match in pattern.finditer(code):
+        token = match.group()
+        if len(token) == 0:
+            continue
+        if match.start() > position:
+            parts.append(escape_html(code[position:match.start()]))
+        parts.append(f"{spans[match.lastgroup]}{escape_html(token)}</span>")
+        position = match.end()
+    parts.append(escape_html(code[position:]))
+    return "".join(parts)
+
+###################################################################
+# Function: highlight - highlight a code snippet (cached)         #
+# Input:    code     - source code                                #
+#           language - name of a supported language               #
+#           minified - minified class attributes                  #
+# Return:   highlighted html                                      #
+###################################################################
+def highlight(code, language, minified=False):
+    key = (language, code, minified)
+    html = highlight_cache.get(key)
+    if html is not None:
+        highlight_cache.move_to_end(key)
+        return html
+
+    html = tokenize_html(code, language, minified)
+    highlight_cache[key] = html
+    if len(highlight_cache) > HIGHLIGHT_CACHE_SIZE:
+        highlight_cache.popitem(last=False)
+    return html
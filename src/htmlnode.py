@@ -1,4 +1,9 @@
+from urls import URL_ATTRIBUTES, SRCSET_ATTRIBUTES, srcset_url
+from minify import format_attribute
+
 class HTMLNode():
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
@@ -8,14 +13,26 @@ class HTMLNode():
     def to_html(self):
         raise NotImplementedError("Not implemented yet.")
 
-    def props_to_html(self):
+    def write_html(self, write, url=None, minified=False):
+        raise NotImplementedError("Not implemented yet.")
+
+    def props_to_html(self, url=None, minified=False):
         if self.props is None or self.props == "":
             return ""
 
-        formatted_props = ""
-        for prop in self.props:
-            formatted_props += f" {prop}=\"{self.props[prop]}\""
-        return formatted_props
+        if url is None and not minified:
+            return "".join(f" {prop}=\"{self.props[prop]}\"" for prop in self.props)
+
+        # url attributes are passed through the url rewrite function,
+        # minified output drops quotes where possible
+        formatted_props = []
+        for prop, value in self.props.items():
+            if url is not None and prop in URL_ATTRIBUTES:
+                value = url(value)
+            elif url is not None and prop in SRCSET_ATTRIBUTES:
+                value = srcset_url(value, url)
+            formatted_props.append(format_attribute(prop, value, minified))
+        return "".join(formatted_props)
 
     def __repr__(self):
-        return f"HTML node with tag {self.tag} and value {self.value} has as children {self.children} and as props {self.props_to_html()}."
\ No newline at end of file
+        return f"HTML node with tag {self.tag} and value {self.value} has as children {self.children} and as props {self.props_to_html()}."
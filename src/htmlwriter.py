@@ -0,0 +1,26 @@
+DEFAULT_BUFFER_SIZE = 64 * 1024
+
+# collects html fragments and passes them on to a sink (e.g. the write
+# method of a file) in joined chunks of about buffer_size characters, so
+# a rendered page never has to exist as one big string
+class HTMLWriter():
+    def __init__(self, sink, buffer_size=DEFAULT_BUFFER_SIZE):
+        self.sink = sink
+        self.buffer_size = buffer_size
+        self.parts = []
+        self.size = 0
+
+    def write(self, text):
+        self.parts.append(text)
+        self.size += len(text)
+        if self.size >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if len(self.parts) == 0:
+            return
+
+        data = "".join(self.parts)
+        self.parts = []
+        self.size = 0
+        self.sink(data)
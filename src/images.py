@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import posixpath
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from PIL import Image
+except ImportError:
+    # responsive images are only generated if Pillow is installed
+    Image = None
+
+# increase when derivatives are encoded differently, derivatives of an
+# older version are encoded again
+IMAGE_CACHE_VERSION = 1
+
+# widths of the downscaled derivatives, only widths below the width of
+# the original image are generated
+RESPONSIVE_WIDTHS = (480, 960, 1440)
+
+# extension -> Pillow format of images that get derivatives (no gifs,
+# they may be animated)
+IMAGE_FORMATS = {".png": "PNG", ".jpg": "JPEG", ".jpeg": "JPEG", ".webp": "WEBP"}
+
+JPEG_QUALITY = 82
+WEBP_QUALITY = 80
+
+###################################################################
+# Function: is_responsive_image - check if a static file gets     #
+#                                 downscaled derivatives          #
+# Input:    key - path of the file relative to the static dir     #
+# Return:   True for png, jpeg and webp images                    #
+###################################################################
+def is_responsive_image(key):
+    return posixpath.splitext(key.lower())[1] in IMAGE_FORMATS
+
+###################################################################
+# Function: derivative_name - path of a downscaled derivative     #
+# Input:    output - path the original is copied to (e.g.         #
+#                    images/tom.png)                              #
+#           width  - width of the derivative                      #
+# Return:   path with the width before the extension              #
+#           (e.g. images/tom.480w.png)                            #
+###################################################################
+def derivative_name(output, width):
+    root, extension = posixpath.splitext(output.replace("\\", "/"))
+    return f"{root}.{width}w{extension}"
+
+###################################################################
+# Function: save_image - encode an image for the web              #
+# Input:    image  - Pillow image                                 #
+#           path   - path to write to                             #
+#           format - Pillow format name                           #
+# Return:                                                         #
+###################################################################
+def save_image(image, path, format):
+    tmp_path = f"{path}.tmp"
+    if format == "JPEG":
+        image.convert("RGB").save(tmp_path, format, quality=JPEG_QUALITY, optimize=True, progressive=True)
+    elif format == "WEBP":
+        image.save(tmp_path, format, quality=WEBP_QUALITY, method=6)
+    else:
+        image.save(tmp_path, format, optimize=True)
+    os.replace(tmp_path, path)
+
+###################################################################
+# Function: derive_image - write the derivatives of an image into #
+#                          the cache (runs in the worker          #
+#                          processes)                             #
+# Input:    job - tuple of (image path, cache entry path prefix)  #
+# Return:   image info (see ImageCache.info)                      #
+###################################################################
+def derive_image(job):
+    path, prefix = job
+    extension = os.path.splitext(path.lower())[1]
+    format = IMAGE_FORMATS[extension]
+    with Image.open(path) as original:
+        original.load()
+        # palette images would be resized without filtering
+        image = original.convert("RGBA") if original.mode == "P" else original
+        width, height = image.size
+        widths = [w for w in RESPONSIVE_WIDTHS if w < width]
+        for derivative_width in widths:
+            derivative_height = max(1, round(height * derivative_width / width))
+            derivative = image.resize((derivative_width, derivative_height), Image.LANCZOS)
+            save_image(derivative, f"{prefix}-{derivative_width}{extension}", format)
+
+    info = {"width": width, "height": height, "widths": widths}
+    # written last, an entry without info is incomplete
+    with open(f"{prefix}.json", "w") as f:
+        json.dump(info, f)
+    return info
+
+# derivatives of images by content hash, kept between builds so an
+# unchanged image (or the same image under another name) is never
+# decoded and encoded again
+class ImageCache():
+    def __init__(self, path):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+
+    def prefix(self, file_hash):
+        return os.path.join(self.path, f"{IMAGE_CACHE_VERSION}", file_hash[:2], file_hash)
+
+    def derivative_path(self, file_hash, width, extension):
+        return f"{self.prefix(file_hash)}-{width}{extension}"
+
+    def info(self, file_hash, extension):
+        # dictionary with width, height and widths of the derivatives
+        try:
+            with open(f"{self.prefix(file_hash)}.json") as f:
+                info = json.load(f)
+        except (OSError, ValueError):
+            return None
+        for width in info["widths"]:
+            if not os.path.isfile(self.derivative_path(file_hash, width, extension)):
+                return None
+        return info
+
+    def process(self, images, jobs=1):
+        # images: list of (image path, content hash), returns the infos
+        # in the same order
+        infos = []
+        derive_jobs = []
+        for path, file_hash in images:
+            info = self.info(file_hash, os.path.splitext(path.lower())[1])
+            if info is None:
+                os.makedirs(os.path.dirname(self.prefix(file_hash)), exist_ok=True)
+                derive_jobs.append((path, self.prefix(file_hash)))
+            infos.append(info)
+        self.hits += len(images) - len(derive_jobs)
+        self.misses += len(derive_jobs)
+
+        if jobs <= 1 or len(derive_jobs) <= 1:
+            derived = list(map(derive_image, derive_jobs))
+        else:
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                derived = list(executor.map(derive_image, derive_jobs))
+
+        derived = iter(derived)
+        return [info if info is not None else next(derived) for info in infos]
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+# attributes of the images of the site for img elements, key identifies
+# the mapping (e.g. for caching rendered blocks with it)
+class ImageMap():
+    def __init__(self, images):
+        # path relative to the static dir -> manifest image entry
+        self.images = images
+        digest = hashlib.sha256()
+        digest.update(json.dumps(images, sort_keys=True).encode())
+        self.key = digest.hexdigest()
+
+    def attributes(self, url):
+        # only site absolute urls ("/images/tom.png") are known
+        if not url.startswith("/"):
+            return None
+        image = self.images.get(url[1:])
+        if image is None:
+            return None
+
+        attributes = {"width": str(image["width"]), "height": str(image["height"])}
+        if len(image["variants"]) > 0:
+            # the original is the largest candidate, its url is rewritten
+            # like the src url (e.g. fingerprinted)
+            candidates = [f"/{variant} {width}w" for variant, width in image["variants"]]
+            candidates.append(f"{url} {image['width']}w")
+            attributes["srcset"] = ", ".join(candidates)
+        return attributes
+
+###################################################################
+# Function: image_map_from_manifest - attributes of all images    #
+#                                     with derivatives            #
+# Input:    manifest - build manifest (see sync_dir)              #
+# Return:   ImageMap or None if no image has derivatives          #
+###################################################################
+def image_map_from_manifest(manifest):
+    images = {}
+    for key, entry in manifest["assets"].items():
+        image = entry.get("image")
+        if image is not None:
+            images[key.replace("\\", "/")] = image
+    if len(images) == 0:
+        return None
+    return ImageMap(images)
@@ -0,0 +1,122 @@
+import os
+import pickle
+from collections import OrderedDict
+
+# increase when the inline html output changes, persisted caches of an
+# older version are discarded
+INLINE_CACHE_VERSION = 1
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_TEXT_LENGTH = 512
+
+# approximate memory of a cache entry besides its strings
+ENTRY_OVERHEAD = 200
+
+# bounded LRU cache from inline markdown text to rendered fragment parts
+# (see fragmentnode.py), the size is estimated from the string lengths
+class InlineCache():
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, max_text_length=DEFAULT_MAX_TEXT_LENGTH, path=None):
+        self.max_bytes = max_bytes
+        self.max_text_length = max_text_length
+        # file the cache is persisted in between builds (see load/save)
+        self.path = path
+        self.entries = OrderedDict()
+        # texts put since the last take_added, workers send the entries
+        # of a persisted cache back to the main process (see save)
+        self.added = []
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def accepts(self, text):
+        # long texts are rarely repeated and would only push out entries
+        return len(text) <= self.max_text_length
+
+    def get(self, text):
+        parts = self.entries.get(text)
+        if parts is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.entries.move_to_end(text)
+        return parts
+
+    def put(self, text, parts):
+        if text in self.entries:
+            return
+
+        self.entries[text] = parts
+        if self.path is not None:
+            self.added.append(text)
+        self.size += entry_size(text, parts)
+        while self.size > self.max_bytes and len(self.entries) > 0:
+            old_text, old_parts = self.entries.popitem(last=False)
+            self.size -= entry_size(old_text, old_parts)
+            self.evictions += 1
+
+    def take_added(self):
+        # list of (text, parts) of the added entries still cached
+        added = [(text, self.entries[text]) for text in self.added if text in self.entries]
+        self.added = []
+        return added
+
+    def add_entries(self, entries):
+        for text, parts in entries:
+            self.put(text, parts)
+
+    def add_stats(self, stats):
+        self.hits += stats["hits"]
+        self.misses += stats["misses"]
+        self.evictions += stats["evictions"]
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self.entries),
+            "bytes": self.size,
+        }
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def load(self, path=None):
+        path = path if path is not None else self.path
+        if path is None or not os.path.isfile(path):
+            return
+
+        try:
+            with open(path, "rb") as f:
+                version, entries = pickle.load(f)
+        except (OSError, ValueError, EOFError, pickle.UnpicklingError):
+            return
+
+        if version != INLINE_CACHE_VERSION:
+            return
+
+        self.add_entries(entries)
+        self.added = []
+
+    def save(self, path=None):
+        path = path if path is not None else self.path
+        dir_name = os.path.dirname(os.path.abspath(path))
+        os.makedirs(dir_name, exist_ok=True)
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump((INLINE_CACHE_VERSION, list(self.entries.items())), f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+###################################################################
+# Function: entry_size - estimate memory of a cache entry         #
+# Input:    text  - inline markdown text                          #
+#           parts - fragment parts                                #
+# Return:   size in bytes                                         #
+###################################################################
+def entry_size(text, parts):
+    return ENTRY_OVERHEAD + len(text) + sum(len(part) for part in parts)
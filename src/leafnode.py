@@ -1,10 +1,18 @@
 from htmlnode import HTMLNode
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         super().__init__(tag, value, None, props)
 
     def to_html(self):
+        return self.format_html()
+
+    def write_html(self, write, url=None, minified=False):
+        write(self.format_html(url, minified))
+
+    def format_html(self, url=None, minified=False):
         if self.value is None:
             raise ValueError
 
@@ -13,9 +21,9 @@ class LeafNode(HTMLNode):
 
         formatted_props = ""
         if self.props is not None:
-            formatted_props = self.props_to_html()
+            formatted_props = self.props_to_html(url, minified)
 
         return f"<{self.tag}{formatted_props}>{self.value}</{self.tag}>"
 
     def __repr__(self):
-        return f"HTML node with tag {self.tag} and value {self.value} has as props {self.props}."
\ No newline at end of file
+        return f"HTML node with tag {self.tag} and value {self.value} has as props {self.props}."
@@ -0,0 +1,12 @@
+# per-file progress messages are skipped in quiet mode, errors and
+# summaries are always printed
+quiet = False
+
+###################################################################
+# Function: info - print progress message unless quiet is set     #
+# Input:    args - values to print (like print)                   #
+# Return:                                                         #
+###################################################################
+def info(*args):
+    if not quiet:
+        print(*args)
@@ -1,15 +1,225 @@
-import sys
+import argparse
+import os
+import re
+import time
 
 from textnode import TextNode, TextType
-from functions import copy_dir, generate_pages_recursive
+from functions import (
+    sync_dir,
+    generate_sites_incremental,
+    set_inline_cache,
+    set_render_cache,
+    set_minify_output,
+    take_output_stats
+)
+from searchindex import SearchIndex, SEARCH_INDEX_DIR, index_files
+from compress import compress_files, manifest_outputs, format_compress_stats
+import images
+from depgraph import affected_pages, broken_links, report_broken_links
+from manifest import load_manifest
+from inlinecache import InlineCache
+from rendercache import RenderCache
+from watch import SiteWatcher
+import log
+import profiler
+
+MANIFEST_PATH = ".cache/manifest.json"
+PROFILE_PATH = ".cache/profile.json"
+INLINE_CACHE_PATH = ".cache/inline-cache.pickle"
+RENDER_CACHE_PATH = ".cache/render-cache.sqlite"
+SEARCH_TERMS_PATH = ".cache/search-terms.json"
+IMAGE_CACHE_PATH = ".cache/images"
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate static site from markdown content.")
+    parser.add_argument("basepath", nargs="?", default="/",
+                        help="path to the root directory of the project (default: /)")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="number of worker processes used to generate pages")
+    parser.add_argument("--checksum", action="store_true",
+                        help="compare static files by content hash instead of size and mtime")
+    parser.add_argument("--hardlink", action="store_true",
+                        help="hardlink static files instead of copying them (if supported), "
+                             "fingerprinted files are always copied")
+    parser.add_argument("--watch", action="store_true",
+                        help="keep running and regenerate pages when content, static files or the template change")
+    parser.add_argument("-q", "--quiet", action="store_true",
+                        help="do not print a message for every copied file and generated page")
+    parser.add_argument("--profile", nargs="?", const=PROFILE_PATH, default=None, metavar="FILE",
+                        help=f"write per-page and per-phase timings as json (default: {PROFILE_PATH})")
+    parser.add_argument("--inline-cache", type=float, default=0, metavar="MB",
+                        help="cache rendered inline text across pages, up to MB megabytes (default: off)")
+    parser.add_argument("--persist-inline-cache", action="store_true",
+                        help=f"keep the inline cache between builds in {INLINE_CACHE_PATH}")
+    parser.add_argument("--render-cache", type=float, default=0, metavar="MB",
+                        help=f"reuse rendered blocks between builds from {RENDER_CACHE_PATH}, "
+                             "up to MB megabytes (default: off)")
+    parser.add_argument("--mirror", nargs="+", action="append", default=[], metavar="ARG",
+                        help="also write the site to DIR with BASEPATH (and TEMPLATE) in the same run: "
+                             "--mirror DIR BASEPATH [TEMPLATE], can be repeated")
+    parser.add_argument("--rebuilds", metavar="PATH",
+                        help="only print the pages regenerated when PATH (a markdown file, a static file "
+                             "or the template) changes, according to the last build")
+    parser.add_argument("--strict-links", action="store_true",
+                        help="fail the build if a page links to a missing page or static file")
+    parser.add_argument("--fingerprint", action="store_true",
+                        help="also write static files under content hashed names (e.g. tom.3f9a1c07b2.png) "
+                             "and point page and template urls at them")
+    parser.add_argument("--responsive-images", action="store_true",
+                        help=f"write downscaled variants of png, jpeg and webp images (cached in "
+                             f"{IMAGE_CACHE_PATH}) and give img elements srcset, width and height, "
+                             "needs Pillow")
+    parser.add_argument("--minify", action="store_true",
+                        help="write pages without template whitespace, comments and redundant attribute quotes")
+    parser.add_argument("--compress", action="store_true",
+                        help="write precompressed .gz (and .br if brotli is installed) siblings of pages "
+                             "and text static files")
+    parser.add_argument("--search-index", action="store_true",
+                        help=f"write a sharded search index of all pages to docs/{SEARCH_INDEX_DIR}/")
+    args = parser.parse_args()
+    # the watcher only regenerates docs, mirrors would go stale
+    if args.watch and len(args.mirror) > 0:
+        parser.error("--watch cannot be combined with --mirror")
+    return args
+
+###################################################################
+# Function: mirror_targets - output trees of the build            #
+# Input:    basepath - basepath of the main tree (docs)           #
+#           mirrors  - values of the --mirror options             #
+# Return:   list of (destination directory, basepath, template    #
+#           path, manifest path)                                  #
+###################################################################
+def mirror_targets(basepath, mirrors):
+    targets = [("docs", basepath, "template.html", MANIFEST_PATH)]
+    for mirror in mirrors:
+        if len(mirror) not in (2, 3):
+            raise ValueError("Invalid --mirror, expected DIR BASEPATH [TEMPLATE]")
+        dest_dir, mirror_basepath = mirror[0], mirror[1]
+        template_path = mirror[2] if len(mirror) == 3 else "template.html"
+        # every tree keeps its own manifest of copied files and pages
+        name = re.sub(r"[^\w.-]+", "_", os.path.normpath(dest_dir).strip(os.sep))
+        targets.append((dest_dir, mirror_basepath, template_path, f".cache/manifest-{name}.json"))
+    return targets
 
 def main():
-    basepath = "/"
-    if (len(sys.argv) > 1) and sys.argv[1] is not None and sys.argv[1] != "":
-        basepath = sys.argv[1]
+    args = parse_args()
+    basepath = args.basepath
+    if basepath is None or basepath == "":
+        basepath = "/"
+    targets = mirror_targets(basepath, args.mirror)
+
+    if args.rebuilds is not None:
+        manifest = load_manifest(MANIFEST_PATH)
+        for key in affected_pages(manifest, args.rebuilds, "content", "static", "template.html"):
+            # an added page is not in the manifest yet
+            output = manifest["pages"][key]["output"] if key in manifest["pages"] else key[:-len(".md")] + ".html"
+            print(os.path.join("docs", output))
+        return
+
+    log.quiet = args.quiet
+    profiler.enabled = args.profile is not None
+    set_minify_output(args.minify)
+
+    inline_cache = None
+    if args.inline_cache > 0:
+        cache_path = INLINE_CACHE_PATH if args.persist_inline_cache else None
+        inline_cache = InlineCache(int(args.inline_cache * 1024 * 1024), path=cache_path)
+        inline_cache.load()
+        set_inline_cache(inline_cache)
+
+    render_cache = None
+    if args.render_cache > 0:
+        render_cache = RenderCache(RENDER_CACHE_PATH, int(args.render_cache * 1024 * 1024))
+        set_render_cache(render_cache)
+
+    image_cache = None
+    if args.responsive_images:
+        if images.Image is None:
+            print("Pillow is not installed, images are copied without downscaled variants")
+        else:
+            image_cache = images.ImageCache(IMAGE_CACHE_PATH)
+
+    # only changed static files are copied and only pages with changed
+    # inputs are regenerated
+    start = time.perf_counter()
+    for dest_dir, _, _, manifest_path in targets:
+        copied, removed = sync_dir("static", dest_dir, manifest_path, args.checksum, args.hardlink,
+                                   args.fingerprint, image_cache, args.jobs)
+        print(f"Static files ({dest_dir}): {copied} copied, {removed} removed")
+    sync_time = time.perf_counter() - start
+    if image_cache is not None:
+        stats = image_cache.stats()
+        print(f"Image cache: {stats['hits']} hits, {stats['misses']} encoded")
+
+    search_index = None
+    if args.search_index:
+        search_index = SearchIndex(SEARCH_TERMS_PATH)
+        search_index.load()
+
+    start = time.perf_counter()
+    # every page is rendered once for all trees (see generate_sites_incremental)
+    generated = generate_sites_incremental("content", targets, args.jobs, search_index)
+    generate_time = time.perf_counter() - start
+    stats = take_output_stats()
+    print(f"Pages: {generated} generated, {stats['written']} written, "
+          f"{stats['skipped']} unchanged, {stats['deleted']} deleted")
+
+    # links were resolved while the pages were generated (see depgraph.py)
+    report_broken_links(broken_links(load_manifest(MANIFEST_PATH)), args.strict_links)
+
+    if search_index is not None:
+        start = time.perf_counter()
+        # the index has relative urls, the same files work for every tree
+        for dest_dir, _, _, _ in targets:
+            shards = search_index.write(os.path.join(dest_dir, SEARCH_INDEX_DIR))
+        search_index.save()
+        search_time = time.perf_counter() - start
+        print(f"Search index: {len(search_index.pages)} pages, {shards} shard(s) in {search_time * 1000:.0f} ms")
+
+    compress_time = 0
+    if args.compress:
+        start = time.perf_counter()
+        # variants of unchanged outputs are up to date already, only the
+        # written pages and copied files are compressed again
+        paths = []
+        for dest_dir, _, _, manifest_path in targets:
+            paths.extend(manifest_outputs(load_manifest(manifest_path), dest_dir))
+            if search_index is not None:
+                paths.extend(index_files(os.path.join(dest_dir, SEARCH_INDEX_DIR)))
+        stats = compress_files(paths, args.jobs)
+        compress_time = time.perf_counter() - start
+        print(f"Compressed variants: {format_compress_stats(stats)} in {compress_time * 1000:.0f} ms")
+
+    if inline_cache is not None:
+        stats = inline_cache.stats()
+        lookups = stats["hits"] + stats["misses"]
+        hit_rate = 100 * stats["hits"] / lookups if lookups > 0 else 0
+        print(f"Inline cache: {stats['hits']} hits, {stats['misses']} misses ({hit_rate:.0f}%), "
+              f"{stats['evictions']} evictions, {stats['entries']} entries, {stats['bytes'] // 1024} KiB")
+        if args.persist_inline_cache:
+            inline_cache.save()
+
+    if render_cache is not None:
+        stats = render_cache.stats()
+        lookups = stats["hits"] + stats["misses"]
+        hit_rate = 100 * stats["hits"] / lookups if lookups > 0 else 0
+        evictions = render_cache.evict()
+        print(f"Render cache: {stats['hits']} hits, {stats['misses']} misses ({hit_rate:.0f}%), "
+              f"{evictions} evictions")
+
+    if args.profile is not None:
+        report = profiler.build_report(profiler.take_records(), {
+            "sync_static": sync_time,
+            "generate_pages": generate_time,
+            "compress": compress_time,
+        })
+        profiler.write_report(args.profile, report)
+        print(f"Profile written to {args.profile}")
 
-    copy_dir("static", "docs")
-    generate_pages_recursive("content", "template.html", "docs", basepath)
+    if args.watch:
+        watcher = SiteWatcher("content", "static", "template.html", "docs", basepath, MANIFEST_PATH, args.jobs,
+                              search_index, args.fingerprint, args.compress, image_cache)
+        watcher.run()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
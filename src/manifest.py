@@ -0,0 +1,175 @@
+import hashlib
+import json
+import os
+
+MANIFEST_VERSION = 2
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# increase when the generated html of pages changes (e.g. the markdown
+# renderer), pages generated by an older version are generated again
+RENDER_VERSION = 1
+
+###################################################################
+# Function: hash_file - calculate content hash of a file          #
+# Input:    path - path of the file to hash                       #
+# Return:   hex digest (sha256) of the file contents              #
+###################################################################
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+###################################################################
+# Function: new_manifest - create an empty build manifest         #
+# Input:                                                          #
+# Return:   manifest dictionary without any entries               #
+###################################################################
+def new_manifest():
+    return {"version": MANIFEST_VERSION, "pages": {}, "assets": {}}
+
+###################################################################
+# Function: load_manifest - load build manifest from disk         #
+# Input:    path - path of the manifest file                      #
+# Return:   manifest dictionary (empty if missing or outdated)    #
+###################################################################
+def load_manifest(path):
+    if not os.path.isfile(path):
+        return new_manifest()
+
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return new_manifest()
+
+    if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+        return new_manifest()
+
+    manifest.setdefault("pages", {})
+    manifest.setdefault("assets", {})
+    return manifest
+
+###################################################################
+# Function: save_manifest - write build manifest to disk          #
+#                           (atomic, via temporary file)          #
+# Input:    path     - path of the manifest file                  #
+#           manifest - manifest dictionary to write               #
+# Return:                                                         #
+###################################################################
+def save_manifest(path, manifest):
+    dir_name = os.path.dirname(os.path.abspath(path))
+    os.makedirs(dir_name, exist_ok=True)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+###################################################################
+# Function: page_inputs - collect all inputs a page depends on    #
+# Input:    source_hash   - content hash of the markdown file     #
+#           template_hash - content hash of the template          #
+#           basepath      - basepath used for the build           #
+# Return:   dictionary of page inputs                             #
+###################################################################
+def page_inputs(source_hash, template_hash, basepath):
+    return {
+        "source": source_hash,
+        "template": template_hash,
+        "basepath": basepath,
+        "renderer": RENDER_VERSION,
+    }
+
+###################################################################
+# Function: is_page_current - check if page output is up to date  #
+# Input:    manifest - manifest of the previous build             #
+#           key      - manifest key of the page source            #
+#           inputs   - current page inputs (see page_inputs)      #
+#           output   - manifest key of the page output            #
+#           dest     - path of the generated page                 #
+#           path_index - PathIndex to check the recorded          #
+#                        dependencies against or None             #
+# Return:   True if the page does not need to be regenerated      #
+###################################################################
+def is_page_current(manifest, key, inputs, output, dest, path_index=None):
+    entry = manifest["pages"].get(key)
+    if entry is None:
+        return False
+
+    if entry.get("inputs") != inputs or entry.get("output") != output:
+        return False
+
+    # linked pages or images were added, removed or changed
+    if path_index is not None:
+        if path_index.dependencies(entry.get("urls", []), output) != entry.get("deps"):
+            return False
+
+    return os.path.isfile(dest)
+
+###################################################################
+# Function: record_page - add page entry to a manifest            #
+# Input:    manifest - manifest of the current build              #
+#           key      - manifest key of the page source            #
+#           inputs   - page inputs (see page_inputs)              #
+#           output   - manifest key of the page output            #
+#           urls     - urls of links and images in the page       #
+#           deps     - dependencies of the page (see depgraph.py) #
+# Return:                                                         #
+###################################################################
+def record_page(manifest, key, inputs, output, urls=(), deps=None):
+    manifest["pages"][key] = {
+        "inputs": inputs,
+        "output": output,
+        "urls": sorted(urls),
+        "deps": deps if deps is not None else {},
+    }
+
+###################################################################
+# Function: record_asset - add copied static file to a manifest   #
+# Input:    manifest - manifest of the current build              #
+#           key      - path of the file relative to the source    #
+#           stat     - os.stat result of the source file          #
+#           file_hash - content hash of the file or None          #
+#           output   - fingerprinted path of the file or None     #
+# Return:                                                         #
+###################################################################
+def record_asset(manifest, key, stat, file_hash=None, output=None):
+    entry = {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+    if file_hash is not None:
+        entry["hash"] = file_hash
+    if output is not None:
+        entry["output"] = output
+    manifest["assets"][key] = entry
+
+###################################################################
+# Function: asset_outputs - all files written for a static file   #
+# Input:    key   - path of the file relative to the source       #
+#           entry - manifest entry of the file                    #
+# Return:   list of paths relative to the destination directory   #
+###################################################################
+def asset_outputs(key, entry):
+    outputs = [key]
+    if "output" in entry:
+        outputs.append(entry["output"])
+    if "image" in entry:
+        outputs.extend(variant for variant, _ in entry["image"]["variants"])
+    return outputs
+
+###################################################################
+# Function: stale_outputs - outputs of pages whose sources were   #
+#                           removed since the previous build      #
+# Input:    old_manifest - manifest of the previous build         #
+#           new_manifest - manifest of the current build          #
+# Return:   list of manifest keys of outputs to delete            #
+###################################################################
+def stale_outputs(old_manifest, new_manifest):
+    current = set(entry["output"] for entry in new_manifest["pages"].values())
+    stale = []
+    for key, entry in old_manifest["pages"].items():
+        if key in new_manifest["pages"]:
+            continue
+        if entry["output"] not in current:
+            stale.append(entry["output"])
+    return sorted(stale)
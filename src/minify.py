@@ -0,0 +1,153 @@
+import re
+
+# attribute values made of these characters need no quotes, urls marked
+# for a later rewrite (see fragmentnode.py) keep theirs until they are
+# written
+UNQUOTED_VALUE_PATTERN = re.compile(r"[^\s\"'=<>`\x00{}]+")
+
+# elements whose contents are written as they are
+RAW_ELEMENTS = ("pre", "textarea", "script", "style")
+
+# whitespace next to these tags is not rendered
+BLOCK_TAGS = frozenset((
+    "!doctype", "html", "head", "body", "title", "meta", "link", "base", "script", "style", "noscript",
+    "div", "p", "article", "section", "nav", "header", "footer", "main", "aside", "figure", "figcaption",
+    "h1", "h2", "h3", "h4", "h5", "h6", "ul", "ol", "li", "dl", "dt", "dd", "blockquote", "pre", "hr",
+    "table", "thead", "tbody", "tfoot", "tr", "th", "td", "form", "fieldset", "option",
+))
+
+# void elements never need a self-closing slash
+VOID_ELEMENTS = frozenset((
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr",
+))
+
+# a tag, quoted attribute values may contain ">"
+TAG = r"<(?:[^>\"']|\"[^\"]*\"|'[^']*')*>"
+
+TAG_PATTERN = re.compile(TAG)
+TOKEN_PATTERN = re.compile(
+    r"(?P<comment><!--(?!\[if).*?-->)"
+    r"|(?P<raw><(?P<raw_tag>" + "|".join(RAW_ELEMENTS) + r")\b" + TAG[1:] + r".*?</(?P=raw_tag)\s*>)"
+    r"|(?P<tag>" + TAG + r")",
+    re.DOTALL | re.IGNORECASE,
+)
+TAG_NAME_PATTERN = re.compile(r"</?\s*(!?[\w-]+)")
+ATTRIBUTE_PATTERN = re.compile(r"([^\s=/>]+)(?:\s*=\s*(\"[^\"]*\"|'[^']*'|[^\s>]+))?")
+# html whitespace, non-breaking spaces are content
+WHITESPACE = " \t\n\r\f"
+WHITESPACE_PATTERN = re.compile(r"[ \t\n\r\f]+")
+
+###################################################################
+# Function: format_attribute - attribute for the html output      #
+# Input:    name     - attribute name                             #
+#           value    - attribute value                            #
+#           minified - drop the quotes if the value allows it     #
+# Return:   attribute with a leading space                        #
+###################################################################
+def format_attribute(name, value, minified=False):
+    if minified and is_unquotable(value):
+        return f" {name}={value}"
+    return f" {name}=\"{value}\""
+
+###################################################################
+# Function: is_unquotable - check if an attribute value can be    #
+#                           written without quotes                #
+# Input:    value - attribute value                               #
+# Return:   True if no quotes are needed                          #
+###################################################################
+def is_unquotable(value):
+    return UNQUOTED_VALUE_PATTERN.fullmatch(value) is not None
+
+###################################################################
+# Function: tag_name - lowercase name of a tag                    #
+# Input:    tag - tag including the angle brackets                #
+# Return:   tag name or None                                      #
+###################################################################
+def tag_name(tag):
+    match = TAG_NAME_PATTERN.match(tag)
+    return match.group(1).lower() if match is not None else None
+
+###################################################################
+# Function: minify_tag - collapse whitespace and quotes of a tag  #
+# Input:    tag - tag including the angle brackets                #
+# Return:   minified tag                                          #
+###################################################################
+def minify_tag(tag):
+    match = TAG_NAME_PATTERN.match(tag)
+    if match is None:
+        return tag
+    if tag.startswith("</"):
+        return f"</{match.group(1)}>"
+    if tag.startswith("<!"):
+        return WHITESPACE_PATTERN.sub(" ", tag)
+
+    attributes = []
+    for name, value in ATTRIBUTE_PATTERN.findall(tag[match.end():-1]):
+        if value == "":
+            attributes.append(f" {name}")
+            continue
+        if value[0] in "\"'":
+            quote = value[0]
+            value = value[1:-1]
+        else:
+            quote = "\""
+        if is_unquotable(value):
+            attributes.append(f" {name}={value}")
+        else:
+            attributes.append(f" {name}={quote}{value}{quote}")
+    name = match.group(1)
+    # self-closing foreign elements (e.g. svg) keep their slash
+    if tag[:-1].rstrip().endswith("/") and name.lower() not in VOID_ELEMENTS:
+        return f"<{name}{''.join(attributes)} />"
+    return f"<{name}{''.join(attributes)}>"
+
+###################################################################
+# Function: minify_text - collapse whitespace of text between two #
+#                         tags                                    #
+# Input:    text   - text between the tags                        #
+#           before - name of the tag before the text or None      #
+#           after  - name of the tag after the text or None       #
+# Return:   minified text                                         #
+###################################################################
+def minify_text(text, before, after):
+    if before is None or before in BLOCK_TAGS:
+        text = text.lstrip(WHITESPACE)
+    if after is None or after in BLOCK_TAGS:
+        text = text.rstrip(WHITESPACE)
+    return WHITESPACE_PATTERN.sub(" ", text)
+
+###################################################################
+# Function: minify_html - minify a template (once when it is      #
+#                         compiled), placeholders are kept as     #
+#                         text                                    #
+# Input:    source - html source                                  #
+# Return:   html without comments, insignificant whitespace and   #
+#           redundant attribute quotes, contents of pre,          #
+#           textarea, script and style elements are kept          #
+###################################################################
+def minify_html(source):
+    output = []
+    text = []
+    before = None
+    position = 0
+    for match in TOKEN_PATTERN.finditer(source):
+        text.append(source[position:match.start()])
+        position = match.end()
+        if match.group("comment") is not None:
+            # the text around the comment is joined
+            continue
+
+        token = match.group()
+        name = tag_name(token)
+        output.append(minify_text("".join(text), before, name))
+        text = []
+        if match.group("raw") is not None:
+            opening_end = TAG_PATTERN.match(token).end()
+            output.append(minify_tag(token[:opening_end]) + token[opening_end:])
+        else:
+            output.append(minify_tag(token))
+        before = name
+
+    text.append(source[position:])
+    output.append(minify_text("".join(text), before, None))
+    return "".join(output)
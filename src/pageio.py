@@ -0,0 +1,252 @@
+import io
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from manifest import hash_file
+
+# threads used for reading and hashing sources, most of their time is
+# spent waiting for the (possibly network mounted) file system
+IO_THREADS = 8
+
+# number of page sources read before they are needed
+READ_AHEAD = 16
+
+# larger sources are not read ahead but streamed (see iter_blocks)
+READ_AHEAD_MAX_SIZE = 1024 * 1024
+
+# chunks of a page output that may wait for the writer thread
+MAX_PENDING_WRITES = 4
+
+COMPARE_CHUNK_SIZE = 1024 * 1024
+
+# suffix of files written next to their final name and renamed when
+# complete
+TMP_SUFFIX = ".tmp"
+
+# single background thread writing page outputs, created on first use
+write_executor = None
+
+###################################################################
+# Function: reset_write_executor - forget the writer thread of    #
+#                                  the parent in a forked worker  #
+# Input:                                                          #
+# Return:                                                         #
+###################################################################
+def reset_write_executor():
+    global write_executor
+    write_executor = None
+
+os.register_at_fork(after_in_child=reset_write_executor)
+
+###################################################################
+# Function: get_write_executor - executor of the writer thread    #
+# Input:                                                          #
+# Return:   ThreadPoolExecutor with a single thread               #
+###################################################################
+def get_write_executor():
+    global write_executor
+    if write_executor is None:
+        write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="page-writer")
+    return write_executor
+
+###################################################################
+# Function: scan_pages - find all markdown pages below a content  #
+#                        directory with os.scandir (no extra stat #
+#                        call per entry)                          #
+# Input:    content_path - directory with markdown files          #
+#           dest_path    - destination directory                  #
+# Return:   list of (source path, destination path) tuples        #
+###################################################################
+def scan_pages(content_path, dest_path):
+    pages = []
+    with os.scandir(content_path) as entries:
+        entries = sorted(entries, key=lambda entry: entry.name)
+
+    for entry in entries:
+        dest_sub_path = os.path.join(dest_path, entry.name)
+        if entry.is_dir():
+            pages.extend(scan_pages(entry.path, dest_sub_path))
+        elif entry.name.endswith(".md"):
+            pages.append((entry.path, dest_sub_path[:-len(".md")] + ".html"))
+    return pages
+
+###################################################################
+# Function: hash_files - hash several files in parallel           #
+# Input:    paths   - paths of the files                          #
+#           threads - number of reading threads                   #
+# Return:   list of hex digests in the order of the paths         #
+###################################################################
+def hash_files(paths, threads=IO_THREADS):
+    if len(paths) <= 1:
+        return [hash_file(path) for path in paths]
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        return list(executor.map(hash_file, paths))
+
+###################################################################
+# Function: read_small_file - read a source for the read-ahead    #
+# Input:    path     - path of the file                           #
+#           max_size - larger files are not read                  #
+# Return:   text of the file or None                              #
+###################################################################
+def read_small_file(path, max_size):
+    try:
+        if os.stat(path).st_size > max_size:
+            return None
+        with open(path) as f:
+            return f.read()
+    except (OSError, ValueError):
+        # opened again by the page, which then reports the error
+        return None
+
+###################################################################
+# Function: files_equal - compare contents of two files           #
+# Input:    path       - path of the first file                   #
+#           other_path - path of the second file                  #
+# Return:   True if both files exist and have the same contents   #
+###################################################################
+def files_equal(path, other_path):
+    try:
+        if os.stat(path).st_size != os.stat(other_path).st_size:
+            return False
+        with open(path, "rb") as f, open(other_path, "rb") as other:
+            while True:
+                chunk = f.read(COMPARE_CHUNK_SIZE)
+                if chunk != other.read(COMPARE_CHUNK_SIZE):
+                    return False
+                if len(chunk) == 0:
+                    return True
+    except FileNotFoundError:
+        return False
+
+###################################################################
+# Function: remove_tmp_files - remove temporary files a killed    #
+#                              build left next to its outputs     #
+#                              (see PageOutput and sync_file)     #
+# Input:    dest_path - destination directory                     #
+#           outputs   - relative paths of the outputs known from  #
+#                       the manifests, only their *.tmp siblings  #
+#                       are removed                               #
+# Return:   list of removed paths                                 #
+###################################################################
+def remove_tmp_files(dest_path, outputs):
+    outputs = set(path.replace(os.sep, "/") for path in outputs)
+    removed = []
+    for output in sorted(outputs):
+        # an output may be named like the temporary file of another one
+        if output + TMP_SUFFIX in outputs:
+            continue
+        path = os.path.join(dest_path, output + TMP_SUFFIX)
+        if os.path.isfile(path):
+            os.remove(path)
+            removed.append(path)
+    return removed
+
+# reads the sources of a list of pages in background threads, a bounded
+# number of pages ahead of the page being generated
+class SourceReader():
+    def __init__(self, paths, threads=IO_THREADS, ahead=READ_AHEAD, max_size=READ_AHEAD_MAX_SIZE):
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="source-reader")
+        self.ahead = ahead
+        self.max_size = max_size
+        self.pending = deque(paths)
+        self.reads = {}
+        self.fill()
+
+    def fill(self):
+        while len(self.reads) < self.ahead and len(self.pending) > 0:
+            path = self.pending.popleft()
+            self.reads[path] = self.executor.submit(read_small_file, path, self.max_size)
+
+    def open(self, path):
+        read = self.reads.pop(path, None)
+        self.fill()
+        if read is not None:
+            text = read.result()
+            if text is not None:
+                return io.StringIO(text)
+        return open(path)
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+# output file of a page, chunks are written by the writer thread while
+# the page is still rendered, the file only appears under its final name
+# once it is complete (a crashed build leaves no half-written pages), an
+# existing file with the same contents is kept as is (and keeps its mtime)
+class PageOutput():
+    def __init__(self, path, background=True, skip_unchanged=True):
+        self.path = path
+        self.skip_unchanged = skip_unchanged
+        self.written = False
+        self.tmp_path = path + TMP_SUFFIX
+        self.executor = get_write_executor() if background else None
+        self.writes = deque()
+        # the latest chunk is held back, a page rendered into a single
+        # chunk is written directly without waiting for the writer thread
+        self.last = None
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.file = open(self.tmp_path, "w")
+
+    def write(self, data):
+        if self.executor is None:
+            self.file.write(data)
+            return
+
+        if self.last is not None:
+            while len(self.writes) >= MAX_PENDING_WRITES:
+                self.writes.popleft().result()
+            self.writes.append(self.executor.submit(self.file.write, self.last))
+        self.last = data
+
+    def wait(self):
+        # every pending write has to finish before the file is closed
+        error = None
+        while len(self.writes) > 0:
+            try:
+                self.writes.popleft().result()
+            except Exception as e:
+                error = error or e
+        if error is not None:
+            raise error
+
+    def commit(self):
+        try:
+            self.wait()
+            if self.last is not None:
+                self.file.write(self.last)
+            self.file.close()
+        except Exception:
+            self.abort()
+            raise
+
+        if self.skip_unchanged and files_equal(self.tmp_path, self.path):
+            os.remove(self.tmp_path)
+            return
+        os.replace(self.tmp_path, self.path)
+        self.written = True
+
+    def abort(self):
+        try:
+            self.wait()
+        except Exception:
+            pass
+        self.file.close()
+        os.remove(self.tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
@@ -1,18 +1,24 @@
 from htmlnode import HTMLNode
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag, None, children, props)
 
     def to_html(self):
+        html_parts = []
+        self.write_html(html_parts.append)
+        return "".join(html_parts)
+
+    def write_html(self, write, url=None, minified=False):
         if self.tag is None or self.tag == "":
             raise ValueError("Invalid tag")
 
         if self.children is None:
             raise ValueError("Missing children")
 
-        html_string = f"<{self.tag}>"
+        write(f"<{self.tag}{self.props_to_html(url, minified)}>")
         for child in self.children:
-            html_string += child.to_html()
-        html_string += f"</{self.tag}>"
-        return html_string
\ No newline at end of file
+            child.write_html(write, url, minified)
+        write(f"</{self.tag}>")
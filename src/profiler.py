@@ -0,0 +1,133 @@
+import json
+import os
+import time
+
+# profiling is disabled by default, phases then only cost a flag check
+enabled = False
+
+# finished page records of this process
+records = []
+
+# phase times of the page currently generated
+current = None
+current_start = 0.0
+
+# stack of running phases: [name, start time, time spent in children]
+stack = []
+
+# reusable phase context managers by name
+phases = {}
+
+# measures the time spent in a build phase of the current page, time of
+# nested phases is only accounted to the innermost phase
+class Phase():
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        if enabled and current is not None:
+            stack.append([self.name, time.perf_counter(), 0.0])
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if not enabled or current is None or len(stack) == 0:
+            return False
+
+        name, start, children = stack.pop()
+        elapsed = time.perf_counter() - start
+        current[name] = current.get(name, 0.0) + elapsed - children
+        if len(stack) > 0:
+            stack[-1][2] += elapsed
+        return False
+
+###################################################################
+# Function: phase - get context manager timing a build phase      #
+# Input:    name - name of the phase                              #
+# Return:   Phase context manager                                 #
+###################################################################
+def phase(name):
+    timer = phases.get(name)
+    if timer is None:
+        timer = Phase(name)
+        phases[name] = timer
+    return timer
+
+###################################################################
+# Function: start_page - start recording a page                   #
+# Input:                                                          #
+# Return:                                                         #
+###################################################################
+def start_page():
+    global current, current_start
+    if not enabled:
+        return
+
+    current = {}
+    current_start = time.perf_counter()
+    stack.clear()
+
+###################################################################
+# Function: end_page - finish recording the current page          #
+# Input:    page - name of the page (source path)                 #
+# Return:                                                         #
+###################################################################
+def end_page(page):
+    global current
+    if not enabled or current is None:
+        return
+
+    records.append({
+        "page": page,
+        "total": time.perf_counter() - current_start,
+        "phases": current,
+    })
+    current = None
+    stack.clear()
+
+###################################################################
+# Function: take_records - remove and return all page records     #
+#                          (used to send them from worker         #
+#                          processes to the main process)         #
+# Input:                                                          #
+# Return:   list of page records                                  #
+###################################################################
+def take_records():
+    taken = records[:]
+    records.clear()
+    return taken
+
+###################################################################
+# Function: build_report - summarize page records                 #
+# Input:    page_records - list of page records                   #
+#           extra        - dict of additional build step times    #
+#           slowest      - number of slowest pages to list        #
+# Return:   report dictionary                                     #
+###################################################################
+def build_report(page_records, extra=None, slowest=20):
+    totals = {}
+    for record in page_records:
+        for name, seconds in record["phases"].items():
+            totals[name] = totals.get(name, 0.0) + seconds
+
+    ordered = sorted(page_records, key=lambda record: record["total"], reverse=True)
+    return {
+        "pages": len(page_records),
+        "total": sum(record["total"] for record in page_records),
+        "phases": dict(sorted(totals.items(), key=lambda item: item[1], reverse=True)),
+        "steps": extra if extra is not None else {},
+        "slowest": ordered[:slowest],
+    }
+
+###################################################################
+# Function: write_report - write report as json file              #
+# Input:    path   - path of the report file                      #
+#           report - report dictionary (see build_report)         #
+# Return:                                                         #
+###################################################################
+def write_report(path, report):
+    dir_name = os.path.dirname(os.path.abspath(path))
+    os.makedirs(dir_name, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=1)
@@ -0,0 +1,126 @@
+import hashlib
+import os
+import sqlite3
+import time
+
+from fragmentnode import URL_MARK
+
+# increase when the html output of blocks changes, entries of other
+# versions are never found again and are evicted over time
+RENDER_CACHE_VERSION = 2
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# remove entries down to this share of the maximum size when evicting
+EVICT_TARGET = 0.9
+
+# persistent cache from (block text, block type, renderer version) to the
+# rendered fragment parts of the block (see fragmentnode.py), stored in a
+# single sqlite file that can be shared by several worker processes
+class RenderCache():
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.used_keys = []
+        # entries of the current page, written by commit so the write
+        # lock is only held for one short transaction per page
+        self.pending = {}
+
+        dir_name = os.path.dirname(os.path.abspath(path))
+        os.makedirs(dir_name, exist_ok=True)
+
+        # WAL lets workers read while another one writes, writers wait for
+        # each other up to the timeout
+        self.connection = sqlite3.connect(path, timeout=60)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS blocks ("
+            "key BLOB PRIMARY KEY, html TEXT NOT NULL, size INTEGER NOT NULL, used INTEGER NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS blocks_used ON blocks (used)")
+        self.connection.commit()
+
+    def key(self, text, block_type, variant=""):
+        # variant separates renderings of the same block with different
+        # settings (e.g. image sizes)
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{RENDER_CACHE_VERSION}\0{block_type.value}\0".encode())
+        if variant != "":
+            digest.update(f"{variant}\0".encode())
+        digest.update(text.encode())
+        return digest.digest()
+
+    def get(self, key):
+        html = self.pending.get(key)
+        if html is not None:
+            self.hits += 1
+            return tuple(html.split(URL_MARK))
+
+        row = self.connection.execute("SELECT html FROM blocks WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.used_keys.append(key)
+        return tuple(row[0].split(URL_MARK))
+
+    def put(self, key, parts):
+        self.pending[key] = URL_MARK.join(parts)
+
+    def commit(self):
+        # new entries and usage times of hits are written in one go, not
+        # per block
+        if len(self.pending) == 0 and len(self.used_keys) == 0:
+            return
+        now = int(time.time())
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO blocks (key, html, size, used) VALUES (?, ?, ?, ?)",
+                ((key, html, len(key) + len(html), now) for key, html in self.pending.items()),
+            )
+            self.connection.executemany(
+                "UPDATE blocks SET used = ? WHERE key = ?", ((now, key) for key in self.used_keys)
+            )
+        self.pending = {}
+        self.used_keys = []
+
+    def total_size(self):
+        return self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM blocks").fetchone()[0]
+
+    def evict(self):
+        self.commit()
+        total = self.total_size()
+        if total <= self.max_bytes:
+            return 0
+
+        # remove least recently used entries until below the target size
+        target = total - self.max_bytes * EVICT_TARGET
+        rows = self.connection.execute("SELECT key, size FROM blocks ORDER BY used").fetchall()
+        keys = []
+        for key, size in rows:
+            if target <= 0:
+                break
+            keys.append((key,))
+            target -= size
+        self.connection.executemany("DELETE FROM blocks WHERE key = ?", keys)
+        self.connection.commit()
+        return len(keys)
+
+    def add_stats(self, stats):
+        self.hits += stats["hits"]
+        self.misses += stats["misses"]
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def close(self):
+        self.commit()
+        self.connection.close()
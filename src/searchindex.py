@@ -0,0 +1,172 @@
+import json
+import os
+import re
+
+from pageio import PageOutput
+from compress import remove_variants
+
+SEARCH_INDEX_VERSION = 2
+
+# directory below the destination directory with the index files
+SEARCH_INDEX_DIR = "search"
+
+# shards are cut when their json grows beyond this size, the browser only
+# loads the shards of the terms it searches for
+DEFAULT_SHARD_MAX_BYTES = 64 * 1024
+
+MIN_TERM_LENGTH = 2
+MAX_TERM_LENGTH = 32
+
+# terms are filtered by length per page (see page_terms), not per block
+TERM_PATTERN = re.compile(r"[^\W_]+")
+
+SHARD_PATTERN = re.compile(r"shard-\d+\.json")
+
+###################################################################
+# Function: block_terms - search terms of a markdown block        #
+# Input:    text_nodes - parsed inline text of the block          #
+# Return:   list of lowercase terms                               #
+###################################################################
+def block_terms(text_nodes):
+    # only the visible text counts, not markup or link targets
+    terms = []
+    for text_node in text_nodes:
+        terms.extend(TERM_PATTERN.findall(text_node.text.lower()))
+    return terms
+
+###################################################################
+# Function: page_terms - final term counts of a page              #
+# Input:    terms - Counter of all terms of the page              #
+# Return:   dictionary term -> count without too short or too     #
+#           long terms                                            #
+###################################################################
+def page_terms(terms):
+    return {
+        term: count for term, count in terms.items()
+        if MIN_TERM_LENGTH <= len(term) <= MAX_TERM_LENGTH
+    }
+
+###################################################################
+# Function: encode_postings - compact list of postings            #
+# Input:    postings - list of (page id, term count) tuples       #
+# Return:   flat list of page id deltas and counts                #
+###################################################################
+def encode_postings(postings):
+    encoded = []
+    previous = 0
+    for page_id, count in sorted(postings):
+        encoded.append(page_id - previous)
+        encoded.append(count)
+        previous = page_id
+    return encoded
+
+# inverted index of all pages of the site, the terms of every page are
+# kept between builds so only generated pages have to be tokenized
+class SearchIndex():
+    def __init__(self, path=None, shard_max_bytes=DEFAULT_SHARD_MAX_BYTES):
+        # file the page terms are persisted in between builds
+        self.path = path
+        self.shard_max_bytes = shard_max_bytes
+        # page key -> {"url": ..., "title": ..., "terms": {term: count}}
+        self.pages = {}
+
+    def load(self):
+        if self.path is None or not os.path.isfile(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict) and data.get("version") == SEARCH_INDEX_VERSION:
+            self.pages = data["pages"]
+
+    def save(self):
+        if self.path is None:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": SEARCH_INDEX_VERSION, "pages": self.pages}, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+    def update(self, key, url, title, terms):
+        self.pages[key] = {"url": url, "title": title, "terms": terms}
+
+    def remove(self, key):
+        self.pages.pop(key, None)
+
+    def build(self):
+        # pages get ids in the order of their keys, postings per term
+        page_list = []
+        postings = {}
+        for page_id, key in enumerate(sorted(self.pages)):
+            page = self.pages[key]
+            page_list.append([page["url"], page["title"]])
+            for term, count in page["terms"].items():
+                postings.setdefault(term, []).append((page_id, count))
+
+        shards = []
+        shard = {}
+        size = 0
+        for term in sorted(postings):
+            encoded = encode_postings(postings[term])
+            entry_size = len(term) + 4 + len(json.dumps(encoded, separators=(",", ":")))
+            if len(shard) > 0 and size + entry_size > self.shard_max_bytes:
+                shards.append(shard)
+                shard = {}
+                size = 0
+            shard[term] = encoded
+            size += entry_size
+        if len(shard) > 0:
+            shards.append(shard)
+        return page_list, shards
+
+    def write(self, dest_dir):
+        page_list, shards = self.build()
+        os.makedirs(dest_dir, exist_ok=True)
+
+        # a shard covers all terms from its first term to the first term
+        # of the next shard
+        shard_files = []
+        for number, shard in enumerate(shards):
+            file_name = f"shard-{number}.json"
+            shard_files.append([next(iter(shard)), file_name])
+            write_json(os.path.join(dest_dir, file_name), shard)
+
+        write_json(os.path.join(dest_dir, "index.json"), {
+            "version": SEARCH_INDEX_VERSION,
+            "pages": page_list,
+            "shards": shard_files,
+        })
+
+        current = set(file_name for _, file_name in shard_files)
+        for file_name in os.listdir(dest_dir):
+            if SHARD_PATTERN.fullmatch(file_name) and file_name not in current:
+                os.remove(os.path.join(dest_dir, file_name))
+                remove_variants(os.path.join(dest_dir, file_name))
+        return len(shards)
+
+###################################################################
+# Function: write_json - write compact json (atomic, unchanged    #
+#                        files are not rewritten)                 #
+# Input:    path - path of the file                               #
+#           data - data to write                                  #
+# Return:                                                         #
+###################################################################
+def write_json(path, data):
+    with PageOutput(path, background=False) as output:
+        output.write(json.dumps(data, separators=(",", ":"), ensure_ascii=False))
+
+###################################################################
+# Function: index_files - files of a written search index         #
+# Input:    dest_dir - directory the index was written to         #
+# Return:   list of paths                                         #
+###################################################################
+def index_files(dest_dir):
+    if not os.path.isdir(dest_dir):
+        return []
+    return [
+        os.path.join(dest_dir, file_name) for file_name in sorted(os.listdir(dest_dir))
+        if file_name == "index.json" or SHARD_PATTERN.fullmatch(file_name)
+    ]
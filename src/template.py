@@ -0,0 +1,83 @@
+import os
+import re
+
+from urls import URL_ATTRIBUTES, basepath_url
+from minify import minify_html
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+URL_ATTRIBUTE_PATTERN = re.compile(r"\b(" + "|".join(URL_ATTRIBUTES) + r")=\"([^\"]*)\"")
+
+# compiled templates by (path, mtime, size, basepath, asset map key,
+# minify)
+template_cache = {}
+
+# page template compiled into literal segments and placeholder slots,
+# segments[i] is followed by slots[i], the last segment has no slot
+class Template():
+    def __init__(self, source, basepath="/", assets=None, minify=False):
+        # urls of the template itself are rewritten once at compile time
+        url = basepath_url(basepath, assets)
+        self.urls = [match.group(2) for match in URL_ATTRIBUTE_PATTERN.finditer(source)]
+        source = URL_ATTRIBUTE_PATTERN.sub(
+            lambda match: f"{match.group(1)}=\"{url(match.group(2))}\"", source
+        )
+        # whitespace and quotes are removed once, not for every page
+        if minify:
+            source = minify_html(source)
+
+        self.segments = []
+        self.slots = []
+        self.placeholders = []
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(source):
+            self.segments.append(source[position:match.start()])
+            self.slots.append(match.group(1))
+            self.placeholders.append(match.group(0))
+            position = match.end()
+        self.segments.append(source[position:])
+
+    def write(self, write, values):
+        for i, slot in enumerate(self.slots):
+            write(self.segments[i])
+
+            # placeholders without value are kept as they are
+            value = values.get(slot, self.placeholders[i])
+            if callable(value):
+                value(write)
+            else:
+                write(value)
+        write(self.segments[-1])
+
+    def render(self, values):
+        parts = []
+        self.write(parts.append, values)
+        return "".join(parts)
+
+###################################################################
+# Function: load_template - load and compile template, compiled   #
+#                           templates are cached until the file   #
+#                           changes                               #
+# Input:    template_path - path of the template                  #
+#           basepath      - path to the root directory            #
+#           assets        - AssetMap of fingerprinted static files #
+#                           or None                               #
+#           minify        - minify the template (see minify.py)   #
+# Return:   compiled Template                                     #
+###################################################################
+def load_template(template_path, basepath="/", assets=None, minify=False):
+    path = os.path.abspath(template_path)
+    stat = os.stat(path)
+    assets_key = assets.key if assets is not None else None
+    key = (path, stat.st_mtime_ns, stat.st_size, basepath, assets_key, minify)
+
+    template = template_cache.get(key)
+    if template is None:
+        with open(path) as f:
+            template = Template(f.read(), basepath, assets, minify)
+
+        # drop outdated versions of the same template
+        outdated = [k for k in template_cache if k[0] == path and (k[1:3] != key[1:3] or k[4:] != key[4:])]
+        for cached_key in outdated:
+            del template_cache[cached_key]
+        template_cache[key] = template
+    return template
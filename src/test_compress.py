@@ -0,0 +1,70 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from compress import compress_files, manifest_outputs, remove_variants, available_encodings, MIN_COMPRESS_SIZE
+
+class TestCompress(unittest.TestCase):
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def test_compress_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            page = os.path.join(tmp, "index.html")
+            small = os.path.join(tmp, "small.css")
+            image = os.path.join(tmp, "tom.png")
+            self.write(page, "<p>Tom Bombadil</p>" * 100)
+            self.write(small, "body {}")
+            self.write(image, "png" * 100)
+            encodings = len(available_encodings())
+
+            stats = compress_files([page, small, image])
+            self.assertEqual((stats["written"], stats["current"]), (encodings, 0))
+            self.assertEqual(stats["sizes"]["gzip"][0], 1900)
+            self.assertLess(stats["sizes"]["gzip"][1], 100)
+            with gzip.open(page + ".gz", "rt") as f:
+                self.assertEqual(f.read(), "<p>Tom Bombadil</p>" * 100)
+            self.assertEqual(os.stat(page + ".gz").st_mtime_ns, os.stat(page).st_mtime_ns)
+            self.assertFalse(os.path.exists(small + ".gz"))
+            self.assertFalse(os.path.exists(image + ".gz"))
+
+            # unchanged files are not compressed again
+            stats = compress_files([page, small, image], jobs=2)
+            self.assertEqual((stats["written"], stats["current"]), (0, encodings))
+
+            self.write(page, "<p>Goldberry</p>" * 100)
+            self.assertEqual(compress_files([page])["written"], encodings)
+            with gzip.open(page + ".gz", "rt") as f:
+                self.assertEqual(f.read(), "<p>Goldberry</p>" * 100)
+
+            self.write(page, "<p>Tom</p>")
+            self.assertLess(os.path.getsize(page), MIN_COMPRESS_SIZE)
+            compress_files([page])
+            self.assertFalse(os.path.exists(page + ".gz"))
+
+    def test_remove_variants(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            page = os.path.join(tmp, "index.html")
+            self.write(page, "<p>Tom Bombadil</p>" * 100)
+            compress_files([page])
+            os.remove(page)
+            remove_variants(page)
+            self.assertEqual(os.listdir(tmp), [])
+
+    def test_manifest_outputs(self):
+        manifest = {
+            "pages": {"index.md": {"output": "index.html"}},
+            "assets": {"index.css": {"output": "index.3f9a1c07b2.css"}, "tom.png": {}},
+        }
+        self.assertEqual(manifest_outputs(manifest, "docs"), [
+            os.path.join("docs", "index.3f9a1c07b2.css"),
+            os.path.join("docs", "index.css"),
+            os.path.join("docs", "index.html"),
+            os.path.join("docs", "tom.png"),
+        ])
+
+
+if __name__ == "__main__":
+    unittest.main()
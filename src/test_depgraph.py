@@ -0,0 +1,157 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+import log
+from depgraph import PathIndex, affected_pages, broken_links, report_broken_links, url_path
+from functions import generate_pages_incremental, sync_dir
+from manifest import load_manifest
+
+class TestDepGraph(unittest.TestCase):
+    def setUp(self):
+        log.quiet = True
+
+    def tearDown(self):
+        log.quiet = False
+
+    def test_url_path(self):
+        self.assertEqual(url_path("/images/tom.png", "blog/tom/index.html"), "images/tom.png")
+        self.assertEqual(url_path("../majesty/#top", "blog/tom/index.html"), "blog/majesty/")
+        self.assertEqual(url_path("/", "index.html"), "")
+        self.assertEqual(url_path("/my%20file.txt?x=1", "index.html"), "my file.txt")
+        self.assertIsNone(url_path("https://www.boot.dev", "index.html"))
+        self.assertIsNone(url_path("mailto:tom@example.com", "index.html"))
+        self.assertIsNone(url_path("#top", "index.html"))
+
+    def test_resolve(self):
+        index = PathIndex(
+            {"images/tom.png": {"size": 3, "mtime": 7}},
+            {"index.html": "index.md", "blog/tom/index.html": "blog/tom/index.md", "about.html": "about.md"},
+        )
+        self.assertEqual(index.resolve("/", "about.html"), "page:index.md")
+        self.assertEqual(index.resolve("/blog/tom", "index.html"), "page:blog/tom/index.md")
+        self.assertEqual(index.resolve("/about", "index.html"), "page:about.md")
+        self.assertEqual(index.resolve("../../images/tom.png", "blog/tom/index.html"), "asset:images/tom.png")
+        self.assertEqual(index.resolve("/blog/bob", "index.html"), "missing:/blog/bob")
+        self.assertEqual(index.dependencies(["/images/tom.png", "/blog/bob", "https://x.org"], "index.html"), {
+            "asset:images/tom.png": [None, None],
+            "missing:/blog/bob": None,
+        })
+
+    def test_broken_links(self):
+        manifest = {"pages": {
+            "index.md": {"deps": {"missing:/blog/bob": None, "page:blog/tom.md": 1}},
+            "blog/tom.md": {"deps": {"missing:/images/tom.png": None}},
+        }}
+        broken = broken_links(manifest)
+        self.assertEqual(broken, [("blog/tom.md", "/images/tom.png"), ("index.md", "/blog/bob")])
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            report_broken_links([])
+            with self.assertRaises(RuntimeError):
+                report_broken_links(broken, strict=True)
+        self.assertEqual(output.getvalue(), "Missing asset in blog/tom.md: /images/tom.png\nBroken link in index.md: /blog/bob\n")
+
+    def test_incremental(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            docs = os.path.join(tmp, "docs")
+            manifest_path = os.path.join(tmp, "cache", "manifest.json")
+            template = os.path.join(tmp, "template.html")
+            os.makedirs(os.path.join(content, "blog"))
+            with open(template, "w") as f:
+                f.write("<title>{{ Title }}</title>{{ Content }}")
+            with open(os.path.join(content, "index.md"), "w") as f:
+                f.write("# Home\n\n[Bob](/blog/bob)")
+            with open(os.path.join(content, "blog", "tom.md"), "w") as f:
+                f.write("# Tom\n\n[Home](/)")
+
+            self.assertEqual(generate_pages_incremental(content, template, docs, "/", manifest_path), 2)
+            manifest = load_manifest(manifest_path)
+            self.assertEqual(manifest["pages"]["index.md"]["deps"], {"missing:/blog/bob": None})
+            self.assertEqual(manifest["pages"]["blog/tom.md"]["deps"], {"page:index.md": 1})
+
+            # the new page and the page linking to it are generated
+            with open(os.path.join(content, "blog", "bob.md"), "w") as f:
+                f.write("# Bob")
+            self.assertEqual(generate_pages_incremental(content, template, docs, "/", manifest_path), 2)
+            manifest = load_manifest(manifest_path)
+            self.assertEqual(manifest["pages"]["index.md"]["deps"], {"page:blog/bob.md": 1})
+            self.assertEqual(generate_pages_incremental(content, template, docs, "/", manifest_path), 0)
+
+            self.assertEqual(affected_pages(manifest, os.path.join(content, "index.md"), content, tmp, template),
+                             ["index.md"])
+            self.assertEqual(affected_pages(manifest, template, content, tmp, template),
+                             ["blog/bob.md", "blog/tom.md", "index.md"])
+
+    def test_affected_pages_match_build(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            static = os.path.join(tmp, "static")
+            docs = os.path.join(tmp, "docs")
+            manifest_path = os.path.join(tmp, "cache", "manifest.json")
+            template = os.path.join(tmp, "template.html")
+            os.makedirs(os.path.join(content, "blog"))
+            os.makedirs(static)
+            with open(template, "w") as f:
+                f.write("<title>{{ Title }}</title>{{ Content }}")
+            with open(os.path.join(content, "index.md"), "w") as f:
+                f.write("# Home\n\n[Tom](/blog/tom) and [Bob](/blog/bob)")
+            with open(os.path.join(content, "blog", "tom.md"), "w") as f:
+                f.write("# Tom\n\n[Home](/)")
+            with open(os.path.join(content, "about.md"), "w") as f:
+                f.write("# About\n\n![Tom](/tom.png) ![Bob](/bob.png)")
+            with open(os.path.join(static, "tom.png"), "w") as f:
+                f.write("png")
+            sync_dir(static, docs, manifest_path)
+            generate_pages_incremental(content, template, docs, "/", manifest_path)
+
+            def build():
+                # the generated pages are read from the progress output
+                output = io.StringIO()
+                log.quiet = False
+                try:
+                    with contextlib.redirect_stdout(output):
+                        sync_dir(static, docs, manifest_path)
+                        generate_pages_incremental(content, template, docs, "/", manifest_path)
+                finally:
+                    log.quiet = True
+                prefix = f"Generating page from {content}{os.sep}"
+                return sorted(line[len(prefix):].split(" ", 1)[0] for line in output.getvalue().splitlines()
+                              if line.startswith(prefix))
+
+            def check(path):
+                affected = affected_pages(load_manifest(manifest_path), path, content, static, template)
+                self.assertEqual(affected, build())
+                return affected
+
+            # edited, added and removed pages
+            tom = os.path.join(content, "blog", "tom.md")
+            with open(tom, "w") as f:
+                f.write("# Old Tom\n\n[Home](/)")
+            self.assertEqual(check(tom), ["blog/tom.md"])
+            bob = os.path.join(content, "blog", "bob.md")
+            with open(bob, "w") as f:
+                f.write("# Bob")
+            self.assertEqual(check(bob), ["blog/bob.md", "index.md"])
+            os.remove(tom)
+            self.assertEqual(check(tom), ["index.md"])
+
+            # a changed copy of a plain file does not change the pages
+            # showing it, added and removed files do
+            tom_png = os.path.join(static, "tom.png")
+            with open(tom_png, "w") as f:
+                f.write("new png")
+            self.assertEqual(check(tom_png), [])
+            bob_png = os.path.join(static, "bob.png")
+            with open(bob_png, "w") as f:
+                f.write("png")
+            self.assertEqual(check(bob_png), ["about.md"])
+            os.remove(tom_png)
+            self.assertEqual(check(tom_png), ["about.md"])
+
+
+if __name__ == "__main__":
+    unittest.main()
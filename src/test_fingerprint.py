@@ -0,0 +1,126 @@
+import os
+import tempfile
+import unittest
+
+import log
+from fingerprint import AssetMap, fingerprint_name, is_fingerprinted, asset_map_from_manifest
+from functions import sync_dir, generate_pages_incremental
+from manifest import load_manifest
+from depgraph import affected_pages
+
+class TestFingerprint(unittest.TestCase):
+    def setUp(self):
+        log.quiet = True
+
+    def tearDown(self):
+        log.quiet = False
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def read(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def test_fingerprint_name(self):
+        self.assertEqual(fingerprint_name("images/tom.png", "3f9a1c07b2e4d5"), "images/tom.3f9a1c07b2.png")
+        self.assertEqual(fingerprint_name("LICENSE", "3f9a1c07b2e4d5"), "LICENSE.3f9a1c07b2")
+        self.assertTrue(is_fingerprinted("index.css"))
+        self.assertFalse(is_fingerprinted("404.html"))
+
+    def test_rewrite(self):
+        assets = AssetMap({"images/tom.png": "images/tom.3f9a1c07b2.png"})
+        self.assertEqual(assets.rewrite("/images/tom.png"), "/images/tom.3f9a1c07b2.png")
+        self.assertEqual(assets.rewrite("/images/tom.png?v=1#top"), "/images/tom.3f9a1c07b2.png?v=1#top")
+        self.assertEqual(assets.rewrite("/images/bob.png"), "/images/bob.png")
+        self.assertNotEqual(assets.key, AssetMap({"images/tom.png": "images/tom.0000000000.png"}).key)
+
+    def test_sync_dir_fingerprint(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            static = os.path.join(tmp, "static")
+            docs = os.path.join(tmp, "docs")
+            manifest_path = os.path.join(tmp, "cache", "manifest.json")
+            os.makedirs(os.path.join(static, "images"))
+            self.write(os.path.join(static, "images", "tom.png"), "png")
+            self.write(os.path.join(static, "404.html"), "<p>404</p>")
+
+            self.assertEqual(sync_dir(static, docs, manifest_path, fingerprint=True), (3, 0))
+            self.assertEqual(sync_dir(static, docs, manifest_path, fingerprint=True), (0, 0))
+            entry = load_manifest(manifest_path)["assets"]["images/tom.png"]
+            first = entry["output"]
+            self.assertEqual(first, fingerprint_name("images/tom.png", entry["hash"]))
+            self.assertEqual(self.read(os.path.join(docs, "images", "tom.png")), "png")
+            self.assertEqual(self.read(os.path.join(docs, first)), "png")
+            self.assertNotIn("output", load_manifest(manifest_path)["assets"]["404.html"])
+
+            # the old fingerprinted copy is removed, the original name stays
+            self.write(os.path.join(static, "images", "tom.png"), "png2")
+            self.assertEqual(sync_dir(static, docs, manifest_path, fingerprint=True), (2, 1))
+            second = load_manifest(manifest_path)["assets"]["images/tom.png"]["output"]
+            self.assertNotEqual(first, second)
+            self.assertFalse(os.path.exists(os.path.join(docs, first)))
+            self.assertEqual(self.read(os.path.join(docs, second)), "png2")
+
+            # without fingerprints only the original names are left
+            self.assertEqual(sync_dir(static, docs, manifest_path), (0, 1))
+            self.assertFalse(os.path.exists(os.path.join(docs, second)))
+            self.assertIsNone(asset_map_from_manifest(load_manifest(manifest_path)))
+
+    def test_sync_dir_fingerprint_hardlink(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            static = os.path.join(tmp, "static")
+            docs = os.path.join(tmp, "docs")
+            manifest_path = os.path.join(tmp, "cache", "manifest.json")
+            os.makedirs(static)
+            self.write(os.path.join(static, "index.css"), "body {}")
+            self.assertEqual(sync_dir(static, docs, manifest_path, link=True, fingerprint=True), (2, 0))
+
+            # the fingerprinted copy does not change with the source
+            output = load_manifest(manifest_path)["assets"]["index.css"]["output"]
+            self.write(os.path.join(static, "index.css"), "body { color: red; }")
+            self.assertEqual(self.read(os.path.join(docs, output)), "body {}")
+
+    def test_rewritten_urls(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            static = os.path.join(tmp, "static")
+            docs = os.path.join(tmp, "docs")
+            template = os.path.join(tmp, "template.html")
+            manifest_path = os.path.join(tmp, "cache", "manifest.json")
+            os.makedirs(content)
+            os.makedirs(static)
+            self.write(template, "<link href=\"/index.css\">{{ Content }}")
+            self.write(os.path.join(content, "index.md"), "# Home\n\n![Tom](/tom.png) [Home](/)")
+            self.write(os.path.join(static, "index.css"), "body {}")
+            self.write(os.path.join(static, "tom.png"), "png")
+
+            def build():
+                sync_dir(static, docs, manifest_path, fingerprint=True)
+                return generate_pages_incremental(content, template, docs, "/blog/", manifest_path)
+
+            def output(key):
+                return load_manifest(manifest_path)["assets"][key]["output"]
+
+            self.assertEqual(build(), 1)
+            self.assertEqual(self.read(os.path.join(docs, "index.html")), (
+                f"<link href=\"/blog/{output('index.css')}\"><div><h1>Home</h1><p><img src=\"/blog/{output('tom.png')}\" "
+                f"alt=\"Tom\"></img> <a href=\"/blog/\">Home</a></p></div>"
+            ))
+            self.assertEqual(build(), 0)
+
+            # a new stylesheet changes the template output of every page
+            self.write(os.path.join(content, "about.md"), "# About")
+            self.assertEqual(build(), 1)
+            manifest = load_manifest(manifest_path)
+            self.assertEqual(affected_pages(manifest, os.path.join(static, "index.css"), content, static, template),
+                             ["about.md", "index.md"])
+            self.assertEqual(affected_pages(manifest, os.path.join(static, "tom.png"), content, static, template),
+                             ["index.md"])
+            self.write(os.path.join(static, "index.css"), "body { color: red; }")
+            self.assertEqual(build(), 2)
+            self.assertIn(f"/blog/{output('index.css')}", self.read(os.path.join(docs, "index.html")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,9 @@
+import io
+import os
+import tempfile
 import unittest
 
+import log
 from functions import (
     text_to_html_node,
     split_nodes_delimiter,
@@ -9,14 +13,29 @@ from functions import (
     split_nodes_images,
     text_to_textnodes,
     markdown_to_blocks,
+    iter_blocks,
+    iter_chunks,
     block_to_block_type,
     markdown_to_html_node,
-    extract_title
+    extract_title,
+    generate_pages_incremental,
+    generate_pages,
+    generate_page_targets,
+    generate_sites_incremental,
+    take_output_stats,
+    generate_page,
+    sync_dir
 )
 from textnode import TextNode, TextType
-from blocktype import BlockType
+from blocktype import BlockType, Block
 
 class TestFunctions(unittest.TestCase):
+    def setUp(self):
+        log.quiet = True
+
+    def tearDown(self):
+        log.quiet = False
+
     def test_text(self):
         node = TextNode("This is a text node", TextType.PLAIN)
         html_node = text_to_html_node(node)
@@ -147,6 +166,27 @@ class TestFunctions(unittest.TestCase):
             nodes,
         )
 
+    def test_text_to_textnodes_single_pass(self):
+        text = "A [link](https://example.com/a_b) with `snake_case` and **bold [text](/x)**"
+        nodes = text_to_textnodes(text)
+        self.assertListEqual(
+            [
+                TextNode("A ", TextType.PLAIN),
+                TextNode("link", TextType.LINK, "https://example.com/a_b"),
+                TextNode(" with ", TextType.PLAIN),
+                TextNode("snake_case", TextType.CODE),
+                TextNode(" and ", TextType.PLAIN),
+                TextNode("bold [text](/x)", TextType.BOLD),
+            ],
+            nodes,
+        )
+
+    def test_text_to_textnodes_invalid(self):
+        with self.assertRaises(SyntaxError):
+            text_to_textnodes("This is **not closed")
+        with self.assertRaises(SyntaxError):
+            text_to_textnodes("This is _not closed")
+
     def test_markdown_to_blocks(self):
         md = """
 This is **bolded** paragraph
@@ -168,6 +208,82 @@ This is the same paragraph on a new line
             ],
         )
 
+    def test_iter_blocks(self):
+        md = """# Title
+
+- entry 1
+- entry 2
+no entry
+
+```
+code
+
+with blank line
+```
+"""
+        self.assertListEqual(
+            list(iter_blocks(md)),
+            [
+                Block("# Title", BlockType.HEADING, 0, 1),
+                Block("- entry 1\n- entry 2\nno entry", BlockType.PARAGRAPH, 2, 5),
+                Block("```\ncode\n\nwith blank line\n```", BlockType.CODE, 6, 11),
+            ],
+        )
+
+    def test_iter_blocks_lines(self):
+        lines = ["1. one\n", "2. two\n", "\n", "> quote\n"]
+        self.assertListEqual(
+            [(block.text, block.block_type) for block in iter_blocks(lines)],
+            [("1. one\n2. two", BlockType.ORDERED_LIST), ("> quote", BlockType.QUOTE)],
+        )
+
+    def test_iter_chunks_pieces(self):
+        # files are read in pieces, separators may span them
+        class PieceReader(io.StringIO):
+            def read(self, size=-1):
+                return super().read(3)
+
+        md = "# Title\n\n\nsome  \n text \n \n\n```\ncode\n\n```\n \n" + "long line " * 20 + "\n\n"
+        self.assertListEqual(list(iter_chunks(PieceReader(md))), list(iter_chunks(md)))
+        self.assertListEqual(list(iter_blocks(PieceReader(md))), list(iter_blocks(md)))
+
+    def test_codeblock_blank_lines(self):
+        md = """
+```
+first
+
+second
+```
+"""
+        html = markdown_to_html_node(md).to_html()
+        self.assertEqual(html, "<div><pre><code>first\n\nsecond\n</code></pre></div>")
+
+    def test_fence_after_paragraph_line(self):
+        md = "# T\n\nExample:\n```\nx = 1\n\ny = 2\n```\n\nMore text"
+        self.assertEqual(markdown_to_blocks(md), ["# T", "Example:", "```\nx = 1\n\ny = 2\n```", "More text"])
+        self.assertEqual(
+            markdown_to_html_node(md).to_html(),
+            "<div><h1>T</h1><p>Example:</p><pre><code>x = 1\n\ny = 2\n</code></pre><p>More text</p></div>",
+        )
+        self.assertEqual([(block.start_line, block.end_line) for block in iter_blocks(md)],
+                         [(0, 1), (2, 3), (3, 8), (9, 10)])
+
+    def test_longer_fence(self):
+        md = "````markdown\n```\ncode\n```\n````\n\nafter"
+        self.assertEqual(markdown_to_blocks(md), ["````markdown\n```\ncode\n```\n````", "after"])
+        self.assertEqual(
+            markdown_to_html_node(md).to_html(),
+            "<div><pre><code>```\ncode\n```\n</code></pre><p>after</p></div>",
+        )
+
+    def test_inline_code_fence_paragraph(self):
+        md = "# T\n\n```x``` inline\n\npara two\n\n- a\n- b"
+        html = markdown_to_html_node(md).to_html()
+        # the paragraph is not taken as an unclosed code block
+        self.assertTrue(html.startswith("<div><h1>T</h1><p>"))
+        self.assertTrue(html.endswith(" inline</p><p>para two</p><ul><li>a</li><li>b</li></ul></div>"))
+        self.assertNotIn("<pre>", html)
+
     def test_block_to_block_type_heading(self):
         md = "### Heading at level 3"
         self.assertEqual(
@@ -256,4 +372,190 @@ Other stuff here and there.
 Paragraphs bla bla bla.
 """
         title = extract_title(md)
-        self.assertEqual(title, "Heading Title at Level 1")
\ No newline at end of file
+        self.assertEqual(title, "Heading Title at Level 1")
+
+    def test_generate_pages_incremental(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            docs = os.path.join(tmp, "docs")
+            manifest = os.path.join(tmp, "cache", "manifest.json")
+            template = os.path.join(tmp, "template.html")
+            os.makedirs(os.path.join(content, "blog"))
+            os.makedirs(docs)
+            with open(template, "w") as f:
+                f.write("<title>{{ Title }}</title>{{ Content }}")
+            with open(os.path.join(content, "index.md"), "w") as f:
+                f.write("# Home")
+            with open(os.path.join(content, "blog", "tom.md"), "w") as f:
+                f.write("# Tom")
+
+            generated = generate_pages_incremental(content, template, docs, "/", manifest)
+            self.assertEqual(generated, 2)
+            self.assertEqual(generate_pages_incremental(content, template, docs, "/", manifest), 0)
+
+            with open(os.path.join(content, "index.md"), "w") as f:
+                f.write("# Home, changed")
+            self.assertEqual(generate_pages_incremental(content, template, docs, "/", manifest), 1)
+            self.assertEqual(generate_pages_incremental(content, template, docs, "/blog/", manifest), 2)
+
+            os.remove(os.path.join(content, "blog", "tom.md"))
+            self.assertEqual(generate_pages_incremental(content, template, docs, "/blog/", manifest), 0)
+            self.assertFalse(os.path.exists(os.path.join(docs, "blog", "tom.html")))
+            self.assertTrue(os.path.exists(os.path.join(docs, "index.html")))
+
+    def test_generate_pages_parallel(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            template = os.path.join(tmp, "template.html")
+            with open(template, "w") as f:
+                f.write("<title>{{ Title }}</title>{{ Content }}")
+
+            pages = []
+            for i in range(4):
+                src = os.path.join(tmp, f"page{i}.md")
+                with open(src, "w") as f:
+                    f.write(f"# Page {i}" if i != 2 else "no title here")
+                pages.append((src, os.path.join(tmp, "docs", f"page{i}.html")))
+
+            errors = generate_pages(pages, template, "/", jobs=2)
+            self.assertEqual(len(errors), 1)
+            self.assertEqual(errors[0][0], pages[2][0])
+            self.assertTrue(errors[0][1].startswith("ValueError"))
+
+            with open(pages[3][1]) as f:
+                self.assertEqual(f.read(), "<title>Page 3</title><div><h1>Page 3</h1></div>")
+
+    def test_generate_page_skip_unchanged(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            template = os.path.join(tmp, "template.html")
+            src = os.path.join(tmp, "page.md")
+            dest = os.path.join(tmp, "docs", "page.html")
+            with open(template, "w") as f:
+                f.write("<title>{{ Title }}</title>{{ Content }}")
+            with open(src, "w") as f:
+                f.write("# Title\n\ntext")
+
+            take_output_stats()
+            self.assertTrue(generate_page(src, template, dest, "/"))
+            os.utime(dest, ns=(0, 0))
+            self.assertFalse(generate_page(src, template, dest, "/"))
+            self.assertEqual(os.stat(dest).st_mtime_ns, 0)
+
+            with open(src, "w") as f:
+                f.write("# Title\n\nother")
+            self.assertTrue(generate_page(src, template, dest, "/"))
+            self.assertNotEqual(os.stat(dest).st_mtime_ns, 0)
+            self.assertEqual(take_output_stats(), {"written": 2, "skipped": 1, "deleted": 0})
+
+    def test_generate_page_targets(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            template = os.path.join(tmp, "template.html")
+            other_template = os.path.join(tmp, "other.html")
+            src = os.path.join(tmp, "page.md")
+            with open(template, "w") as f:
+                f.write("<title>{{ Title }}</title><link href=\"/index.css\">{{ Content }}")
+            with open(other_template, "w") as f:
+                f.write("<h2>{{ Title }}</h2>{{ Content }}{{ Content }}")
+            with open(src, "w") as f:
+                f.write("# Title\n\n![Tom](/images/tom.png)")
+
+            targets = [
+                (template, os.path.join(tmp, "docs", "page.html"), "/"),
+                (template, os.path.join(tmp, "mirror", "page.html"), "/mirror/"),
+                (other_template, os.path.join(tmp, "other", "page.html"), "/other/"),
+            ]
+            self.assertEqual(generate_page_targets(src, targets), 3)
+
+            body = "<div><h1>Title</h1><p><img src=\"{}images/tom.png\" alt=\"Tom\"></img></p></div>"
+            with open(targets[0][1]) as f:
+                self.assertEqual(f.read(), "<title>Title</title><link href=\"/index.css\">" + body.format("/"))
+            with open(targets[1][1]) as f:
+                self.assertEqual(f.read(), "<title>Title</title><link href=\"/mirror/index.css\">" + body.format("/mirror/"))
+            with open(targets[2][1]) as f:
+                self.assertEqual(f.read(), "<h2>Title</h2>" + body.format("/other/") * 2)
+
+    def test_generate_sites_incremental(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            template = os.path.join(tmp, "template.html")
+            os.makedirs(content)
+            with open(template, "w") as f:
+                f.write("<title>{{ Title }}</title>{{ Content }}")
+            with open(os.path.join(content, "index.md"), "w") as f:
+                f.write("# Home\n\n[Home](/)")
+
+            def targets(mirror_basepath):
+                return [
+                    (os.path.join(tmp, "docs"), "/", template, os.path.join(tmp, "cache", "docs.json")),
+                    (os.path.join(tmp, "mirror"), mirror_basepath, template, os.path.join(tmp, "cache", "mirror.json")),
+                ]
+
+            self.assertEqual(generate_sites_incremental(content, targets("/a/")), 1)
+            self.assertEqual(generate_sites_incremental(content, targets("/a/")), 0)
+            take_output_stats()
+            # only the mirror with the changed basepath is written
+            self.assertEqual(generate_sites_incremental(content, targets("/b/")), 1)
+            self.assertEqual(take_output_stats(), {"written": 1, "skipped": 0, "deleted": 0})
+            with open(os.path.join(tmp, "mirror", "index.html")) as f:
+                self.assertEqual(f.read(), "<title>Home</title><div><h1>Home</h1><p><a href=\"/b/\">Home</a></p></div>")
+
+    def test_sync_dir(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            static = os.path.join(tmp, "static")
+            docs = os.path.join(tmp, "docs")
+            manifest = os.path.join(tmp, "cache", "manifest.json")
+            os.makedirs(os.path.join(static, "images"))
+            os.makedirs(docs)
+            with open(os.path.join(static, "index.css"), "w") as f:
+                f.write("body {}")
+            with open(os.path.join(static, "images", "tom.png"), "w") as f:
+                f.write("png")
+            with open(os.path.join(docs, "index.html"), "w") as f:
+                f.write("<html></html>")
+
+            self.assertEqual(sync_dir(static, docs, manifest), (2, 0))
+            # temporary files a killed build left next to known outputs
+            # are removed, other files are kept
+            with open(os.path.join(docs, "index.css.tmp"), "w") as f:
+                f.write("body")
+            with open(os.path.join(docs, "index.html.tmp"), "w") as f:
+                f.write("<html>")
+            self.assertEqual(sync_dir(static, docs, manifest), (0, 0))
+            self.assertFalse(os.path.exists(os.path.join(docs, "index.css.tmp")))
+            self.assertTrue(os.path.exists(os.path.join(docs, "index.html.tmp")))
+            os.remove(os.path.join(docs, "index.html.tmp"))
+            self.assertEqual(sync_dir(static, docs, manifest, checksum=True), (0, 0))
+
+            with open(os.path.join(static, "index.css"), "w") as f:
+                f.write("body { color: red; }")
+            os.remove(os.path.join(static, "images", "tom.png"))
+            self.assertEqual(sync_dir(static, docs, manifest, link=True), (1, 1))
+
+            with open(os.path.join(docs, "index.css")) as f:
+                self.assertEqual(f.read(), "body { color: red; }")
+            self.assertFalse(os.path.exists(os.path.join(docs, "images", "tom.png")))
+            self.assertFalse(os.path.exists(os.path.join(docs, "images")))
+            self.assertTrue(os.path.exists(os.path.join(docs, "index.html")))
+
+    def test_generate_page_streaming(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            template = os.path.join(tmp, "template.html")
+            src = os.path.join(tmp, "page.md")
+            dest = os.path.join(tmp, "docs", "page.html")
+            with open(template, "w") as f:
+                f.write("<title>{{ Title }}</title><link href=\"/index.css\">{{ Content }}")
+            with open(src, "w") as f:
+                f.write("Intro with [link](/blog/tom)\n\n# The Title\n\n```\nhref=\"/code\"\n```\n")
+
+            generate_page(src, template, dest, "/base/")
+            with open(dest) as f:
+                self.assertEqual(
+                    f.read(),
+                    "<title>The Title</title><link href=\"/base/index.css\">"
+                    "<div><p>Intro with <a href=\"/base/blog/tom\">link</a></p><h1>The Title</h1>"
+                    "<pre><code>href=\"/code\"\n</code></pre></div>",
+                )
+
+            with open(src, "w") as f:
+                f.write("## No level 1 heading\n\ntext")
+            with self.assertRaises(ValueError):
+                generate_page(src, template, dest, "/")
@@ -0,0 +1,51 @@
+import unittest
+
+from functions import markdown_to_html_node
+from highlight import get_tokenizer, highlight, highlight_cache, language_name, tokenize_html
+
+class TestHighlight(unittest.TestCase):
+    def test_language_name(self):
+        self.assertEqual(language_name("python"), "python")
+        self.assertEqual(language_name("Py {linenos}"), "python")
+        self.assertEqual(language_name("ts"), "javascript")
+        self.assertIsNone(language_name("brainfuck"))
+        self.assertIsNone(language_name(""))
+
+    def test_tokenize_python(self):
+        html = tokenize_html("def f(x):\n    return x < 1  # small\n", "python")
+        self.assertEqual(
+            html,
+            "<span class=\"k\">def</span> <span class=\"nf\">f</span>(x):\n"
+            "    <span class=\"k\">return</span> x &lt; <span class=\"m\">1</span>  "
+            "<span class=\"c\"># small</span>\n",
+        )
+
+    def test_multiline_string(self):
+        html = tokenize_html("x = \"\"\"a\nb\"\"\"\n", "python")
+        self.assertIn("<span class=\"s\">\"\"\"a\nb\"\"\"</span>", html)
+
+    def test_tokenizer_compiled_once(self):
+        self.assertIs(get_tokenizer("bash"), get_tokenizer("bash"))
+
+    def test_cache(self):
+        highlight_cache.clear()
+        html = highlight("echo $HOME", "bash")
+        self.assertEqual(len(highlight_cache), 1)
+        self.assertIs(highlight("echo $HOME", "bash"), html)
+        self.assertEqual(len(highlight_cache), 1)
+
+    def test_code_block(self):
+        node = markdown_to_html_node("```python\nprint(\"<b>\")\n```")
+        self.assertEqual(
+            node.to_html(),
+            "<div><pre><code class=\"language-python\"><span class=\"nb\">print</span>"
+            "(<span class=\"s\">\"&lt;b&gt;\"</span>)\n</code></pre></div>",
+        )
+
+    def test_unknown_language(self):
+        node = markdown_to_html_node("```brainfuck\n+[-->-[>>+>-----<<]<--<---]\n```")
+        self.assertEqual(node.to_html(), "<div><pre><code>+[-->-[>>+>-----<<]<--<---]\n</code></pre></div>")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+
+from htmlwriter import HTMLWriter
+from leafnode import LeafNode
+from parentnode import ParentNode
+
+class TestHTMLWriter(unittest.TestCase):
+    def test_write_node(self):
+        chunks = []
+        node = ParentNode("div", [LeafNode("b", "bold"), LeafNode(None, " text")])
+        writer = HTMLWriter(chunks.append)
+        node.write_html(writer.write)
+        self.assertEqual(len(chunks), 0)
+        writer.flush()
+        self.assertListEqual(chunks, ["<div><b>bold</b> text</div>"])
+
+    def test_chunked(self):
+        chunks = []
+        writer = HTMLWriter(chunks.append, buffer_size=10)
+        for _ in range(5):
+            writer.write("<p>x</p>")
+        writer.flush()
+        self.assertEqual("".join(chunks), "<p>x</p>" * 5)
+        self.assertTrue(all(len(chunk) <= 16 for chunk in chunks))
+
+    def test_flush_twice(self):
+        chunks = []
+        writer = HTMLWriter(chunks.append)
+        writer.write("<p>")
+        writer.flush()
+        writer.flush()
+        self.assertListEqual(chunks, ["<p>"])
+
+
+if __name__ == "__main__":
+    unittest.main()
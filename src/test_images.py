@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+
+import log
+from images import Image, ImageCache, ImageMap, derivative_name, is_responsive_image, image_map_from_manifest
+from functions import text_to_html_node, set_image_map, sync_dir
+from textnode import TextNode, TextType
+from urls import basepath_url
+from depgraph import PathIndex
+from manifest import load_manifest
+
+TOM = {"width": 1200, "height": 800, "variants": [["images/tom.480w.png", 480], ["images/tom.960w.png", 960]]}
+
+class TestImages(unittest.TestCase):
+    def setUp(self):
+        log.quiet = True
+
+    def tearDown(self):
+        log.quiet = False
+
+    def test_derivative_name(self):
+        self.assertEqual(derivative_name("images/tom.png", 480), "images/tom.480w.png")
+        self.assertEqual(derivative_name("images/tom.3f9a1c07b2.jpg", 960), "images/tom.3f9a1c07b2.960w.jpg")
+        self.assertTrue(is_responsive_image("images/Tom.JPEG"))
+        self.assertFalse(is_responsive_image("images/tom.gif"))
+
+    def test_attributes(self):
+        images = ImageMap({"images/tom.png": TOM, "images/bob.png": {"width": 300, "height": 200, "variants": []}})
+        self.assertEqual(images.attributes("/images/tom.png"), {
+            "width": "1200",
+            "height": "800",
+            "srcset": "/images/tom.480w.png 480w, /images/tom.960w.png 960w, /images/tom.png 1200w",
+        })
+        self.assertEqual(images.attributes("/images/bob.png"), {"width": "300", "height": "200"})
+        self.assertIsNone(images.attributes("images/tom.png"))
+        self.assertIsNone(images.attributes("/images/glorfindel.png"))
+        self.assertIsNone(image_map_from_manifest({"assets": {"images/tom.png": {"size": 3, "mtime": 7}}}))
+
+    def test_image_node(self):
+        set_image_map(ImageMap({"images/tom.png": TOM}))
+        self.addCleanup(set_image_map, None)
+        node = text_to_html_node(TextNode("Tom", TextType.IMAGE, "/images/tom.png"))
+        parts = []
+        node.write_html(parts.append, basepath_url("/blog/"))
+        self.assertEqual("".join(parts), (
+            "<img src=\"/blog/images/tom.png\" alt=\"Tom\" width=\"1200\" height=\"800\" "
+            "srcset=\"/blog/images/tom.480w.png 480w, /blog/images/tom.960w.png 960w, /blog/images/tom.png 1200w\"></img>"
+        ))
+
+    def test_resolve_variant(self):
+        index = PathIndex({"images/tom.png": {"size": 3, "mtime": 7, "image": TOM}}, {})
+        self.assertEqual(index.resolve("/images/tom.960w.png", "index.html"), "asset:images/tom.png")
+
+    @unittest.skipIf(Image is None, "Pillow is not installed")
+    def test_sync_dir_images(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            static = os.path.join(tmp, "static")
+            docs = os.path.join(tmp, "docs")
+            manifest_path = os.path.join(tmp, "cache", "manifest.json")
+            os.makedirs(os.path.join(static, "images"))
+            Image.new("RGB", (1000, 500), "green").save(os.path.join(static, "images", "tom.png"))
+            cache = ImageCache(os.path.join(tmp, "cache", "images"))
+
+            self.assertEqual(sync_dir(static, docs, manifest_path, images=cache), (3, 0))
+            image = load_manifest(manifest_path)["assets"]["images/tom.png"]["image"]
+            self.assertEqual(image, {"width": 1000, "height": 500, "variants": [
+                ["images/tom.480w.png", 480], ["images/tom.960w.png", 960],
+            ]})
+            with Image.open(os.path.join(docs, "images", "tom.480w.png")) as derivative:
+                self.assertEqual(derivative.size, (480, 240))
+
+            # unchanged images are taken from the cache, even for a new tree
+            other = os.path.join(tmp, "other")
+            self.assertEqual(sync_dir(static, other, os.path.join(tmp, "cache", "other.json"), images=cache), (3, 0))
+            self.assertEqual(cache.stats(), {"hits": 1, "misses": 1})
+
+            # without images the derivatives are removed
+            self.assertEqual(sync_dir(static, docs, manifest_path), (0, 2))
+            self.assertFalse(os.path.exists(os.path.join(docs, "images", "tom.480w.png")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import tempfile
+import unittest
+
+import log
+from functions import generate_pages, markdown_to_html_node, set_inline_cache
+from fragmentnode import FragmentNode, fragment_parts
+from inlinecache import InlineCache
+from leafnode import LeafNode
+
+class TestInlineCache(unittest.TestCase):
+    def setUp(self):
+        log.quiet = True
+
+    def tearDown(self):
+        log.quiet = False
+        set_inline_cache(None)
+
+    def test_fragment_parts(self):
+        nodes = [LeafNode(None, "See "), LeafNode("a", "Tom", {"href": "/blog/tom"})]
+        parts = fragment_parts(nodes)
+        self.assertEqual(parts, ("See <a href=\"", "/blog/tom", "\">Tom</a>"))
+        fragment = FragmentNode(parts)
+        self.assertEqual(fragment.to_html(), "See <a href=\"/blog/tom\">Tom</a>")
+        html = []
+        fragment.write_html(html.append, lambda url: "/base" + url)
+        self.assertEqual("".join(html), "See <a href=\"/base/blog/tom\">Tom</a>")
+
+    def test_lru(self):
+        cache = InlineCache(max_bytes=500)
+        cache.put("a", ("A",))
+        cache.put("b", ("B",))
+        self.assertEqual(cache.get("a"), ("A",))
+        cache.put("c", ("C",))
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), ("A",))
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"]), (2, 1, 1))
+        self.assertLessEqual(stats["bytes"], 500)
+
+    def test_same_html(self):
+        md = "- [Tom](/blog/tom)\n- [Tom](/blog/tom)\n- _shared_ footer"
+        expected = markdown_to_html_node(md).to_html()
+
+        cache = InlineCache()
+        set_inline_cache(cache)
+        self.assertEqual(markdown_to_html_node(md).to_html(), expected)
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 2)
+
+    def test_persist(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "inline.pickle")
+            cache = InlineCache(path=path)
+            cache.put("**bold**", ("<b>bold</b>",))
+            cache.save()
+
+            loaded = InlineCache(path=path)
+            loaded.load()
+            self.assertEqual(loaded.get("**bold**"), ("<b>bold</b>",))
+
+    def test_persist_workers(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            template = os.path.join(tmp, "template.html")
+            with open(template, "w") as f:
+                f.write("<title>{{ Title }}</title>{{ Content }}")
+            pages = []
+            for i in range(4):
+                src = os.path.join(tmp, f"page{i}.md")
+                with open(src, "w") as f:
+                    f.write(f"# Page {i}\n\n_shared_ footer")
+                pages.append((src, os.path.join(tmp, "docs", f"page{i}.html")))
+
+            # entries rendered by the workers are saved by the main process
+            path = os.path.join(tmp, "inline.pickle")
+            cache = InlineCache(path=path)
+            set_inline_cache(cache)
+            self.assertEqual(generate_pages(pages, template, "/", jobs=2), [])
+            cache.save()
+
+            loaded = InlineCache(path=path)
+            loaded.load()
+            self.assertEqual(loaded.get("_shared_ footer"), ("<i>shared</i> footer",))
+            self.assertEqual(loaded.get("Page 3"), ("Page 3",))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -19,6 +19,15 @@ class TestLeafNode(unittest.TestCase):
         node = LeafNode("div", "Hello, world!", { "href": "https://github.com", "size": "40" })
         self.assertEqual(node.to_html(), "<div href=\"https://github.com\" size=\"40\">Hello, world!</div>")
 
+    def test_write_html_url(self):
+        parts = []
+        node = LeafNode("a", "Tom", { "href": "/blog/tom", "title": "/blog/tom" })
+        node.write_html(parts.append, lambda url: "/base" + url)
+        self.assertListEqual(parts, ["<a href=\"/base/blog/tom\" title=\"/blog/tom\">Tom</a>"])
+
+    def test_slots(self):
+        node = LeafNode("b", "Hello, world!")
+        self.assertFalse(hasattr(node, "__dict__"))
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
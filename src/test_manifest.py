@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+
+from manifest import (
+    hash_file,
+    load_manifest,
+    save_manifest,
+    new_manifest,
+    page_inputs,
+    is_page_current,
+    record_page,
+    stale_outputs
+)
+import manifest as manifest_module
+
+class TestManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write(self, name, text):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def test_hash_file(self):
+        path = self.write("a.md", "# Title")
+        path2 = self.write("b.md", "# Title")
+        path3 = self.write("c.md", "# Other")
+        self.assertEqual(hash_file(path), hash_file(path2))
+        self.assertNotEqual(hash_file(path), hash_file(path3))
+
+    def test_load_missing(self):
+        manifest = load_manifest(os.path.join(self.tmp.name, "missing.json"))
+        self.assertEqual(manifest, new_manifest())
+
+    def test_load_invalid(self):
+        path = self.write("manifest.json", "{ not json")
+        self.assertEqual(load_manifest(path), new_manifest())
+
+    def test_save_load(self):
+        path = os.path.join(self.tmp.name, "cache", "manifest.json")
+        manifest = new_manifest()
+        record_page(manifest, "index.md", page_inputs("abc", "def", "/"), "index.html")
+        save_manifest(path, manifest)
+        self.assertEqual(load_manifest(path), manifest)
+
+    def test_is_page_current(self):
+        dest = self.write("index.html", "<html></html>")
+        inputs = page_inputs("abc", "def", "/")
+        manifest = new_manifest()
+        self.assertFalse(is_page_current(manifest, "index.md", inputs, "index.html", dest))
+
+        record_page(manifest, "index.md", inputs, "index.html")
+        self.assertTrue(is_page_current(manifest, "index.md", inputs, "index.html", dest))
+
+        changed = page_inputs("abc", "def", "/static-site-generator/")
+        self.assertFalse(is_page_current(manifest, "index.md", changed, "index.html", dest))
+
+        # pages of an older renderer are generated again
+        manifest_module.RENDER_VERSION += 1
+        self.addCleanup(setattr, manifest_module, "RENDER_VERSION", manifest_module.RENDER_VERSION - 1)
+        self.assertFalse(is_page_current(manifest, "index.md", page_inputs("abc", "def", "/"), "index.html", dest))
+
+        os.remove(dest)
+        self.assertFalse(is_page_current(manifest, "index.md", inputs, "index.html", dest))
+
+    def test_stale_outputs(self):
+        inputs = page_inputs("abc", "def", "/")
+        old = new_manifest()
+        record_page(old, "index.md", inputs, "index.html")
+        record_page(old, "blog/tom.md", inputs, "blog/tom.html")
+        new = new_manifest()
+        record_page(new, "index.md", inputs, "index.html")
+        self.assertListEqual(stale_outputs(old, new), ["blog/tom.html"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import os
+import tempfile
+import unittest
+
+import log
+from minify import minify_html
+from functions import generate_page, set_minify_output
+from fragmentnode import FragmentNode, fragment_parts
+from leafnode import LeafNode
+from parentnode import ParentNode
+from template import Template
+from urls import basepath_url
+
+class TestMinify(unittest.TestCase):
+    def setUp(self):
+        log.quiet = True
+
+    def tearDown(self):
+        log.quiet = False
+
+    def test_minify_html(self):
+        self.assertEqual(minify_html(
+            "<!doctype html>\n<html>\n  <head>\n    <meta charset=\"utf-8\" />\n"
+            "    <title>{{ Title }}</title>\n  </head>\n  <!-- comment -->\n"
+            "  <body class='page  wide'>\n    <p>Tom  <b>Bombadil</b>\n    <i>merry</i></p>\n"
+            "    <pre>  old\n    Tom </pre>\n  </body>\n</html>\n"
+        ), (
+            "<!doctype html><html><head><meta charset=utf-8><title>{{ Title }}</title></head>"
+            "<body class='page  wide'><p>Tom <b>Bombadil</b> <i>merry</i></p><pre>  old\n    Tom </pre></body></html>"
+        ))
+
+    def test_minify_attributes(self):
+        # placeholders keep their quotes, the value is only known later
+        self.assertEqual(minify_html("<meta content=\"{{Title}}\">"), "<meta content=\"{{Title}}\">")
+        self.assertEqual(minify_html("<a href=\"/\" title=\"\" data-x=\"1>2\">x</a>"), "<a href=/ title=\"\" data-x=\"1>2\">x</a>")
+        self.assertEqual(minify_html("<svg><path d=\"M0 0\"/></svg>"), "<svg><path d=\"M0 0\" /></svg>")
+        self.assertEqual(minify_html("<p>Tom  Bombadil</p>"), "<p>Tom  Bombadil</p>")
+
+    def test_serializer(self):
+        node = ParentNode("p", [LeafNode("a", "Tom", {"href": "/blog/tom", "title": "Old Tom"})], {"class": "intro"})
+        self.assertEqual(node.to_html(), "<p class=\"intro\"><a href=\"/blog/tom\" title=\"Old Tom\">Tom</a></p>")
+        parts = []
+        node.write_html(parts.append, minified=True)
+        self.assertEqual("".join(parts), "<p class=intro><a href=/blog/tom title=\"Old Tom\">Tom</a></p>")
+
+    def test_fragment(self):
+        nodes = [LeafNode("a", "Tom", {"href": "/blog/tom"}), LeafNode("a", "Bob", {"href": "/blog/my bob"})]
+        fragment = FragmentNode(fragment_parts(nodes, minified=True))
+        parts = []
+        fragment.write_html(parts.append, basepath_url("/site/"), minified=True)
+        self.assertEqual("".join(parts), "<a href=/site/blog/tom>Tom</a><a href=\"/site/blog/my bob\">Bob</a>")
+
+        # written the same way as without the fragment
+        parts = []
+        for node in nodes:
+            node.write_html(parts.append, basepath_url("/site/"), minified=True)
+        self.assertEqual("".join(parts), "<a href=/site/blog/tom>Tom</a><a href=\"/site/blog/my bob\">Bob</a>")
+
+    def test_template(self):
+        source = "<html>\n  <head><link href=\"/index.css\" rel=\"stylesheet\" /></head>\n  <body>{{ Content }}</body>\n</html>\n"
+        template = Template(source, "/site/", minify=True)
+        self.assertEqual(
+            template.render({"Content": "<p>Tom</p>"}),
+            "<html><head><link href=/site/index.css rel=stylesheet></head><body><p>Tom</p></body></html>",
+        )
+        self.assertEqual(template.urls, ["/index.css"])
+
+    def test_page(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = os.path.join(tmp, "index.md")
+            template = os.path.join(tmp, "template.html")
+            dest = os.path.join(tmp, "index.html")
+            with open(src, "w") as f:
+                f.write("# Tom\n\n[Old Tom](/blog/tom) ![Tom](/tom.png)\n\n```python\nx = 1\n```")
+            with open(template, "w") as f:
+                f.write("<html>\n  <body class=\"page\">{{ Content }}</body>\n</html>\n")
+
+            set_minify_output(True)
+            self.addCleanup(set_minify_output, False)
+            generate_page(src, template, dest, "/site/")
+            with open(dest) as f:
+                self.assertEqual(f.read(), (
+                    "<html><body class=page><div><h1>Tom</h1><p><a href=/site/blog/tom>Old Tom</a> "
+                    "<img src=/site/tom.png alt=Tom></img></p><pre><code class=language-python>"
+                    "x = <span class=m>1</span>\n</code></pre></div></body></html>"
+                ))
+
+            # nodes are only minified when they are written for the page
+            node = ParentNode("p", [LeafNode("a", "Tom", {"href": "/blog/tom"})])
+            self.assertEqual(node.to_html(), "<p><a href=\"/blog/tom\">Tom</a></p>")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+
+from pageio import PageOutput, SourceReader, files_equal, hash_files, remove_tmp_files, scan_pages
+from manifest import hash_file
+
+class TestPageIO(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, rel, text):
+        path = os.path.join(self.root, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def test_scan_pages(self):
+        self.write("content/index.md", "# Index")
+        self.write("content/blog/b.md", "# B")
+        self.write("content/blog/a.md", "# A")
+        self.write("content/blog/image.png", "")
+        content = os.path.join(self.root, "content")
+        docs = os.path.join(self.root, "docs")
+        self.assertEqual(scan_pages(content, docs), [
+            (os.path.join(content, "blog", "a.md"), os.path.join(docs, "blog", "a.html")),
+            (os.path.join(content, "blog", "b.md"), os.path.join(docs, "blog", "b.html")),
+            (os.path.join(content, "index.md"), os.path.join(docs, "index.html")),
+        ])
+
+    def test_hash_files(self):
+        paths = [self.write(f"{i}.md", f"page {i}") for i in range(5)]
+        self.assertEqual(hash_files(paths), [hash_file(path) for path in paths])
+
+    def test_source_reader(self):
+        small = self.write("small.md", "# Small")
+        large = self.write("large.md", "# Large\n" + "x" * 100)
+        missing = os.path.join(self.root, "missing.md")
+        with SourceReader([small, large, missing], ahead=1, max_size=50) as reader:
+            with reader.open(small) as f:
+                self.assertEqual(f.read(), "# Small")
+            with reader.open(large) as f:
+                self.assertTrue(f.read().startswith("# Large"))
+            with self.assertRaises(FileNotFoundError):
+                reader.open(missing)
+
+    def test_page_output(self):
+        dest = os.path.join(self.root, "docs", "index.html")
+        with PageOutput(dest) as output:
+            for i in range(10):
+                output.write(f"<p>{i}</p>")
+            self.assertFalse(os.path.exists(dest))
+        with open(dest) as f:
+            self.assertEqual(f.read(), "".join(f"<p>{i}</p>" for i in range(10)))
+
+    def test_files_equal(self):
+        a = self.write("a.html", "<p>same</p>")
+        b = self.write("b.html", "<p>same</p>")
+        c = self.write("c.html", "<p>diff</p>")
+        self.assertTrue(files_equal(a, b))
+        self.assertFalse(files_equal(a, c))
+        self.assertFalse(files_equal(a, os.path.join(self.root, "missing.html")))
+
+    def test_page_output_error(self):
+        dest = self.write("docs/index.html", "old")
+        with self.assertRaises(ValueError):
+            with PageOutput(dest) as output:
+                output.write("<p>new</p>")
+                raise ValueError("render failed")
+        with open(dest) as f:
+            self.assertEqual(f.read(), "old")
+        self.assertEqual(os.listdir(os.path.dirname(dest)), ["index.html"])
+
+    def test_remove_tmp_files(self):
+        leftover = self.write("docs/blog/index.html.tmp", "<p>half")
+        kept = self.write("docs/notes.tmp", "static file")
+        unknown = self.write("docs/drafts/todo.tmp", "not ours")
+        page = self.write("docs/blog/index.html", "<p>old</p>")
+        outputs = {"blog/index.html", "notes", "notes.tmp"}
+        self.assertEqual(remove_tmp_files(os.path.join(self.root, "docs"), outputs), [leftover])
+        self.assertFalse(os.path.exists(leftover))
+        self.assertTrue(os.path.exists(kept))
+        self.assertTrue(os.path.exists(unknown))
+        self.assertTrue(os.path.exists(page))
+
+if __name__ == "__main__":
+    unittest.main()
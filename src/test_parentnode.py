@@ -18,5 +18,16 @@ class TestParentNode(unittest.TestCase):
             "<div><span><b>grandchild</b></span></div>",
         )
 
+    def test_to_html_with_props(self):
+        child_node = LeafNode("span", "child")
+        parent_node = ParentNode("div", [child_node], {"class": "content"})
+        self.assertEqual(parent_node.to_html(), "<div class=\"content\"><span>child</span></div>")
+
+    def test_write_html(self):
+        parts = []
+        parent_node = ParentNode("p", [LeafNode(None, "a "), LeafNode("b", "b")])
+        parent_node.write_html(parts.append)
+        self.assertListEqual(parts, ["<p>", "a ", "<b>b</b>", "</p>"])
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
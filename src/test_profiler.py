@@ -0,0 +1,85 @@
+import os
+import tempfile
+import time
+import unittest
+
+import log
+import profiler
+from functions import generate_pages, iter_blocks
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self):
+        log.quiet = True
+        profiler.enabled = True
+        profiler.take_records()
+
+    def tearDown(self):
+        log.quiet = False
+        profiler.enabled = False
+        profiler.take_records()
+
+    def test_nested_phases(self):
+        profiler.start_page()
+        with profiler.phase("outer"):
+            time.sleep(0.01)
+            with profiler.phase("inner"):
+                time.sleep(0.02)
+        profiler.end_page("page.md")
+
+        records = profiler.take_records()
+        self.assertEqual(len(records), 1)
+        phases = records[0]["phases"]
+        self.assertGreaterEqual(phases["inner"], 0.02)
+        self.assertLess(phases["outer"], 0.02)
+        self.assertGreaterEqual(records[0]["total"], phases["outer"] + phases["inner"])
+
+    def test_disabled(self):
+        profiler.enabled = False
+        profiler.start_page()
+        with profiler.phase("outer"):
+            pass
+        profiler.end_page("page.md")
+        self.assertListEqual(profiler.take_records(), [])
+
+    def test_read_phase(self):
+        # the source is read while the blocks are scanned
+        class SlowReader():
+            def __init__(self, text):
+                self.pieces = [text, ""]
+
+            def read(self, size):
+                time.sleep(0.02)
+                return self.pieces.pop(0)
+
+        profiler.start_page()
+        with profiler.phase("markdown_to_blocks"):
+            blocks = list(iter_blocks(SlowReader("# Tom\n\nBombadil")))
+        profiler.end_page("page.md")
+
+        self.assertEqual(len(blocks), 2)
+        phases = profiler.take_records()[0]["phases"]
+        self.assertGreaterEqual(phases["read"], 0.04)
+        self.assertLess(phases["markdown_to_blocks"], 0.02)
+
+    def test_generate_pages_report(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            template = os.path.join(tmp, "template.html")
+            with open(template, "w") as f:
+                f.write("<title>{{ Title }}</title>{{ Content }}")
+            pages = []
+            for i in range(3):
+                src = os.path.join(tmp, f"page{i}.md")
+                with open(src, "w") as f:
+                    f.write(f"# Page {i}\n\nSome **bold** text")
+                pages.append((src, os.path.join(tmp, f"page{i}.html")))
+
+            self.assertListEqual(generate_pages(pages, template, "/", jobs=2), [])
+            report = profiler.build_report(profiler.take_records(), slowest=2)
+            self.assertEqual(report["pages"], 3)
+            self.assertEqual(len(report["slowest"]), 2)
+            for name in ("read", "markdown_to_blocks", "block_to_html", "inline", "to_html", "write"):
+                self.assertIn(name, report["phases"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import os
+import tempfile
+import unittest
+
+import log
+from blocktype import BlockType
+from functions import generate_page, markdown_to_html_node, set_render_cache
+from rendercache import RenderCache
+
+class TestRenderCache(unittest.TestCase):
+    def setUp(self):
+        log.quiet = True
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "render.sqlite")
+
+    def tearDown(self):
+        log.quiet = False
+        set_render_cache(None)
+        self.tmp.cleanup()
+
+    def test_same_html(self):
+        md = "# Title\n\nA [link](/blog/tom) and **bold**\n\n```\ncode\n```\n\n> quote"
+        expected = markdown_to_html_node(md).to_html()
+
+        cache = RenderCache(self.path)
+        set_render_cache(cache)
+        self.assertEqual(markdown_to_html_node(md).to_html(), expected)
+        self.assertEqual(cache.stats(), {"hits": 0, "misses": 4})
+        self.assertEqual(markdown_to_html_node(md).to_html(), expected)
+        self.assertEqual(cache.stats(), {"hits": 4, "misses": 4})
+        cache.close()
+
+    def test_edited_block(self):
+        cache = RenderCache(self.path)
+        set_render_cache(cache)
+        markdown_to_html_node("first\n\nsecond\n\nthird")
+        cache.commit()
+        cache.reset_stats()
+
+        node = markdown_to_html_node("first\n\nsecond, edited\n\nthird")
+        self.assertIn("second, edited", node.to_html())
+        self.assertEqual(cache.stats(), {"hits": 2, "misses": 1})
+        cache.close()
+
+    def test_shared_between_connections(self):
+        cache = RenderCache(self.path)
+        key = cache.key("a [link](/x)", BlockType.PARAGRAPH)
+        cache.put(key, ("<p>a <a href=\"", "/x", "\">link</a></p>"))
+        cache.commit()
+
+        other = RenderCache(self.path)
+        self.assertEqual(other.get(key), ("<p>a <a href=\"", "/x", "\">link</a></p>"))
+        self.assertIsNone(other.get(cache.key("a [link](/x)", BlockType.QUOTE)))
+        other.close()
+        cache.close()
+
+    def test_concurrent_puts(self):
+        cache = RenderCache(self.path)
+        other = RenderCache(self.path)
+        # a writer waiting for the lock fails quickly instead of hanging
+        for connection in (cache.connection, other.connection):
+            connection.execute("PRAGMA busy_timeout = 100")
+
+        # both pages are rendered at the same time, neither holds the
+        # write lock until it commits
+        first = cache.key("Tom", BlockType.PARAGRAPH)
+        second = other.key("Bob", BlockType.PARAGRAPH)
+        cache.put(first, ("<p>Tom</p>",))
+        other.put(second, ("<p>Bob</p>",))
+        self.assertEqual(cache.get(first), ("<p>Tom</p>",))
+        cache.commit()
+        other.commit()
+
+        self.assertEqual(cache.get(second), ("<p>Bob</p>",))
+        self.assertEqual(other.get(first), ("<p>Tom</p>",))
+        other.close()
+        cache.close()
+
+    def test_basepath(self):
+        src = os.path.join(self.tmp.name, "index.md")
+        template = os.path.join(self.tmp.name, "template.html")
+        with open(src, "w") as f:
+            f.write("# Title\n\n[Tom](/blog/tom)")
+        with open(template, "w") as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+
+        cache = RenderCache(self.path)
+        set_render_cache(cache)
+        for basepath in ("/", "/site/"):
+            dest = os.path.join(self.tmp.name, "index.html")
+            generate_page(src, template, dest, basepath)
+            with open(dest) as f:
+                html = f.read()
+            self.assertIn(f"<a href=\"{basepath}blog/tom\">Tom</a>", html)
+        self.assertEqual(cache.stats()["hits"], 2)
+        cache.close()
+
+    def test_evict(self):
+        cache = RenderCache(self.path, max_bytes=1000)
+        keys = []
+        for i in range(10):
+            key = cache.key(f"block {i}", BlockType.PARAGRAPH)
+            cache.put(key, ("x" * 200,))
+            keys.append(key)
+        cache.commit()
+
+        self.assertGreater(cache.evict(), 0)
+        self.assertLessEqual(cache.total_size(), 1000)
+        self.assertIsNotNone(cache.get(keys[-1]))
+        cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import os
+import tempfile
+import json
+import unittest
+
+import log
+from blocktype import Block, BlockType
+from functions import (
+    block_text_nodes,
+    generate_page,
+    generate_pages_incremental,
+    set_inline_cache,
+    set_render_cache,
+    set_search_terms,
+    take_search_terms,
+)
+from inlinecache import InlineCache
+from rendercache import RenderCache
+from searchindex import SearchIndex, block_terms, encode_postings, page_terms
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        log.quiet = True
+
+    def tearDown(self):
+        log.quiet = False
+
+    def test_block_terms(self):
+        def terms(block):
+            return block_terms(block_text_nodes(block.text, block.block_type))
+
+        block = Block("The _Hobbit_ and [Tom](/blog/tom) are **great** a", BlockType.PARAGRAPH, 0, 1)
+        self.assertEqual(terms(block), ["the", "hobbit", "and", "tom", "are", "great", "a"])
+        block = Block("- ![Old Tom](/images/tom.png)\n- `merry` dol", BlockType.UNORDERED_LIST, 0, 2)
+        self.assertEqual(terms(block), ["old", "tom", "merry", "dol"])
+        block = Block("```python\nbombadil = 1\n```", BlockType.CODE, 0, 3)
+        self.assertEqual(terms(block), [])
+
+    def test_terms_with_caches(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = os.path.join(tmp, "index.md")
+            template = os.path.join(tmp, "template.html")
+            dest = os.path.join(tmp, "index.html")
+            with open(src, "w") as f:
+                f.write("# Old Tom\n\nTom [Bombadil](/tom) is _merry_\n\n- Goldberry\n\n```\nnot indexed\n```")
+            with open(template, "w") as f:
+                f.write("{{ Content }}")
+
+            def terms():
+                set_search_terms({})
+                generate_page(src, template, dest, "/")
+                terms = take_search_terms()[src]["terms"]
+                set_search_terms(None)
+                return terms
+
+            expected = {"old": 1, "tom": 2, "bombadil": 1, "is": 1, "merry": 1, "goldberry": 1}
+            self.assertEqual(terms(), expected)
+
+            # cached texts and blocks have no parsed nodes, the same terms
+            # are counted for them
+            set_inline_cache(InlineCache())
+            self.addCleanup(set_inline_cache, None)
+            self.assertEqual([terms(), terms()], [expected, expected])
+            set_inline_cache(None)
+            cache = RenderCache(os.path.join(tmp, "render.sqlite"))
+            set_render_cache(cache)
+            self.addCleanup(set_render_cache, None)
+            self.addCleanup(cache.close)
+            self.assertEqual([terms(), terms()], [expected, expected])
+            self.assertGreater(cache.stats()["hits"], 0)
+
+    def test_page_terms(self):
+        self.assertEqual(page_terms({"a": 2, "ab": 1, "x" * 40: 1}), {"ab": 1})
+
+    def test_encode_postings(self):
+        self.assertEqual(encode_postings([(5, 1), (2, 3), (9, 2)]), [2, 3, 3, 1, 4, 2])
+
+    def test_shards(self):
+        index = SearchIndex(shard_max_bytes=40)
+        index.update("b.md", "b.html", "B", {"beta": 1, "gamma": 2})
+        index.update("a.md", "a.html", "A", {"alpha": 3, "beta": 1})
+        pages, shards = index.build()
+        self.assertEqual(pages, [["a.html", "A"], ["b.html", "B"]])
+        self.assertGreater(len(shards), 1)
+        merged = {}
+        for shard in shards:
+            merged.update(shard)
+        self.assertEqual(merged, {"alpha": [0, 3], "beta": [0, 1, 1, 1], "gamma": [1, 2]})
+
+        with tempfile.TemporaryDirectory() as tmp:
+            self.assertEqual(index.write(tmp), len(shards))
+            with open(os.path.join(tmp, "index.json")) as f:
+                data = json.load(f)
+            self.assertEqual(data["shards"][0], ["alpha", "shard-0.json"])
+
+            index.remove("b.md")
+            self.assertEqual(index.write(tmp), 1)
+            self.assertEqual(sorted(os.listdir(tmp)), ["index.json", "shard-0.json"])
+
+    def test_incremental(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            docs = os.path.join(tmp, "docs")
+            manifest = os.path.join(tmp, "cache", "manifest.json")
+            template = os.path.join(tmp, "template.html")
+            os.makedirs(os.path.join(content, "blog"))
+            with open(template, "w") as f:
+                f.write("<title>{{ Title }}</title>{{ Content }}")
+            with open(os.path.join(content, "index.md"), "w") as f:
+                f.write("# Home\n\nWelcome home")
+            with open(os.path.join(content, "blog", "tom.md"), "w") as f:
+                f.write("# Tom\n\nBombadil")
+
+            # pages built without index are generated again for their terms
+            self.assertEqual(generate_pages_incremental(content, template, docs, "/", manifest), 2)
+            index = SearchIndex(os.path.join(tmp, "cache", "search.json"))
+            self.assertEqual(generate_pages_incremental(content, template, docs, "/", manifest, 1, index), 2)
+            self.assertEqual(index.pages["blog/tom.md"]["terms"], {"tom": 1, "bombadil": 1})
+            self.assertEqual(index.pages["blog/tom.md"]["url"], "blog/tom.html")
+            index.save()
+
+            loaded = SearchIndex(index.path)
+            loaded.load()
+            os.remove(os.path.join(content, "blog", "tom.md"))
+            self.assertEqual(generate_pages_incremental(content, template, docs, "/", manifest, 1, loaded), 0)
+            self.assertEqual(list(loaded.pages), ["index.md"])
+
+
+if __name__ == "__main__":
+    unittest.main()
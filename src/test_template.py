@@ -0,0 +1,47 @@
+import os
+import tempfile
+import unittest
+
+from template import Template, load_template
+
+class TestTemplate(unittest.TestCase):
+    def test_render(self):
+        template = Template("<title>{{ Title }}</title><article>{{Content}}</article>")
+        self.assertListEqual(template.slots, ["Title", "Content"])
+        self.assertEqual(
+            template.render({"Title": "Tolkien", "Content": "<p>text</p>"}),
+            "<title>Tolkien</title><article><p>text</p></article>",
+        )
+
+    def test_missing_value(self):
+        template = Template("<p>{{ Date }}</p>")
+        self.assertEqual(template.render({}), "<p>{{ Date }}</p>")
+
+    def test_streamed_value(self):
+        template = Template("<article>{{ Content }}</article>")
+        parts = []
+        template.write(parts.append, {"Content": lambda write: write("<p>a</p>")})
+        self.assertEqual("".join(parts), "<article><p>a</p></article>")
+
+    def test_basepath(self):
+        template = Template(
+            "<link href=\"/index.css\" /><a href=\"https://boot.dev\">x</a>{{ Content }}",
+            "/static-site-generator/",
+        )
+        self.assertEqual(
+            template.render({"Content": "href=\"/not/rewritten\""}),
+            "<link href=\"/static-site-generator/index.css\" /><a href=\"https://boot.dev\">x</a>href=\"/not/rewritten\"",
+        )
+
+    def test_load_template_cached(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, "w") as f:
+                f.write("{{ Title }}")
+            template = load_template(path, "/")
+            self.assertIs(load_template(path, "/"), template)
+            self.assertIsNot(load_template(path, "/blog/"), template)
+
+
+if __name__ == "__main__":
+    unittest.main()
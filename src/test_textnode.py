@@ -29,6 +29,12 @@ class TestTextNode(unittest.TestCase):
         node2 = TextNode("This is a text node", TextType.BOLD, "https://boldtextnode.com")
         self.assertNotEqual(node, node2)
 
+    def test_slots(self):
+        node = TextNode("This is a text node", TextType.BOLD)
+        self.assertFalse(hasattr(node, "__dict__"))
+        with self.assertRaises(AttributeError):
+            node.other = "not allowed"
+        self.assertEqual(repr(node), "TextNode(This is a text node, bold, None)")
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
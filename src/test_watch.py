@@ -0,0 +1,139 @@
+import os
+import tempfile
+import threading
+import unittest
+
+import log
+from functions import set_asset_map
+from watch import POLL_INTERVAL, Observer, ChangeNotifier, scan_files, diff_files, SiteWatcher
+
+class TestWatch(unittest.TestCase):
+    def setUp(self):
+        log.quiet = True
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.content = os.path.join(self.tmp.name, "content")
+        self.static = os.path.join(self.tmp.name, "static")
+        self.docs = os.path.join(self.tmp.name, "docs")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        self.manifest = os.path.join(self.tmp.name, "cache", "manifest.json")
+        os.makedirs(os.path.join(self.content, "blog"))
+        os.makedirs(self.static)
+        os.makedirs(self.docs)
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.content, "blog", "tom.md"), "# Tom")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+
+    def tearDown(self):
+        log.quiet = False
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def read(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def watcher(self):
+        return SiteWatcher(self.content, self.static, self.template, self.docs, "/", self.manifest)
+
+    def test_scan_diff(self):
+        old = scan_files(self.tmp.name)
+        self.assertEqual(len(old), 4)
+        self.write(os.path.join(self.content, "index.md"), "# Home, changed")
+        os.remove(os.path.join(self.static, "index.css"))
+        changed, removed = diff_files(old, scan_files(self.tmp.name))
+        self.assertSetEqual(changed, {os.path.join(self.content, "index.md")})
+        self.assertSetEqual(removed, {os.path.join(self.static, "index.css")})
+
+    def test_wait_for_changes(self):
+        watcher = self.watcher()
+        self.assertGreaterEqual(watcher.interval, POLL_INTERVAL)
+        index = os.path.join(self.content, "index.md")
+        self.write(index, "# Home, changed")
+        self.assertEqual(watcher.wait_for_changes(), ({index}, set()))
+
+    @unittest.skipIf(Observer is None, "watchdog is not installed")
+    def test_notifier(self):
+        watcher = self.watcher()
+        watcher.notifier = ChangeNotifier(watcher.watched_paths())
+        self.addCleanup(watcher.notifier.close)
+        self.assertFalse(watcher.wait(0.1))
+
+        css = os.path.join(self.static, "index.css")
+        timer = threading.Timer(0.1, self.write, (css, "body { color: red; }"))
+        timer.start()
+        self.addCleanup(timer.cancel)
+        self.assertEqual(watcher.wait_for_changes(), ({css}, set()))
+
+    def test_single_page(self):
+        watcher = self.watcher()
+        index = os.path.join(self.content, "index.md")
+        watcher.handle_changes({index}, set())
+        self.assertEqual(self.read(os.path.join(self.docs, "index.html")), "<title>Home</title><div><h1>Home</h1></div>")
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "blog", "tom.html")))
+        self.assertIn("index.md", watcher.manifest["pages"])
+
+        watcher.handle_changes(set(), {index})
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "index.html")))
+        self.assertNotIn("index.md", watcher.manifest["pages"])
+
+    def test_template(self):
+        watcher = self.watcher()
+        self.write(self.template, "<h2>{{ Title }}</h2>")
+        watcher.handle_changes({self.template}, set())
+        self.assertEqual(self.read(os.path.join(self.docs, "blog", "tom.html")), "<h2>Tom</h2>")
+        self.assertEqual(self.read(os.path.join(self.docs, "index.html")), "<h2>Home</h2>")
+
+    def test_asset(self):
+        watcher = self.watcher()
+        css = os.path.join(self.static, "index.css")
+        watcher.handle_changes({css}, set())
+        self.assertEqual(self.read(os.path.join(self.docs, "index.css")), "body {}")
+        watcher.handle_changes(set(), {css})
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "index.css")))
+
+    def test_image_dependents(self):
+        image = os.path.join(self.static, "tom.png")
+        tom = os.path.join(self.content, "blog", "tom.md")
+        self.write(image, "png")
+        self.write(tom, "# Tom\n\n![Tom](/tom.png)")
+        watcher = self.watcher()
+        watcher.handle_changes({image, tom}, set())
+        self.assertEqual(watcher.manifest["pages"]["blog/tom.md"]["deps"], {"asset:tom.png": [None, None]})
+
+        # a new copy of the image does not change the page showing it
+        dest = os.path.join(self.docs, "blog", "tom.html")
+        os.remove(dest)
+        self.write(image, "png2")
+        watcher.handle_changes({image}, set())
+        self.assertFalse(os.path.exists(dest))
+
+        # only the page showing a removed image is generated again
+        os.remove(image)
+        watcher.handle_changes(set(), {image})
+        self.assertTrue(os.path.exists(dest))
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "index.html")))
+
+    def test_fingerprinted_asset(self):
+        css = os.path.join(self.static, "index.css")
+        self.write(self.template, "<link href=\"/index.css\">{{ Content }}")
+        watcher = SiteWatcher(self.content, self.static, self.template, self.docs, "/", self.manifest, fingerprint=True)
+        self.addCleanup(set_asset_map, None)
+        watcher.handle_changes({css}, set())
+        first = watcher.manifest["assets"]["index.css"]["output"]
+        self.assertEqual(self.read(os.path.join(self.docs, first)), "body {}")
+        self.assertEqual(self.read(os.path.join(self.docs, "index.html")), f"<link href=\"/{first}\"><div><h1>Home</h1></div>")
+
+        # every page links to the new stylesheet, the old copy is removed
+        self.write(css, "body { color: red; }")
+        watcher.handle_changes({css}, set())
+        second = watcher.manifest["assets"]["index.css"]["output"]
+        self.assertFalse(os.path.exists(os.path.join(self.docs, first)))
+        self.assertEqual(self.read(os.path.join(self.docs, "blog", "tom.html")), f"<link href=\"/{second}\"><div><h1>Tom</h1></div>")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+# attributes whose values are urls and get rewritten for the basepath
+URL_ATTRIBUTES = ("href", "src")
+
+# attributes with a list of urls and descriptors
+# (e.g. "/images/tom.480w.png 480w, /images/tom.png 1200w")
+SRCSET_ATTRIBUTES = ("srcset",)
+
+###################################################################
+# Function: basepath_url - create url rewrite function for a      #
+#                          basepath, absolute urls ("/...") are   #
+#                          moved below the basepath               #
+# Input:    basepath - path to the root directory of the project  #
+#           assets   - AssetMap of fingerprinted static files or  #
+#                      None (see fingerprint.py)                  #
+# Return:   function mapping a url to the url for the basepath    #
+###################################################################
+def basepath_url(basepath, assets=None):
+    if assets is not None:
+        def rewrite(url):
+            if url.startswith("/"):
+                return basepath + assets.rewrite(url)[1:]
+            return url
+        return rewrite
+
+    def rewrite(url):
+        if url.startswith("/"):
+            return basepath + url[1:]
+        return url
+    return rewrite
+
+###################################################################
+# Function: srcset_url - rewrite every url of a srcset value      #
+# Input:    value - srcset attribute value                        #
+#           url   - url rewrite function                          #
+# Return:   srcset value with rewritten urls                      #
+###################################################################
+def srcset_url(value, url):
+    candidates = []
+    for candidate in value.split(","):
+        parts = candidate.strip().split(" ", 1)
+        parts[0] = url(parts[0])
+        candidates.append(" ".join(parts))
+    return ", ".join(candidates)
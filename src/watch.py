@@ -0,0 +1,389 @@
+import os
+import threading
+import time
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    # without watchdog the watched paths are polled
+    Observer = None
+
+import log
+
+from functions import (
+    generate_page,
+    generate_pages,
+    report_page_errors,
+    sync_file,
+    output_stats,
+    take_output_stats,
+    set_search_terms,
+    take_search_terms,
+    set_page_urls,
+    take_page_urls,
+    set_asset_map,
+    set_image_map,
+    sync_images,
+    asset_hash,
+    hash_template
+)
+from manifest import (
+    hash_file,
+    load_manifest,
+    save_manifest,
+    page_inputs,
+    record_page,
+    record_asset,
+    asset_outputs
+)
+from searchindex import SEARCH_INDEX_DIR, index_files
+from depgraph import PathIndex, broken_links, report_broken_links
+from fingerprint import is_fingerprinted, fingerprint_name, asset_map_from_manifest
+from compress import compress_files, manifest_outputs, remove_variants
+from images import is_responsive_image, image_map_from_manifest
+
+# polling scans every watched file, the interval grows with the time a
+# scan takes so that scanning uses at most 1 / POLL_SCAN_FACTOR of the
+# time, changes in large trees are then noticed up to the interval late
+# (install watchdog to be notified by the OS instead)
+POLL_INTERVAL = 0.05
+POLL_SCAN_FACTOR = 10
+DEBOUNCE_DELAY = 0.05
+
+# longest wait for a notification, keeps the watcher interruptible
+NOTIFY_TIMEOUT = 1.0
+
+# events of files that were only read (e.g. the sources by a rebuild)
+IGNORED_EVENTS = ("opened", "closed_no_write")
+
+###################################################################
+# Function: scan_files - collect mtime and size of all files      #
+#                        below a directory (or of a single file)  #
+# Input:    path - directory or file to scan                      #
+# Return:   dictionary path -> (mtime, size)                      #
+###################################################################
+def scan_files(path):
+    files = {}
+    if os.path.isfile(path):
+        stat = os.stat(path)
+        files[os.path.abspath(path)] = (stat.st_mtime_ns, stat.st_size)
+        return files
+
+    pending = [os.path.abspath(path)]
+    while len(pending) > 0:
+        try:
+            entries = os.scandir(pending.pop())
+        except FileNotFoundError:
+            continue
+
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.is_file():
+                    stat = entry.stat()
+                    files[entry.path] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+###################################################################
+# Function: diff_files - compare two results of scan_files        #
+# Input:    old_files - previous scan                             #
+#           new_files - current scan                              #
+# Return:   tuple of (set of changed/added, set of removed paths) #
+###################################################################
+def diff_files(old_files, new_files):
+    changed = set(path for path, info in new_files.items() if old_files.get(path) != info)
+    removed = set(old_files) - set(new_files)
+    return changed, removed
+
+# wakes the watcher when the OS reports a change below the watched paths
+# (inotify, FSEvents or ReadDirectoryChangesW through watchdog), which
+# paths changed is still found by a scan (see SiteWatcher.poll)
+class ChangeNotifier():
+    def __init__(self, paths):
+        self.changed = threading.Event()
+        handler = FileSystemEventHandler()
+        handler.on_any_event = self.on_any_event
+        self.observer = Observer()
+        for path in paths:
+            if os.path.isdir(path):
+                self.observer.schedule(handler, path, recursive=True)
+            else:
+                # single files are watched through their directory
+                self.observer.schedule(handler, os.path.dirname(path), recursive=False)
+        self.observer.start()
+
+    def on_any_event(self, event):
+        if event.event_type not in IGNORED_EVENTS:
+            self.changed.set()
+
+    # returns False if nothing changed until the timeout
+    def wait(self, timeout):
+        changed = self.changed.wait(timeout)
+        self.changed.clear()
+        return changed
+
+    def close(self):
+        self.observer.stop()
+        self.observer.join()
+
+# keeps the build process warm and regenerates only what a change affects:
+# a markdown file -> its page, a static file -> its copy, the template ->
+# all pages
+class SiteWatcher():
+    def __init__(self, content_dir, static_dir, template_path, dest_dir, basepath, manifest_path, jobs=1,
+                 search_index=None, fingerprint=False, compress=False, images=None):
+        self.content_dir = os.path.abspath(content_dir)
+        self.static_dir = os.path.abspath(static_dir)
+        self.template_path = os.path.abspath(template_path)
+        self.dest_dir = os.path.abspath(dest_dir)
+        self.basepath = basepath
+        self.manifest_path = manifest_path
+        self.jobs = jobs
+        self.search_index = search_index
+        self.fingerprint = fingerprint
+        self.compress = compress
+        # ImageCache for downscaled images or None (see images.py)
+        self.images = images
+        if search_index is not None:
+            set_search_terms({})
+        set_page_urls({})
+
+        self.manifest = load_manifest(manifest_path)
+        self.assets = asset_map_from_manifest(self.manifest)
+        set_asset_map(self.assets)
+        set_image_map(image_map_from_manifest(self.manifest))
+        self.template_hash = hash_template(self.template_path, self.basepath, self.assets)
+        # ChangeNotifier while running with watchdog, else the paths are polled
+        self.notifier = None
+        self.interval = POLL_INTERVAL
+        self.files = self.scan()
+
+    def watched_paths(self):
+        return (self.content_dir, self.static_dir, self.template_path)
+
+    def scan(self):
+        start = time.perf_counter()
+        files = {}
+        for path in self.watched_paths():
+            files.update(scan_files(path))
+        self.interval = max(POLL_INTERVAL, (time.perf_counter() - start) * POLL_SCAN_FACTOR)
+        return files
+
+    def page_dest(self, src):
+        key = os.path.relpath(src, self.content_dir)
+        return key, key[:-len(".md")] + ".html"
+
+    def poll(self):
+        files = self.scan()
+        changed, removed = diff_files(self.files, files)
+        self.files = files
+        return changed, removed
+
+    # wait for a notification or the next poll, returns False if nothing
+    # changed until the timeout, polls are at least the interval apart
+    def wait(self, timeout=None):
+        if self.notifier is not None:
+            return self.notifier.wait(timeout if timeout is not None else NOTIFY_TIMEOUT)
+        time.sleep(max(timeout or 0, self.interval))
+        return True
+
+    # wait until files changed and no further change happened for the
+    # debounce delay, this coalesces bursts of events (e.g. editor saves)
+    def wait_for_changes(self, debounce=DEBOUNCE_DELAY):
+        changed, removed = set(), set()
+        while len(changed) == 0 and len(removed) == 0:
+            if self.wait():
+                changed, removed = self.poll()
+
+        while self.wait(debounce):
+            more_changed, more_removed = self.poll()
+            if len(more_changed) == 0 and len(more_removed) == 0:
+                break
+            changed = (changed - more_removed) | more_changed
+            removed = (removed - more_changed) | more_removed
+        return changed, removed
+
+    def path_index(self):
+        pages = dict((entry["output"], key) for key, entry in self.manifest["pages"].items())
+        return PathIndex(self.manifest["assets"], pages)
+
+    def record(self, src, urls):
+        key, output = self.page_dest(src)
+        inputs = page_inputs(hash_file(src), self.template_hash, self.basepath)
+        record_page(self.manifest, key, inputs, output, urls)
+        # the page itself has to be known to resolve links to it
+        self.manifest["pages"][key]["deps"] = self.path_index().dependencies(urls, output)
+
+    def update_page(self, src):
+        _, output = self.page_dest(src)
+        generate_page(src, self.template_path, os.path.join(self.dest_dir, output), self.basepath)
+        self.record(src, take_page_urls().get(src, []))
+
+    def remove_page(self, src):
+        key, output = self.page_dest(src)
+        self.manifest["pages"].pop(key, None)
+        if self.search_index is not None:
+            self.search_index.remove(key)
+        dest = os.path.join(self.dest_dir, output)
+        if os.path.isfile(dest):
+            log.info(f"Removing stale page {dest}")
+            os.remove(dest)
+            output_stats["deleted"] += 1
+        remove_variants(dest)
+
+    def update_asset(self, src):
+        key = os.path.relpath(src, self.static_dir)
+        log.info("Copy file \"", src, "\" to \"", os.path.join(self.dest_dir, key), "\"")
+        sync_file(src, os.path.join(self.dest_dir, key))
+        stat = os.stat(src)
+        old_entry = self.manifest["assets"].get(key)
+        fingerprinted = self.fingerprint and is_fingerprinted(key)
+        responsive = self.images is not None and is_responsive_image(key)
+        if not fingerprinted and not responsive:
+            record_asset(self.manifest, key, stat)
+        else:
+            file_hash = asset_hash(src, stat, old_entry)
+            output = None
+            if fingerprinted:
+                output = fingerprint_name(key, file_hash)
+                log.info("Copy file \"", src, "\" to \"", os.path.join(self.dest_dir, output), "\"")
+                sync_file(src, os.path.join(self.dest_dir, output))
+            record_asset(self.manifest, key, stat, file_hash, output)
+            if responsive:
+                sync_images([key], self.static_dir, self.dest_dir, self.manifest, self.images)
+
+        # files of the previous version (e.g. with another fingerprint)
+        if old_entry is not None:
+            current = asset_outputs(key, self.manifest["assets"][key])
+            for old_output in asset_outputs(key, old_entry):
+                if old_output not in current:
+                    self.remove_output(old_output)
+
+    def remove_asset(self, src):
+        key = os.path.relpath(src, self.static_dir)
+        entry = self.manifest["assets"].pop(key, None)
+        self.remove_output(key)
+        if entry is not None:
+            for output in asset_outputs(key, entry)[1:]:
+                self.remove_output(output)
+
+    def remove_output(self, output):
+        dest = os.path.join(self.dest_dir, output)
+        if os.path.isfile(dest):
+            log.info(f"Removing stale file {dest}")
+            os.remove(dest)
+        remove_variants(dest)
+
+    # pages generated from now on link to the current fingerprinted
+    # names, returns True if the template output changed with them
+    def refresh_assets(self):
+        self.assets = asset_map_from_manifest(self.manifest)
+        set_asset_map(self.assets)
+        set_image_map(image_map_from_manifest(self.manifest))
+        template_hash = hash_template(self.template_path, self.basepath, self.assets)
+        if template_hash == self.template_hash:
+            return False
+        self.template_hash = template_hash
+        return True
+
+    def rebuild_pages(self):
+        pages = []
+        for src in sorted(self.files):
+            if src.startswith(self.content_dir + os.sep) and src.endswith(".md"):
+                _, output = self.page_dest(src)
+                pages.append((src, os.path.join(self.dest_dir, output)))
+
+        errors = generate_pages(pages, self.template_path, self.basepath, self.jobs)
+        urls = take_page_urls()
+        failed = set(src for src, _ in errors)
+        for src, _ in pages:
+            if src not in failed:
+                self.record(src, urls.get(src, []))
+        report_page_errors(errors)
+
+    # regenerate pages whose linked pages or images were added, removed
+    # or changed (see depgraph.py)
+    def update_dependents(self):
+        path_index = self.path_index()
+        for key, entry in sorted(self.manifest["pages"].items()):
+            if path_index.dependencies(entry["urls"], entry["output"]) != entry["deps"]:
+                self.update_page(os.path.join(self.content_dir, key))
+
+    def update_search_index(self):
+        if self.search_index is None:
+            return
+
+        for src, page in take_search_terms().items():
+            key, output = self.page_dest(src)
+            self.search_index.update(key, output.replace(os.sep, "/"), page["title"], page["terms"])
+        self.search_index.write(os.path.join(self.dest_dir, SEARCH_INDEX_DIR))
+
+    # only variants of written files are outdated (see compress.py)
+    def update_variants(self):
+        if not self.compress:
+            return
+
+        paths = manifest_outputs(self.manifest, self.dest_dir)
+        if self.search_index is not None:
+            paths.extend(index_files(os.path.join(self.dest_dir, SEARCH_INDEX_DIR)))
+        compress_files(paths, self.jobs)
+
+    # regenerate only the outputs affected by changed and removed files
+    def handle_changes(self, changed, removed):
+        # static files first, pages are generated with their new names
+        for path in sorted(removed):
+            if path.startswith(self.static_dir + os.sep):
+                self.remove_asset(path)
+        for path in sorted(changed):
+            if path.startswith(self.static_dir + os.sep):
+                self.update_asset(path)
+
+        if self.refresh_assets() or self.template_path in changed:
+            # every page depends on the template
+            self.rebuild_pages()
+            changed = set(path for path in changed if not path.startswith(self.content_dir + os.sep))
+
+        for path in sorted(removed):
+            if path.startswith(self.content_dir + os.sep) and path.endswith(".md"):
+                self.remove_page(path)
+
+        for path in sorted(changed):
+            if path.startswith(self.content_dir + os.sep) and path.endswith(".md"):
+                self.update_page(path)
+        self.update_dependents()
+        self.update_search_index()
+        self.update_variants()
+
+    def run(self):
+        if Observer is not None:
+            self.notifier = ChangeNotifier(self.watched_paths())
+            # changes before the notifier started
+            self.files = self.scan()
+        print(f"Watching {self.content_dir}, {self.static_dir} and {self.template_path} for changes...")
+        if self.notifier is None:
+            print(f"Polling every {self.interval * 1000:.0f} ms (install watchdog to be notified of changes)")
+        try:
+            while True:
+                changed, removed = self.wait_for_changes()
+                start = time.perf_counter()
+                try:
+                    self.handle_changes(changed, removed)
+                    report_broken_links(broken_links(self.manifest))
+                except Exception as e:
+                    # keep watching, the next save may fix the error
+                    print(f"Build failed: {type(e).__name__}: {e}")
+                elapsed = (time.perf_counter() - start) * 1000
+                stats = take_output_stats()
+                print(f"Rebuilt {len(changed) + len(removed)} changed file(s) in {elapsed:.0f} ms "
+                      f"(pages: {stats['written']} written, {stats['skipped']} unchanged, {stats['deleted']} deleted)")
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if self.notifier is not None:
+                self.notifier.close()
+                self.notifier = None
+            save_manifest(self.manifest_path, self.manifest)
+            if self.search_index is not None:
+                self.search_index.save()